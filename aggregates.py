@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Persisted, mergeable aggregate state behind the card data.
+
+`data_pipeline.generate_all_data(..., state_path=...)` keeps everything the
+cards need in one JSON file instead of recomputing it from the full history on
+every run:
+
+  per weekday   solve count, integer sum and sum of squares of seconds,
+                min/max, a seconds -> count histogram, and the N fastest and
+                slowest solves (outlier candidates for cards 5 & 6)
+  overall       solved count, gold stars, total seconds, first/last date
+  card 4        one (date, weekday, index, cumulative seconds, puzzle_id) row
+                per solve, appended in date order
+  digest        an order-independent checksum of every solve ingested so far
+
+All sums are exact Python integers, so merging two `DayStats` (or ingesting
+rows in batches) gives exactly the state a single pass would. Means and
+standard deviations are derived from those integers with `mean_minutes` /
+`std_minutes`; the full-recompute path in `data_pipeline.clean_and_preprocess`
+uses the same helpers, so both paths produce identical cards.
+
+`data_pipeline.update_state` only loads solves dated after `max_date` and
+ingests them. Earlier solves are not diffed row by row: their `solve_digest`
+is compared with `digest` (one vectorized hash, no per-solve state), and a
+mismatch (an edited, removed or newly solved older puzzle) rebuilds the
+state. When the table file has not changed since the last update (`stamp`),
+nothing is read or written at all. Card 4 is still drawn from every
+`evolution` row, since its downsampling depends on the whole series.
+"""
+from __future__ import annotations
+
+import math
+import os
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import json_io
+
+STATE_VERSION = 2
+DAY_ORDER = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+OUTLIER_CANDIDATES = 10
+
+
+def mean_minutes(count: int, total_seconds: int) -> float:
+    """Mean solve time in minutes, correctly rounded from the integer sum."""
+    if count == 0:
+        return math.nan
+    return float(Fraction(total_seconds, 60 * count))
+
+
+def std_minutes(count: int, total_seconds: int, total_sq: int) -> float:
+    """Sample (ddof=1) standard deviation in minutes from integer moments."""
+    if count < 2:
+        return math.nan
+    var = Fraction(count * total_sq - total_seconds * total_seconds, count * (count - 1) * 3600)
+    return math.sqrt(float(var))
+
+
+def daily_stats_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-weekday `daily_mean` / `daily_std` (minutes) from exact integer moments."""
+    timed = df[df['secondsSpentSolving'].notna()]
+    secs = timed['secondsSpentSolving'].astype('int64')
+    moments = pd.DataFrame({'Day_of_Week': timed['Day_of_Week'], 'n': 1, 's': secs, 'sq': secs * secs}) \
+        .groupby('Day_of_Week', observed=True).sum()
+    rows = [{'Day_of_Week': day,
+             'daily_mean': mean_minutes(int(r['n']), int(r['s'])),
+             'daily_std': std_minutes(int(r['n']), int(r['s']), int(r['sq']))}
+            for day, r in moments.iterrows()]
+    out = pd.DataFrame(rows, columns=['Day_of_Week', 'daily_mean', 'daily_std'])
+    out['Day_of_Week'] = pd.Categorical(out['Day_of_Week'], categories=DAY_ORDER, ordered=True)
+    return out
+
+
+def solve_digest(df: pd.DataFrame) -> int:
+    """Order-independent checksum of solved rows (id, date, seconds, star, author).
+
+    Row hashes are summed modulo 2**64, so the digest of a table equals the sum
+    of the digests of any split of it, the same way `DayStats` merge.
+    """
+    if df.empty:
+        return 0
+    keys = pd.DataFrame({
+        'puzzle_id': df['puzzle_id'].to_numpy(dtype='int64'),
+        'print_date': df['print_date'].to_numpy(dtype='datetime64[D]').astype('int64'),
+        'seconds': df['secondsSpentSolving'].fillna(-1).to_numpy(dtype='int64'),
+        'gold': (df['star'] == 'Gold').to_numpy(dtype='int64'),
+        'author': df['author'].astype(object).to_numpy(),
+    })
+    return int(pd.util.hash_pandas_object(keys, index=False).to_numpy().sum(dtype=np.uint64))
+
+
+def _date_str(ts: Any) -> str:
+    return pd.Timestamp(ts).strftime('%Y-%m-%d')
+
+
+class DayStats:
+    """Mergeable running statistics for one weekday (integer seconds, so merges are exact)."""
+
+    def __init__(self, top_n: int = OUTLIER_CANDIDATES):
+        self.top_n = top_n
+        self.rows = 0        # solved puzzles, with or without a solve time
+        self.count = 0       # solved puzzles with a solve time
+        self.total = 0
+        self.total_sq = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self.values: Dict[int, int] = {}
+        # [seconds, print_date, puzzle_id, author], ordered fastest/slowest first, ties by date
+        self.fastest: List[list] = []
+        self.slowest: List[list] = []
+
+    def add(self, seconds: Optional[int], print_date: str, puzzle_id: int, author: Any) -> None:
+        self.rows += 1
+        if seconds is None:
+            return
+        self.count += 1
+        self.total += seconds
+        self.total_sq += seconds * seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.values[seconds] = self.values.get(seconds, 0) + 1
+        entry = [seconds, print_date, puzzle_id, author]
+        self._trim(self.fastest + [entry], self.slowest + [entry])
+
+    def merge(self, other: "DayStats") -> None:
+        self.rows += other.rows
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        for bound, pick in (("min", min), ("max", max)):
+            mine, theirs = getattr(self, bound), getattr(other, bound)
+            setattr(self, bound, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        for s, c in other.values.items():
+            self.values[s] = self.values.get(s, 0) + c
+        self._trim(self.fastest + other.fastest, self.slowest + other.slowest)
+
+    def _trim(self, fastest: List[list], slowest: List[list]) -> None:
+        self.fastest = sorted(fastest, key=lambda e: (e[0], e[1]))[:self.top_n]
+        self.slowest = sorted(slowest, key=lambda e: (-e[0], e[1]))[:self.top_n]
+
+    @property
+    def mean_minutes(self) -> float:
+        return mean_minutes(self.count, self.total)
+
+    @property
+    def std_minutes(self) -> float:
+        return std_minutes(self.count, self.total, self.total_sq)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows, "count": self.count, "total": self.total, "total_sq": self.total_sq,
+            "min": self.min, "max": self.max, "values": {str(s): c for s, c in sorted(self.values.items())},
+            "fastest": self.fastest, "slowest": self.slowest,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], top_n: int) -> "DayStats":
+        d = cls(top_n)
+        d.rows, d.count, d.total, d.total_sq = data["rows"], data["count"], data["total"], data["total_sq"]
+        d.min, d.max = data["min"], data["max"]
+        d.values = {int(s): c for s, c in data["values"].items()}
+        d.fastest, d.slowest = data["fastest"], data["slowest"]
+        return d
+
+
+class AggregateState:
+    """Everything the cards need, updated by folding in only the solves dated after `max_date`."""
+
+    def __init__(self, source: Optional[Dict[str, Any]] = None, top_n: int = OUTLIER_CANDIDATES):
+        self.source = source or {}
+        self.top_n = top_n
+        self.rows = 0
+        self.gold = 0
+        self.total_seconds = 0
+        self.min_date: Optional[str] = None
+        self.max_date: Optional[str] = None
+        self.days: Dict[str, DayStats] = {d: DayStats(top_n) for d in DAY_ORDER}
+        self.digest = 0
+        # os.stat (size, mtime_ns) of the table file the state was last brought up to date with
+        self.stamp: Optional[List[int]] = None
+        # [print_date, Day_of_Week, puzzle_index, cumulative_seconds or None, puzzle_id]
+        self.evolution: List[list] = []
+
+    # --- updating ---
+
+    def history_changed(self, df: pd.DataFrame) -> Optional[str]:
+        """Why the solved rows dated up to `max_date` no longer match the state, or None if they do."""
+        if len(df) != self.rows:
+            return "solves dated on or before the saved state were added or removed"
+        if solve_digest(df) != self.digest:
+            return "solve times, stars or authors changed"
+        return None
+
+    def ingest(self, df: pd.DataFrame) -> int:
+        """Add solved rows dated after everything already ingested; returns the number added."""
+        if df.empty:
+            return 0
+        df = df.sort_values('print_date', kind='stable')
+        batch = {d: DayStats(self.top_n) for d in DAY_ORDER}
+        running = {d: (s.rows, s.total) for d, s in self.days.items()}
+        secs = df['secondsSpentSolving'].to_numpy(dtype='float64')
+        for (pid, date, day, star, author), s in zip(
+                df[['puzzle_id', 'print_date', 'Day_of_Week', 'star', 'author']].itertuples(index=False, name=None), secs):
+            date = _date_str(date)
+            if self.max_date is not None and date <= self.max_date:
+                raise ValueError(f"Cannot ingest {date}: state already covers up to {self.max_date}")
+            seconds = None if math.isnan(s) else int(s)
+            author = None if pd.isna(author) else str(author)
+            gold = star == 'Gold'
+            batch[day].add(seconds, date, int(pid), author)
+            rows, total = running[day]
+            rows, total = rows + 1, total + (seconds or 0)
+            running[day] = (rows, total)
+            self.evolution.append([date, day, rows, None if seconds is None else total, int(pid)])
+            self.rows += 1
+            self.gold += gold
+            self.total_seconds += seconds or 0
+            self.min_date = date if self.min_date is None else min(self.min_date, date)
+        self.max_date = self.evolution[-1][0] if self.max_date is None else max(self.max_date, self.evolution[-1][0])
+        for day, stats in batch.items():
+            self.days[day].merge(stats)
+        self.digest = (self.digest + solve_digest(df)) % 2 ** 64
+        return len(df)
+
+    # --- card inputs ---
+
+    def weekly_stats(self) -> pd.DataFrame:
+        """Card 2's numeric columns: fastest / average / slowest minutes per observed weekday."""
+        rows = [{'Day_of_Week': day,
+                 'fastest_in_minutes': s.min / 60,
+                 'average_in_minutes': s.mean_minutes,
+                 'slowest_in_minutes': s.max / 60}
+                for day, s in self.days.items() if s.count]
+        out = pd.DataFrame(rows, columns=['Day_of_Week', 'fastest_in_minutes', 'average_in_minutes', 'slowest_in_minutes'])
+        out['Day_of_Week'] = pd.Categorical(out['Day_of_Week'], categories=DAY_ORDER, ordered=True)
+        return out
+
+    def histograms(self, num_bins: int) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+        """(day, counts, bin_edges) per observed weekday, from the seconds -> count tables."""
+        out = []
+        for day, s in self.days.items():
+            if not s.count:
+                continue
+            secs = np.fromiter(s.values.keys(), dtype=np.float64, count=len(s.values))
+            weights = np.fromiter(s.values.values(), dtype=np.float64, count=len(s.values))
+            bins = np.linspace(s.min / 60, s.max / 60, num_bins + 1)
+            hist, edges = np.histogram(secs / 60, bins=bins, weights=weights)
+            out.append((day, hist.astype(np.int64), edges))
+        return out
+
+    def evolution_frame(self) -> pd.DataFrame:
+        """Card 4's numeric columns, one row per solved puzzle."""
+        dates = pd.to_datetime([e[0] for e in self.evolution])
+        index = np.array([e[2] for e in self.evolution], dtype=np.int64)
+        cumulative = np.array([np.nan if e[3] is None else e[3] for e in self.evolution], dtype=np.float64)
+        return pd.DataFrame({
+            'print_date': dates,
+            'Day_of_Week': pd.Categorical([e[1] for e in self.evolution], categories=DAY_ORDER, ordered=True),
+            'day_of_year': dates.dayofyear,
+            'puzzle_index': index,
+            'average_time_min': (cumulative / index) / 60,
+        })
+
+    def solved_frame(self) -> pd.DataFrame:
+        """puzzle_id, print_date and Day_of_Week of every ingested solve, in date order."""
+        return pd.DataFrame({
+            'puzzle_id': np.array([e[4] for e in self.evolution], dtype=np.int64),
+            'print_date': pd.to_datetime([e[0] for e in self.evolution]),
+            'Day_of_Week': pd.Categorical([e[1] for e in self.evolution], categories=DAY_ORDER, ordered=True),
+        })
+
+    def outlier_frame(self) -> pd.DataFrame:
+        """Fastest/slowest candidates per weekday with the columns cards 5 & 6 rank on."""
+        rows, seen = [], set()
+        for day, s in self.days.items():
+            for seconds, date, pid, author in s.fastest + s.slowest:
+                if pid in seen:
+                    continue
+                seen.add(pid)
+                rows.append({'print_date': date, 'puzzle_id': pid, 'Day_of_Week': day, 'secondsSpentSolving': seconds,
+                             'author': author, 'daily_mean': s.mean_minutes, 'daily_std': s.std_minutes})
+        cols = ['print_date', 'puzzle_id', 'Day_of_Week', 'secondsSpentSolving', 'author', 'daily_mean', 'daily_std']
+        df = pd.DataFrame(rows, columns=cols).sort_values('print_date', kind='stable').reset_index(drop=True)
+        df['print_date'] = pd.to_datetime(df['print_date'])
+        df['Day_of_Week'] = pd.Categorical(df['Day_of_Week'], categories=DAY_ORDER, ordered=True)
+        df['minutesSpentSolving'] = df['secondsSpentSolving'] / 60
+        df['z_score'] = (df['minutesSpentSolving'] - df['daily_mean']) / df['daily_std']
+        return df
+
+    # --- persistence ---
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION, "source": self.source, "top_n": self.top_n,
+            "rows": self.rows, "gold": self.gold, "total_seconds": self.total_seconds,
+            "min_date": self.min_date, "max_date": self.max_date,
+            "days": {d: s.to_json() for d, s in self.days.items()},
+            "digest": format(self.digest, "016x"), "stamp": self.stamp, "evolution": self.evolution,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "AggregateState":
+        state = cls(data.get("source"), data.get("top_n", OUTLIER_CANDIDATES))
+        state.rows, state.gold, state.total_seconds = data["rows"], data["gold"], data["total_seconds"]
+        state.min_date, state.max_date = data["min_date"], data["max_date"]
+        state.days = {d: DayStats.from_json(data["days"][d], state.top_n) for d in DAY_ORDER}
+        state.digest, state.stamp = int(data["digest"], 16), data["stamp"]
+        state.evolution = data["evolution"]
+        return state
+
+    def save(self, path: str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        json_io.dump_path(self.to_json(), tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["AggregateState"]:
+        """The saved state, or None if it is missing, unreadable or from another version."""
+        try:
+            data = json_io.load_path(path)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+            return None
+        return cls.from_json(data)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark card generation on synthetic multi-year histories.
+
+For each history length this times `data_pipeline.build_cards` end to end and
+compares the old per-row label formatting (`Series.apply(format_time)`) with
+`format_time_array` on card 4's one-row-per-puzzle column. If the cards are
+vectorized, the per-row cost (µs/row) stays roughly flat as the history grows.
+
+Usage:
+    python3 benchmarks/bench_cards.py
+    python3 benchmarks/bench_cards.py --years 1 5 20 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_pipeline import add_daily_stats, build_cards, format_time, format_time_array, select_solved  # noqa: E402
+
+# Typical solve times per weekday (median seconds) for the synthetic data
+DAY_MEDIANS = {"Mon": 420, "Tue": 540, "Wed": 720, "Thu": 1080, "Fri": 1200, "Sat": 1500, "Sun": 1800}
+
+
+def synthetic_table(years: int, seed: int = 0, solve_rate: float = 0.8) -> pd.DataFrame:
+    """A loaded-table-shaped frame with one daily puzzle per day for `years` years."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-01", periods=365 * years, freq="D")
+    days = dates.strftime("%a")
+    medians = np.array([DAY_MEDIANS[d] for d in days])
+    solved = rng.random(len(dates)) < solve_rate
+    return pd.DataFrame({
+        "puzzle_id": np.arange(len(dates), dtype=np.int32) + 10000,
+        "print_date": dates,
+        "Day_of_Week": days,
+        "author": pd.Categorical(rng.choice([f"Author {i}" for i in range(200)], len(dates))),
+        "star": pd.Categorical(np.where(rng.random(len(dates)) < 0.6, "Gold", None)),
+        "solved": solved,
+        "percent_filled": np.where(solved, 100.0, 40.0).astype(np.float32),
+        "secondsSpentSolving": np.maximum(60, rng.lognormal(np.log(medians), 0.35)).astype(np.int32),
+    })
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Benchmark card generation vs. history length")
+    p.add_argument("--years", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="History lengths to test")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is reported (default: 3)")
+    args = p.parse_args(argv)
+
+    print(f"{'years':>5} {'rows':>7} {'cards s':>9} {'µs/row':>7} {'apply s':>9} {'array s':>9} {'speedup':>8}")
+    for years in args.years:
+        df_solved = add_daily_stats(select_solved(synthetic_table(years)))
+        rows = len(df_solved)
+        cards_s = best_of(lambda: build_cards(df_solved), args.repeat)
+        minutes = df_solved["minutesSpentSolving"]
+        apply_s = best_of(lambda: minutes.apply(format_time), args.repeat)
+        array_s = best_of(lambda: format_time_array(minutes), args.repeat)
+        print(f"{years:>5} {rows:>7} {cards_s:>9.4f} {cards_s / rows * 1e6:>7.1f} "
+              f"{apply_s:>9.4f} {array_s:>9.4f} {apply_s / array_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
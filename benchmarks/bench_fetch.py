@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Benchmark a full-year fetch against the local stand-in server.
+
+Starts `standin_server.py` in-process with the requested latency, jitter and
+faults, then runs the same fetch engine the scripts use (`nyt_http`
+connection pool, adaptive `RateController`, retries):
+
+  listings   build_puzzle_data.build_results for the year's 12 months
+  games      fetch_puzzles.fetch_one for every selected puzzle, `--concurrency` at a time
+
+For each phase it reports attempts, 429/5xx counts, retries, requests per
+second, p50/p99 round-trip latency and wall time, plus the total. Nothing
+touches the network and no cookie is needed. `--min-rps` / `--max-p99-ms` make
+the run exit non-zero when throughput or tail latency regress.
+
+Usage:
+    python3 benchmarks/bench_fetch.py
+    python3 benchmarks/bench_fetch.py --latency 0.08 --jitter 0.04 --throttle-rate 0.02 --burst-every 10
+    python3 benchmarks/bench_fetch.py --max-rate 50 --concurrency 8 --json data_output/cache/bench_fetch.json --min-rps 20
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_io  # noqa: E402
+from build_puzzle_data import build_results, month_range  # noqa: E402
+from completion_store import PACK_SUFFIX, DirectoryStore, PackStore, Store  # noqa: E402
+from fetch_puzzles import SELECTION_MODES, fetch_one, is_selected  # noqa: E402
+from nyt_http import ConnectionPool, RateController  # noqa: E402
+from standin_server import start_in_thread  # noqa: E402
+
+COOKIE = "NYT-S=bench"
+
+
+def phase_report(name: str, controller: RateController, seconds: float, items: int, failed: int) -> Dict[str, object]:
+    s = controller.snapshot()
+    return {
+        "phase": name,
+        "items": items,
+        "failed": failed,
+        "requests": s["requests"],
+        "throttled": s["throttled"],
+        "server_errors": s["server_errors"],
+        "network_errors": s["network_errors"],
+        "client_errors": s["client_errors"],
+        "retries": s["retries"],
+        "seconds": seconds,
+        "rps": s["requests"] / seconds if seconds > 0 else None,
+        "p50_ms": None if s["latency_p50"] is None else s["latency_p50"] * 1000,
+        "p99_ms": None if s["latency_p99"] is None else s["latency_p99"] * 1000,
+    }
+
+
+def fetch_listings(base_url: str, year: int, args) -> tuple:
+    controller = RateController(rate=1.0 / args.delay if args.delay > 0 else args.max_rate, max_rate=args.max_rate,
+                                concurrency=args.workers)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = build_results(month_range((year, 1), (year, 12)), COOKIE, "daily", args.delay, args.retries,
+                                workers=args.workers, controller=controller, base_url=base_url)
+    return results, phase_report("listings", controller, time.perf_counter() - start, 12, 0)
+
+
+def fetch_games(base_url: str, records: List[dict], store: Store, out_dir: Path, args) -> Dict[str, object]:
+    concurrency = max(1, args.concurrency)
+    controller = RateController(rate=1.0 / args.delay if args.delay > 0 else args.max_rate, max_rate=args.max_rate,
+                                concurrency=concurrency)
+    failed = 0
+    start = time.perf_counter()
+    with ConnectionPool(base_url, max_size=concurrency) as pool, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(fetch_one, rec["puzzle_id"], COOKIE, out_dir / f"{rec['puzzle_id']}.json", pool=pool,
+                                   controller=controller, retries=args.retries, store=store) for rec in records]
+        for fut in as_completed(futures):
+            try:
+                fut.result()
+            except Exception:
+                failed += 1
+    store.close()
+    return phase_report("games", controller, time.perf_counter() - start, len(records), failed)
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Time a full-year fetch against the local NYT stand-in")
+    p.add_argument("--year", type=int, default=2025, help="Year to fetch (default: 2025)")
+    p.add_argument("--only", choices=SELECTION_MODES, default="all", help="Which puzzles to fetch (default: all)")
+    p.add_argument("--pack", action="store_true", help="Store completions in a pack instead of one file each")
+    p.add_argument("--workers", type=int, default=4, help="Months fetched concurrently (default: 4)")
+    p.add_argument("--concurrency", type=int, default=4, help="Concurrent game fetches (default: 4)")
+    p.add_argument("--delay", type=float, default=0.3, help="Initial spacing between requests in seconds (default: 0.3)")
+    p.add_argument("--max-rate", type=float, default=10.0, help="Upper bound on requests per second (default: 10)")
+    p.add_argument("--retries", type=int, default=3, help="Number of attempts per request (default: 3)")
+    p.add_argument("--fixtures-dir", help="Serve game JSONs from this directory (e.g. from make_fixtures.py)")
+    p.add_argument("--latency", type=float, default=0.05, help="Stand-in base latency in seconds (default: 0.05)")
+    p.add_argument("--jitter", type=float, default=0.02, help="Mean extra exponential latency in seconds (default: 0.02)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    p.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    p.add_argument("--max-rps", type=float, help="Stand-in answers 429 above this many requests per second")
+    p.add_argument("--burst-every", type=float, help="Answer everything with 429 once per this many seconds")
+    p.add_argument("--burst-length", type=float, default=1.0, help="Length of each 429 burst in seconds (default: 1)")
+    p.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s (default: 1)")
+    p.add_argument("--seed", type=int, default=0, help="Fault injection seed (default: 0)")
+    p.add_argument("--json", help="Also write the report to this JSON file")
+    p.add_argument("--min-rps", type=float, help="Exit 1 if the games phase is slower than this many requests per second")
+    p.add_argument("--max-p99-ms", type=float, help="Exit 1 if the games phase p99 latency exceeds this")
+    args = p.parse_args(argv)
+
+    server = start_in_thread(fixtures_dir=Path(args.fixtures_dir) if args.fixtures_dir else None,
+                             error_rate=args.error_rate, throttle_rate=args.throttle_rate, max_rps=args.max_rps,
+                             retry_after=args.retry_after, seed=args.seed, latency=args.latency, jitter=args.jitter,
+                             burst_every=args.burst_every, burst_length=args.burst_length)
+    try:
+        total_start = time.perf_counter()
+        results, listings = fetch_listings(server.base_url, args.year, args)
+        records = [r for r in results if is_selected(r, args.only)]
+        with tempfile.TemporaryDirectory(prefix="bench_fetch_") as tmp:
+            out_dir = Path(tmp) / "puzzle_completion_data"
+            store: Store = PackStore(out_dir.with_name(out_dir.name + PACK_SUFFIX)) if args.pack else DirectoryStore(out_dir)
+            games = fetch_games(server.base_url, records, store, out_dir, args)
+        total = time.perf_counter() - total_start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"Full-year fetch of {args.year} from {server.base_url}: {len(results)} listed, {len(records)} fetched "
+          f"(selection: {args.only})")
+    print(f"{'phase':<9} {'items':>5} {'failed':>6} {'reqs':>5} {'429':>4} {'5xx':>4} {'retries':>7} "
+          f"{'wall s':>7} {'req/s':>6} {'p50 ms':>7} {'p99 ms':>7}")
+    for row in (listings, games):
+        print(f"{row['phase']:<9} {row['items']:>5} {row['failed']:>6} {row['requests']:>5} {row['throttled']:>4} "
+              f"{row['server_errors']:>4} {row['retries']:>7} {row['seconds']:>7.2f} {_fmt(row['rps'], '6.1f'):>6} "
+              f"{_fmt(row['p50_ms'], '7.1f'):>7} {_fmt(row['p99_ms'], '7.1f'):>7}")
+    print(f"Total wall time {total:.2f}s; server saw {server.requests} requests over {server.connections} connections "
+          f"({server.faults[429]} x 429, {server.faults[503]} x 503 injected)")
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        report = {"year": args.year, "only": args.only, "total_seconds": total, "phases": [listings, games],
+                  "server": {"requests": server.requests, "connections": server.connections,
+                             "throttled": server.faults[429], "server_errors": server.faults[503]},
+                  "options": {k: v for k, v in vars(args).items() if k != "json"}}
+        json_io.dump_path(report, out, indent=True)
+        print(f"Wrote {out}")
+
+    problems = []
+    if args.min_rps is not None and (games["rps"] or 0) < args.min_rps:
+        problems.append(f"games phase ran at {_fmt(games['rps'], '.1f')} req/s, below --min-rps {args.min_rps}")
+    if args.max_p99_ms is not None and games["p99_ms"] is not None and games["p99_ms"] > args.max_p99_ms:
+        problems.append(f"games phase p99 {games['p99_ms']:.1f} ms exceeds --max-p99-ms {args.max_p99_ms}")
+    for problem in problems:
+        print(f"REGRESSION: {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
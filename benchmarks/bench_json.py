@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Benchmark the JSON backends in `json_io` on generated multi-year fixtures.
+
+For each history length this generates fixtures with `make_fixtures.py` and
+times every available backend (`json`, plus `orjson` when installed) on:
+
+  parse completions       every game JSON in the completion store (the flatten/fetch hot path)
+  parse puzzle_data       the combined listing file
+  dump puzzle_data        the listing, indented and compact
+  dump card bundle        the cards `data_pipeline.write_card_bundle` serializes, indented and compact
+
+Times are the best of `--repeat` runs over bytes already in memory, so disk
+speed does not enter. The output sizes show what `--compact` saves.
+
+Usage:
+    python3 benchmarks/bench_json.py
+    python3 benchmarks/bench_json.py --years 1 10 --repeat 5 --json data_output/cache/bench_json.json
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_io  # noqa: E402
+from completion_store import iter_bodies, resolve_store  # noqa: E402
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def card_payload(user_dir: Path, work_dir: Path) -> Dict[str, object]:
+    """The bundle payload (card name -> JSON value) for one fixture user."""
+    import data_pipeline as dp
+    import flatten_results_to_csv
+
+    npz = str(work_dir / "puzzle_data.npz")
+    with contextlib.redirect_stdout(io.StringIO()):
+        flatten_results_to_csv.main(["-i", str(user_dir / "puzzle_data.json"), "-o", npz,
+                                     "--completion-dir", str(user_dir / "puzzle_completion_data")])
+        cards = dp.build_cards(dp.clean_and_preprocess(npz))
+    return {name.split("_", 1)[0]: data for name, data in dp.card_records(cards).items()}
+
+
+def bench_user(user_dir: Path, work_dir: Path, repeat: int) -> List[Dict[str, object]]:
+    bodies = [body for _, body in iter_bodies(resolve_store(user_dir / "puzzle_completion_data"))]
+    listing_bytes = (user_dir / "puzzle_data.json").read_bytes()
+    listing = json_io.loads(listing_bytes)
+    payload = card_payload(user_dir, work_dir)
+
+    rows = []
+    for backend, (loads, dumpb) in json_io.BACKENDS.items():
+        tasks = [
+            ("parse completions", None, sum(map(len, bodies)), lambda: [loads(b) for b in bodies]),
+            ("parse puzzle_data", None, len(listing_bytes), lambda: loads(listing_bytes)),
+        ]
+        for indent in (True, False):
+            layout = "indented" if indent else "compact"
+            tasks.append(("dump puzzle_data", layout, len(dumpb(listing, indent=indent)),
+                          lambda indent=indent: dumpb(listing, indent=indent)))
+            tasks.append(("dump card bundle", layout, len(dumpb(payload, indent=indent)),
+                          lambda indent=indent: dumpb(payload, indent=indent)))
+        for task, layout, size, fn in tasks:
+            rows.append({"task": task, "layout": layout, "backend": backend, "bytes": size,
+                         "seconds": best_of(fn, repeat), "items": len(bodies) if task == "parse completions" else 1})
+    baseline = {(r["task"], r["layout"]): r["seconds"] for r in rows if r["backend"] == "json"}
+    for r in rows:
+        r["speedup"] = baseline[(r["task"], r["layout"])] / r["seconds"] if r["seconds"] > 0 else None
+    return rows
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Compare the JSON backends on synthetic fixtures")
+    p.add_argument("--years", type=int, nargs="+", default=[1, 5], help="History lengths to generate (default: 1 5)")
+    p.add_argument("--seed", type=int, default=0, help="Fixture random seed (default: 0)")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the fastest is reported (default: 3)")
+    p.add_argument("--json", help="Also write the results to this JSON file")
+    args = p.parse_args(argv)
+
+    from make_fixtures import generate
+
+    print(f"Backends: {', '.join(json_io.BACKENDS)} (scripts use {json_io.BACKEND})")
+    results: List[Dict[str, object]] = []
+    print(f"{'data':>5} {'task':<18} {'layout':<9} {'backend':<7} {'MB':>7} {'wall s':>8} {'MB/s':>7} {'x json':>7}")
+    with tempfile.TemporaryDirectory(prefix="bench_json_") as tmp:
+        for years in args.years:
+            user_dir = generate(Path(tmp) / f"{years}y", years, 1, seed=args.seed)[0]
+            work_dir = Path(tmp) / f"{years}y" / "work"
+            work_dir.mkdir()
+            for row in bench_user(user_dir, work_dir, args.repeat):
+                row["data"] = f"{years}y"
+                results.append(row)
+                mb = row["bytes"] / (1024 * 1024)
+                print(f"{row['data']:>5} {row['task']:<18} {row['layout'] or '':<9} {row['backend']:<7} {mb:>7.2f} "
+                      f"{row['seconds']:>8.4f} {_fmt(mb / row['seconds'] if row['seconds'] else None, '7.1f'):>7} "
+                      f"{_fmt(row['speedup'], '7.2f'):>7}")
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        json_io.dump_path({"backends": list(json_io.BACKENDS), "repeat": args.repeat, "results": results}, out, indent=True)
+        print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
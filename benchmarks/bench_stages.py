@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Benchmark every offline stage on generated multi-year fixtures.
+
+For each history length this generates fixtures with `make_fixtures.py` (or
+uses `--fixtures`) and times, per user:
+
+  flatten                 flatten_results_to_csv.main (listing + completion store -> .npz)
+  clean_and_preprocess    data_pipeline.clean_and_preprocess on that .npz
+  card1 .. card4          data_pipeline.prepare_card_1_summary .. prepare_card_4_evolution
+  cards5_6                data_pipeline.prepare_cards_5_6_outliers
+  card7                   data_pipeline.prepare_card_7_replay
+  card8                   data_pipeline.prepare_card_8_cell_analytics (reads every solved board)
+
+Each measurement runs in a fresh interpreter so its peak RSS is its own. The
+card stages load the cleaned table first, untimed, and report both the peak
+RSS and how far the card function itself raised it (`+MB`). For `flatten` the
+peak includes its extractor processes. Wall time is the best of `--repeat`
+runs; no network is used.
+
+Usage:
+    python3 benchmarks/bench_stages.py
+    python3 benchmarks/bench_stages.py --years 1 5 10 --users 2 --json data_output/cache/bench_stages.json
+    python3 benchmarks/bench_stages.py --fixtures /tmp/xword_fixtures --fields seconds,cells,timestamps,assists
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_io  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows: wall time only
+    resource = None
+
+STAGES = ["flatten", "clean_and_preprocess", "card1", "card2", "card3", "card4", "cards5_6", "card7", "card8"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process and its waited-for children, in MB."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_stage(stage: str, user_dir: Path, work_dir: Path, fields: str, workers: int) -> Dict[str, object]:
+    """Run one stage in this process; returns its wall time and RSS figures."""
+    import data_pipeline as dp
+    from completion_store import resolve_store
+
+    npz = str(work_dir / "puzzle_data.npz")
+    completion = str(user_dir / "puzzle_completion_data")
+    if stage == "flatten":
+        import flatten_results_to_csv
+        argv = ["-i", str(user_dir / "puzzle_data.json"), "-o", npz, "--completion-dir", completion,
+                "--fields", fields, "--workers", str(workers)]
+        fn = lambda: flatten_results_to_csv.main(argv)  # noqa: E731
+    elif stage == "clean_and_preprocess":
+        fn = lambda: dp.clean_and_preprocess(npz)  # noqa: E731
+    else:
+        df = dp.clean_and_preprocess(npz)
+        if stage == "card7":
+            cards = {"card6_fast_days": dp.prepare_cards_5_6_outliers(df, top_n=10)["fast_days"]}
+            store = resolve_store(completion)
+            fn = lambda: dp.prepare_card_7_replay(cards, store)  # noqa: E731
+        elif stage == "card8":
+            store = resolve_store(completion)
+            fn = lambda: dp.prepare_card_8_cell_analytics(df, store)  # noqa: E731
+        else:
+            fn = {
+                "card1": lambda: dp.prepare_card_1_summary(df),
+                "card2": lambda: dp.prepare_card_2_weekly_summary(df),
+                "card3": lambda: dp.prepare_card_3_histograms(df, num_bins=8),
+                "card4": lambda: dp.prepare_card_4_evolution(df, max_points=dp.CARD4_POINTS_PER_DAY),
+                "cards5_6": lambda: dp.prepare_cards_5_6_outliers(df, top_n=10),
+            }[stage]
+
+    baseline = peak_rss_mb()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+    peak = peak_rss_mb()
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": peak,
+        "delta_rss_mb": None if peak is None or baseline is None else peak - baseline,
+    }
+
+
+def measure(stage: str, user_dir: Path, work_dir: Path, fields: str, workers: int) -> Dict[str, object]:
+    """Run `stage` in a child interpreter and return its result line."""
+    cmd = [sys.executable or "python3", str(Path(__file__).resolve()), "--child", stage, str(user_dir), str(work_dir),
+           "--fields", fields, "--workers", str(workers)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Stage {stage} failed for {user_dir}:\n{proc.stderr.strip()}")
+    return json_io.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def bench_user(user_dir: Path, fields: str, workers: int, repeat: int) -> List[Dict[str, object]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_stages_") as tmp:
+        work_dir = Path(tmp)
+        for stage in STAGES:
+            runs = [measure(stage, user_dir, work_dir, fields, workers) for _ in range(max(1, repeat))]
+            best = min(runs, key=lambda r: r["seconds"])
+            peaks = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+            best["peak_rss_mb"] = max(peaks) if peaks else None
+            results.append({"stage": stage, **best})
+    return results
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Benchmark the offline stages on synthetic fixtures")
+    p.add_argument("--years", type=int, nargs="+", default=[1, 5, 10], help="History lengths to generate (default: 1 5 10)")
+    p.add_argument("--users", type=int, default=1, help="Users per history length (default: 1)")
+    p.add_argument("--seed", type=int, default=0, help="Fixture random seed (default: 0)")
+    p.add_argument("--fixtures", help="Benchmark existing fixtures (user_* directories) instead of generating them")
+    p.add_argument("--fields", default="seconds", help="Field groups for the flatten stage (default: seconds)")
+    p.add_argument("--workers", type=int, default=0, help="Flatten extractor processes (default: one per CPU)")
+    p.add_argument("--repeat", type=int, default=1, help="Runs per measurement; the fastest is reported (default: 1)")
+    p.add_argument("--json", help="Also write the results to this JSON file")
+    p.add_argument("--child", nargs=3, metavar=("STAGE", "USER_DIR", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        stage, user_dir, work_dir = args.child
+        print(json_io.dumps(run_stage(stage, Path(user_dir), Path(work_dir), args.fields, args.workers)))
+        return
+
+    from make_fixtures import generate
+
+    results: List[Dict[str, object]] = []
+    print(f"{'data':>8} {'user':>7} {'puzzles':>7} {'stage':<21} {'wall s':>8} {'peak MB':>8} {'+MB':>7}")
+    with tempfile.TemporaryDirectory(prefix="xword_fixtures_") as tmp:
+        if args.fixtures:
+            sets = [("fixtures", sorted(Path(args.fixtures).glob("user_*")))]
+        else:
+            sets = []
+            for years in args.years:
+                print(f"Generating {years} year(s) x {args.users} user(s)...")
+                sets.append((f"{years}y", generate(Path(tmp) / f"{years}y", years, args.users, seed=args.seed)))
+        for label, user_dirs in sets:
+            for user_dir in user_dirs:
+                puzzles = len(json_io.load_path(user_dir / "puzzle_data.json")["results"])
+                for row in bench_user(user_dir, args.fields, args.workers, args.repeat):
+                    row.update({"data": label, "user": user_dir.name, "puzzles": puzzles})
+                    results.append(row)
+                    print(f"{label:>8} {user_dir.name:>7} {puzzles:>7} {row['stage']:<21} {row['seconds']:>8.4f} "
+                          f"{_fmt(row['peak_rss_mb'], '8.1f'):>8} {_fmt(row['delta_rss_mb'], '7.1f'):>7}")
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        json_io.dump_path({"fields": args.fields, "workers": args.workers, "repeat": args.repeat, "results": results},
+                          out, indent=True)
+        print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Generate realistic multi-year fixtures for offline runs and benchmarks.
+
+For each of `--users` synthetic solvers this writes the same layout the real
+scripts produce:
+
+  {out}/user_NN/puzzle_data.json                   {"results": [...]} listing records
+  {out}/user_NN/puzzle_completion_data/{id}.json   game JSON per started puzzle
+  (or puzzle_completion_data.pack with --pack)
+
+Boards are 15x15 (21x21 on Sundays) with a rotationally symmetric blank
+pattern. Fill timestamps follow a word-by-word order (mostly across, top to
+bottom, with jumps to down answers), spread over a weekday-dependent
+lognormal solve time scaled by each user's skill. Thursdays occasionally
+carry a rebus cell. A share of puzzles is started but not finished, and some
+solves use check/reveal.
+
+Usage:
+    python3 benchmarks/make_fixtures.py --years 10 --users 3 -o /tmp/xword_fixtures
+    python3 benchmarks/make_fixtures.py --years 2 --pack
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_io  # noqa: E402
+from completion_store import PACK_SUFFIX, DirectoryStore, PackStore  # noqa: E402
+
+# Typical solve times per weekday (median seconds), as in bench_cards.py
+DAY_MEDIANS = {"Mon": 420, "Tue": 540, "Wed": 720, "Thu": 1080, "Fri": 1200, "Sat": 1500, "Sun": 1800}
+DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+AUTHORS = [f"Constructor {i:03d}" for i in range(300)]
+_ID_EPOCH = date(1993, 11, 21)
+DEFAULT_END = date(2025, 12, 31)
+BLANK_SHARE = 0.16
+
+
+def blank_pattern(rng: random.Random, size: int) -> List[bool]:
+    """Rotationally symmetric blank squares covering about BLANK_SHARE of the grid."""
+    n = size * size
+    blank = [False] * n
+    for i in range((n + 1) // 2):
+        if rng.random() < BLANK_SHARE:
+            blank[i] = blank[n - 1 - i] = True
+    return blank
+
+
+def _words(blank: List[bool], size: int) -> Tuple[List[List[int]], List[List[int]]]:
+    """Across and down entries as lists of cell indices."""
+    across, down = [], []
+    for r in range(size):
+        run: List[int] = []
+        for c in range(size + 1):
+            if c < size and not blank[r * size + c]:
+                run.append(r * size + c)
+            else:
+                if len(run) > 1:
+                    across.append(run)
+                run = []
+    for c in range(size):
+        run = []
+        for r in range(size + 1):
+            if r < size and not blank[r * size + c]:
+                run.append(r * size + c)
+            else:
+                if len(run) > 1:
+                    down.append(run)
+                run = []
+    return across, down
+
+
+def fill_order(rng: random.Random, blank: List[bool], size: int) -> List[int]:
+    """A plausible order in which a solver fills the white cells."""
+    across, down = _words(blank, size)
+    order: List[int] = []
+    seen = set()
+    pending_down = down[:]
+    rng.shuffle(pending_down)
+    for word in across:
+        # now and then jump to a down answer before continuing across
+        if pending_down and rng.random() < 0.35:
+            word = pending_down.pop()
+        elif rng.random() < 0.15:
+            continue  # skipped for now, picked up on a later pass
+        for cell in word:
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+    rest = [i for i, b in enumerate(blank) if not b and i not in seen]
+    order.extend(rest)
+    return order
+
+
+def solve_seconds(rng: random.Random, day: str, skill: float) -> int:
+    return max(60, int(rng.lognormvariate(math.log(DAY_MEDIANS[day] * skill), 0.35)))
+
+
+def completion_json(rng: random.Random, puzzle_id: int, day: str, skill: float, finished: bool,
+                    opened: int) -> Tuple[dict, Optional[int], float]:
+    """(game JSON, seconds or None, percent filled) for one started puzzle."""
+    size = 21 if day == "Sun" else 15
+    blank = blank_pattern(rng, size)
+    order = fill_order(rng, blank, size)
+    if not finished:
+        order = order[:rng.randint(1, max(1, len(order) - 1))]
+    seconds = solve_seconds(rng, day, skill)
+    gaps = [rng.expovariate(1.0) for _ in order]
+    scale = seconds / max(sum(gaps), 1e-9)
+    stamps: Dict[int, int] = {}
+    t = 0.0
+    for cell, gap in zip(order, gaps):
+        t += gap * scale
+        stamps[cell] = opened + int(t)
+    assist = rng.random()
+    cells = []
+    for i, is_blank in enumerate(blank):
+        if is_blank:
+            cells.append({"blank": True})
+            continue
+        cell: dict = {}
+        if i in stamps:
+            guess = chr(ord("A") + rng.randrange(26))
+            if day == "Thu" and rng.random() < 0.01:
+                guess += chr(ord("A") + rng.randrange(26))
+            cell = {"guess": guess, "timestamp": stamps[i]}
+            if assist < 0.05 and rng.random() < 0.03:
+                cell["checked"] = True
+            elif assist < 0.02 and rng.random() < 0.02:
+                cell["revealed"] = True
+        cells.append(cell)
+    white = sum(1 for b in blank if not b)
+    percent = 100.0 if finished else round(100.0 * len(order) / white, 1)
+    last = max(stamps.values()) if stamps else opened
+    data = {
+        "puzzleID": puzzle_id,
+        "board": {"cells": cells},
+        "calcs": {"percentFilled": percent, "secondsSpentSolving": seconds if finished else last - opened,
+                  "solved": finished},
+        "firsts": {"opened": opened, **({"solved": last} if finished else {})},
+    }
+    return data, (seconds if finished else None), percent
+
+
+def generate_user(out_dir: Path, start: date, end: date, seed: int, pack: bool = False) -> Tuple[int, int]:
+    """Write one user's listing and completions; returns (puzzles, completion files)."""
+    rng = random.Random(seed)
+    skill = rng.lognormvariate(0.0, 0.25)
+    solve_rate = rng.uniform(0.55, 0.95)
+    start_rate = min(1.0, solve_rate + rng.uniform(0.02, 0.1))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    comp_dir = out_dir / "puzzle_completion_data"
+    store = PackStore(comp_dir.with_name(comp_dir.name + PACK_SUFFIX)) if pack else DirectoryStore(comp_dir)
+
+    results, written = [], 0
+    day = start
+    while day <= end:
+        puzzle_id = (day - _ID_EPOCH).days
+        dow = DAY_NAMES[day.weekday()]
+        roll = rng.random()
+        finished, started = roll < solve_rate, roll < start_rate
+        record = {
+            "author": rng.choice(AUTHORS),
+            "editor": "Will Shortz",
+            "format_type": "Normal",
+            "print_date": day.isoformat(),
+            "publish_type": "Daily",
+            "puzzle_id": puzzle_id,
+            "title": "",
+            "version": 0,
+            "percent_filled": 0,
+            "solved": False,
+            "star": None,
+        }
+        if started:
+            opened = (day - date(1970, 1, 1)).days * 86400 + rng.randint(0, 20 * 3600)
+            data, seconds, percent = completion_json(rng, puzzle_id, dow, skill, finished, opened)
+            record["percent_filled"] = int(percent) if percent == 100 else percent
+            record["solved"] = finished
+            if finished and not any(c.get("revealed") for c in data["board"]["cells"]):
+                record["star"] = "Gold" if rng.random() < 0.85 else None
+            store.put(puzzle_id, json_io.dumpb(data))
+            written += 1
+        results.append(record)
+        day += timedelta(days=1)
+
+    store.close()
+    json_io.dump_path({"results": results}, out_dir / "puzzle_data.json", indent=True)
+    return len(results), written
+
+
+def generate(out: Path, years: int, users: int, seed: int = 0, end: Optional[date] = None,
+             pack: bool = False, verbose: bool = False) -> List[Path]:
+    """Fixtures for `users` users covering `years` calendar years up to `end`; returns the user directories."""
+    end = end or DEFAULT_END
+    start = date(end.year - years + 1, 1, 1)
+    dirs = []
+    for u in range(users):
+        user_dir = Path(out) / f"user_{u:02d}"
+        puzzles, written = generate_user(user_dir, start, end, seed * 1000 + u, pack=pack)
+        if verbose:
+            print(f"{user_dir}: {puzzles} puzzles, {written} completions ({start} .. {end})")
+        dirs.append(user_dir)
+    return dirs
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Generate synthetic puzzle listings and completion JSONs")
+    p.add_argument("-o", "--out", default="data_output/fixtures", help="Output directory (default: data_output/fixtures)")
+    p.add_argument("--years", type=int, default=1, help="Years of daily puzzles per user (default: 1)")
+    p.add_argument("--users", type=int, default=1, help="Number of users (default: 1)")
+    p.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    p.add_argument("--end", type=date.fromisoformat, help="Last print date YYYY-MM-DD (default: 2025-12-31)")
+    p.add_argument("--pack", action="store_true", help="Write completions to puzzle_completion_data.pack instead of files")
+    args = p.parse_args(argv)
+
+    generate(Path(args.out), args.years, args.users, seed=args.seed, end=args.end, pack=args.pack, verbose=True)
+
+
+if __name__ == "__main__":
+    main()
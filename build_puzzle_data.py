@@ -1,43 +1,80 @@
 #!/usr/bin/env python3
 """Build a consolidated `puzzle_data.json` by querying the NYT puzzles API month-by-month.
 
-This script queries the service for each month in the given year and collects the `results` arrays
+This script queries the service for each month in the given range and collects the `results` arrays
 from each response into one combined JSON with the shape:
 
   { "results": [ ... ] }
 
+or, with `--format ndjson` (or an `-o` name ending in `.ndjson`), one puzzle record per line.
+NDJSON output is streamed: each month is appended as soon as it (and every month before it) has
+arrived, and `{out}.checkpoint.json` records the months written so far. If a build is interrupted,
+rerunning the same command resumes from the first missing month. The checkpoint is removed once
+the build completes.
+
+Months are fetched by a small pool of worker threads sharing keep-alive connections (see
+`nyt_http.py`); the combined results are sorted by `print_date` regardless of arrival order.
+
 Usage examples:
   python3 build_puzzle_data.py                # build for 2025 (Jan-Dec)
   python3 build_puzzle_data.py -y 2025 -o puzzle_data.json
   python3 build_puzzle_data.py -y 2024 -s 3 -e 12
+  python3 build_puzzle_data.py --from 2019-01 --to 2025-12
+  python3 build_puzzle_data.py --from 2019-01 --to 2025-12 -o puzzle_data.ndjson
 
 Options:
   -y/--year            Year to fetch (default: 2025)
   -s/--start-month     Start month (1-12, default: 1)
   -e/--end-month       End month (1-12, default: 12)
+  --from / --to        Month range YYYY-MM..YYYY-MM, may span years (overrides -y/-s/-e)
   -c/--cookie-file     Cookie file path (default: subscription_header.txt)
   -o/--out-file        Output JSON file path (default: puzzle_data.json)
-  --delay              Delay between requests in seconds (default: 0.5)
-  --retries            Number of retries per request (default: 3)
+  --format             json or ndjson (default: inferred from the -o suffix)
+  --no-resume          Ignore an NDJSON checkpoint and rebuild from the first month
+  --workers            Number of months fetched concurrently (default: 4)
+  --delay              Initial spacing between requests in seconds (default: 0.5); adapts at runtime
+  --max-rate           Upper bound on requests per second (default: 10)
+  --retries            Number of attempts per request (default: 3)
   --publish-type       publish_type query param (default: daily)
+  --cache-dir          Directory for cached month listings (default: data_output/cache/puzzles)
+  --cache-ttl          Days a past month's cached listing stays fresh (default: 30)
+  --refresh-cache      Ignore cached listings and refetch every month
+  --no-cache           Neither read nor write the month cache
+  --db                 Also upsert each month's puzzles into a SQLite store (see puzzle_store.py)
+
+Month listing cache:
+  Each month's `results` are cached on disk keyed by (publish_type, year, month). The current
+  (and any future) month is always refetched; a past month is served from the cache until it is
+  older than --cache-ttl days, or if it was cached before the month was over.
 
 """
 from __future__ import annotations
 
 import argparse
 import calendar
-import json
+import http.client
+import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, List, Optional, Tuple
+
+import json_io
+from nyt_http import BASE_URL_ENV, DEFAULT_BASE_URL, ConnectionPool, RateController, get_with_retries, resolve_base_url
+from puzzle_store import PuzzleStore
+from results_io import is_ndjson
 
-try:
-    # Use built-in urllib to avoid adding runtime deps
-    from urllib.request import Request, urlopen
-    from urllib.error import URLError, HTTPError
-except Exception:  # pragma: no cover - fallback
-    raise
+PUZZLES_PATH = "/svc/crosswords/v3/36569100/puzzles.json"
+
+
+class HTTPStatusError(Exception):
+    """Non-2xx response from the puzzles service."""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
 
 
 def load_cookie(cookie_file: Path) -> str:
@@ -65,78 +102,296 @@ def find_results(obj: Any):
     return None
 
 
-def fetch_month_results(year: int, month: int, cookie: str, publish_type: str = "daily", retries: int = 3, timeout: int = 30):
+def parse_year_month(value: str) -> Tuple[int, int]:
+    """Parse `YYYY-MM` into (year, month)."""
+    try:
+        year_s, month_s = value.split("-", 1)
+        year, month = int(year_s), int(month_s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {value!r}")
+    if not 1 <= month <= 12:
+        raise argparse.ArgumentTypeError(f"month out of range in {value!r}")
+    return year, month
+
+
+def month_range(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Inclusive list of (year, month) pairs from `start` to `end`."""
+    months = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def fetch_month_results(year: int, month: int, cookie: str, publish_type: str = "daily", retries: int = 3, timeout: int = 30,
+                        pool: Optional[ConnectionPool] = None, controller: Optional[RateController] = None,
+                        base_url: Optional[str] = None):
     """Fetch a month's results list from the NYT puzzles service.
 
     Returns the list of results (possibly empty) or raises an exception on
-    unrecoverable error.
+    unrecoverable error. Pass `pool` to reuse keep-alive connections across
+    calls (otherwise a one-off connection to `base_url` is used) and
+    `controller` to share rate limiting and 429/5xx backoff with other requests.
     """
     last_day = calendar.monthrange(year, month)[1]
     date_start = f"{year}-{month:02d}-01"
     date_end = f"{year}-{month:02d}-{last_day:02d}"
-    url = (
-        "https://www.nytimes.com/svc/crosswords/v3/36569100/puzzles.json"
-        f"?publish_type={publish_type}&date_start={date_start}&date_end={date_end}"
-    )
+    url = f"{PUZZLES_PATH}?publish_type={publish_type}&date_start={date_start}&date_end={date_end}"
 
     headers = {"Accept": "application/json", "Cookie": cookie}
 
-    last_err = None
-    for attempt in range(1, retries + 1):
+    own_pool = pool is None
+    if own_pool:
+        pool = ConnectionPool(resolve_base_url(base_url), max_size=1, timeout=timeout)
+    try:
+        resp = get_with_retries(pool, url, headers=headers, controller=controller, retries=retries)
+    except (http.client.HTTPException, OSError) as e:
+        raise RuntimeError(f"Failed fetching {date_start}..{date_end}") from e
+    finally:
+        if own_pool:
+            pool.close()
+    if not resp.ok:
+        raise RuntimeError(f"Failed fetching {date_start}..{date_end}") from HTTPStatusError(resp.status, url)
+
+    try:
+        data = json_io.loads(resp.body)
+    except Exception as e:  # JSON errors, etc.
+        print(f"Error parsing response for {date_start}..{date_end}: {e}")
+        raise RuntimeError(f"Failed fetching {date_start}..{date_end}") from e
+    results = find_results(data)
+    if results is None:
+        # no results key; return empty list and warn
+        print(f"Warning: no 'results' found for {date_start}..{date_end}")
+        return []
+    if not isinstance(results, list):
+        print(f"Warning: 'results' is not a list for {date_start}..{date_end}")
+        return []
+    return results
+
+
+class MonthCache:
+    """On-disk cache of month listings keyed by (publish_type, year, month).
+
+    Entries live at `{cache_dir}/{publish_type}/{year}-{month:02d}.json` as
+    `{"fetched_at": <epoch seconds>, "results": [...]}`.
+    """
+
+    def __init__(self, cache_dir: Path, ttl_days: float = 30, force: bool = False, today: Optional[date] = None):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_days * 86400
+        self.force = force
+        self.today = today or date.today()
+        self.hits = 0
+
+    def path(self, publish_type: str, year: int, month: int) -> Path:
+        return self.cache_dir / publish_type / f"{year}-{month:02d}.json"
+
+    def is_fresh(self, fetched_at: float, year: int, month: int, now: Optional[float] = None) -> bool:
+        """Freshness policy: the current/future months always expire; past months after the TTL."""
+        if self.force:
+            return False
+        if (year, month) >= (self.today.year, self.today.month):
+            return False
+        # a listing cached while the month was still running may be missing late solves
+        month_end = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+        if fetched_at < month_end:
+            return False
+        now = time.time() if now is None else now
+        return now - fetched_at < self.ttl_seconds
+
+    def get(self, publish_type: str, year: int, month: int) -> Optional[list]:
+        path = self.path(publish_type, year, month)
+        if not path.exists():
+            return None
         try:
-            req = Request(url, headers=headers)
-            with urlopen(req, timeout=timeout) as resp:
-                raw = resp.read()
-                data = json.loads(raw)
-                results = find_results(data)
-                if results is None:
-                    # no results key; return empty list and warn
-                    print(f"Warning: no 'results' found for {date_start}..{date_end}")
-                    return []
-                if not isinstance(results, list):
-                    print(f"Warning: 'results' is not a list for {date_start}..{date_end}")
-                    return []
-                return results
-        except (HTTPError, URLError) as e:
-            last_err = e
-            wait = 2 ** (attempt - 1)
-            print(f"Error fetching {date_start}..{date_end} (attempt {attempt}/{retries}): {e}; retrying in {wait}s...")
-            time.sleep(wait)
-        except Exception as e:  # JSON errors, etc.
-            last_err = e
-            print(f"Error parsing response for {date_start}..{date_end}: {e}")
-            break
-    raise RuntimeError(f"Failed fetching {date_start}..{date_end}") from last_err
-
-
-def build_results(year: int, start_month: int, end_month: int, cookie: str, publish_type: str, delay: float, retries: int):
-    combined: list = []
-    total_months = end_month - start_month + 1
-    count = 0
-    for i, m in enumerate(range(start_month, end_month + 1), start=1):
-        print(f"[{i}/{total_months}] Fetching {year}-{m:02d}...")
+            entry = json_io.load_path(path)
+            fetched_at = float(entry["fetched_at"])
+            results = entry["results"]
+        except Exception:
+            return None
+        if not isinstance(results, list) or not self.is_fresh(fetched_at, year, month):
+            return None
+        self.hits += 1
+        return results
+
+    def put(self, publish_type: str, year: int, month: int, results: list) -> None:
+        path = self.path(publish_type, year, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        json_io.dump_path({"fetched_at": time.time(), "results": results}, tmp)
+        os.replace(tmp, path)
+
+
+def _print_date_key(item: Any):
+    if isinstance(item, dict):
+        return (str(item.get("print_date") or ""), str(item.get("puzzle_id") or ""))
+    return ("", "")
+
+
+def build_results(months: List[Tuple[int, int]], cookie: str, publish_type: str, delay: float, retries: int, workers: int = 4,
+                  cache: Optional[MonthCache] = None, controller: Optional[RateController] = None,
+                  on_month: Optional[Callable[[int, int, list], None]] = None, base_url: Optional[str] = None):
+    """Fetch every (year, month) in `months` concurrently and merge them in `print_date` order.
+
+    Months with a fresh entry in `cache` are served from disk without a request.
+    Requests go through `controller`; when none is given one is created whose
+    starting rate is one request per `delay` seconds. `base_url` defaults to
+    `$NYT_BASE_URL` or the live site (see `nyt_http.resolve_base_url`).
+
+    If `on_month(year, month, results)` is given, each month's sorted results
+    are handed to it in month order as soon as they are available and nothing
+    is accumulated (the return value is then an empty list). A month that
+    fails stops delivery there, so `on_month` always sees a gap-free prefix
+    of `months`; a `RuntimeError` is raised after the in-flight months finish.
+    """
+    total_months = len(months)
+    workers = max(1, min(workers, total_months or 1))
+    if controller is None:
+        controller = RateController(rate=1.0 / delay if delay > 0 else 20.0, concurrency=workers)
+
+    def _fetch(index: int, year: int, month: int) -> Optional[list]:
+        if cache is not None:
+            cached = cache.get(publish_type, year, month)
+            if cached is not None:
+                print(f"[{index}/{total_months}] {year}-{month:02d}: {len(cached)} items (cached)")
+                return cached
         try:
-            results = fetch_month_results(year, m, cookie, publish_type=publish_type, retries=retries)
+            results = fetch_month_results(year, month, cookie, publish_type=publish_type, retries=retries, pool=pool,
+                                          controller=controller)
         except Exception as e:
-            print(f"  ERROR: {e}")
-            results = []
-        combined.extend(results)
-        count += len(results)
-        print(f"  got {len(results)} items (total so far: {count})")
-        time.sleep(delay)
+            print(f"[{index}/{total_months}] {year}-{month:02d} ERROR: {e}")
+            return None
+        print(f"[{index}/{total_months}] {year}-{month:02d}: got {len(results)} items")
+        if cache is not None:
+            cache.put(publish_type, year, month, results)
+        return results
+
+    combined: list = []
+    failed: Optional[Tuple[int, int]] = None
+    with ConnectionPool(resolve_base_url(base_url), max_size=workers) as pool, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        # keep a bounded window of months in flight so finished-but-undelivered
+        # months never pile up in memory
+        pending = iter(enumerate(months, start=1))
+        window: list = []
+        for _ in range(workers * 2):
+            nxt = next(pending, None)
+            if nxt is not None:
+                window.append((nxt[1], executor.submit(_fetch, nxt[0], *nxt[1])))
+        while window:
+            (year, month), fut = window.pop(0)
+            # once streaming has stopped at a failed month, don't start any more
+            nxt = next(pending, None) if failed is None else None
+            if nxt is not None:
+                window.append((nxt[1], executor.submit(_fetch, nxt[0], *nxt[1])))
+            results = fut.result()
+            if on_month is None:
+                combined.extend(results or [])
+            elif failed is None:
+                if results is None:
+                    failed = (year, month)
+                else:
+                    on_month(year, month, sorted(results, key=_print_date_key))
+
+    if failed is not None:
+        raise RuntimeError(f"Failed fetching {failed[0]}-{failed[1]:02d}; rerun to resume from there")
+    combined.sort(key=_print_date_key)
     return combined
 
 
+class NDJSONMonthWriter:
+    """Append months to an NDJSON file with a resumable checkpoint.
+
+    The checkpoint (`{out}.checkpoint.json`) stores the months written so far
+    and the byte offset after the last complete month; on resume the file is
+    truncated back to that offset, so a month cut off mid-write is rewritten.
+    """
+
+    def __init__(self, out_path: Path, months: List[Tuple[int, int]], publish_type: str, resume: bool = True):
+        self.out_path = Path(out_path)
+        self.checkpoint_path = self.out_path.with_name(self.out_path.name + ".checkpoint.json")
+        self.publish_type = publish_type
+        self.written: List[str] = []
+        self.count = 0
+        offset = 0
+
+        keys = [f"{y}-{m:02d}" for y, m in months]
+        checkpoint = self._load_checkpoint() if resume else None
+        if checkpoint is not None and self.out_path.exists():
+            done = checkpoint.get("months") or []
+            if checkpoint.get("publish_type") == publish_type and done == keys[:len(done)]:
+                self.written = list(done)
+                self.count = int(checkpoint.get("count") or 0)
+                offset = int(checkpoint.get("offset") or 0)
+                print(f"Resuming {self.out_path} after {len(done)} completed months")
+            else:
+                print(f"Checkpoint {self.checkpoint_path} does not match this range; starting over")
+
+        done_keys = set(self.written)
+        self.pending = [ym for ym, key in zip(months, keys) if key not in done_keys]
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.out_path, "ab" if offset else "wb")
+        self._fh.truncate(offset)
+        self._fh.seek(offset)
+        self._save_checkpoint()
+
+    def _load_checkpoint(self) -> Optional[dict]:
+        if not self.checkpoint_path.exists():
+            return None
+        try:
+            return json_io.load_path(self.checkpoint_path)
+        except Exception:
+            return None
+
+    def _save_checkpoint(self) -> None:
+        tmp = self.checkpoint_path.with_name(self.checkpoint_path.name + ".part")
+        json_io.dump_path({
+            "publish_type": self.publish_type,
+            "months": self.written,
+            "count": self.count,
+            "offset": self._fh.tell(),
+        }, tmp)
+        os.replace(tmp, self.checkpoint_path)
+
+    def write_month(self, year: int, month: int, results: list) -> None:
+        for item in results:
+            self._fh.write(json_io.dumpb(item) + b"\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.written.append(f"{year}-{month:02d}")
+        self.count += len(results)
+        self._save_checkpoint()
+
+    def close(self, complete: bool) -> None:
+        self._fh.close()
+        if complete and self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
+
+
 def main(argv=None):
-    p = argparse.ArgumentParser(description="Build a consolidated puzzle_data.json for a year by querying the NYT service month-by-month")
+    p = argparse.ArgumentParser(description="Build a consolidated puzzle_data.json by querying the NYT service month-by-month")
     p.add_argument("-y", "--year", type=int, default=2025, help="Year to fetch (default: 2025)")
     p.add_argument("-s", "--start-month", type=int, default=1, help="Start month (1-12)")
     p.add_argument("-e", "--end-month", type=int, default=12, help="End month (1-12)")
+    p.add_argument("--from", dest="from_month", type=parse_year_month, help="First month YYYY-MM (overrides -y/-s)")
+    p.add_argument("--to", dest="to_month", type=parse_year_month, help="Last month YYYY-MM (overrides -y/-e)")
     p.add_argument("-c", "--cookie-file", default="subscription_header.txt", help="File containing NYT cookie value (NYT-S=...) or raw value")
     p.add_argument("-o", "--out-file", default="puzzle_data.json", help="Output JSON file path")
-    p.add_argument("--delay", type=float, default=0.5, help="Delay between requests in seconds (default: 0.5)")
-    p.add_argument("--retries", type=int, default=3, help="Number of retries per request (default: 3)")
+    p.add_argument("--format", choices=["json", "ndjson"], help="Output format (default: ndjson for .ndjson/.jsonl names, else json)")
+    p.add_argument("--no-resume", action="store_true", help="Ignore any NDJSON checkpoint and rebuild from the first month")
+    p.add_argument("--workers", type=int, default=4, help="Number of months fetched concurrently (default: 4)")
+    p.add_argument("--delay", type=float, default=0.5, help="Initial spacing between requests in seconds; adapts to 429/5xx responses (default: 0.5)")
+    p.add_argument("--max-rate", type=float, default=10.0, help="Upper bound on requests per second (default: 10)")
+    p.add_argument("--retries", type=int, default=3, help="Number of attempts per request (default: 3)")
     p.add_argument("--publish-type", default="daily", help="publish_type query param (default: daily)")
+    p.add_argument("--cache-dir", default="data_output/cache/puzzles", help="Directory for cached month listings")
+    p.add_argument("--cache-ttl", type=float, default=30, help="Days a past month's cached listing stays fresh (default: 30)")
+    p.add_argument("--refresh-cache", action="store_true", help="Refetch every month even if cached")
+    p.add_argument("--no-cache", action="store_true", help="Disable the month listing cache")
+    p.add_argument("--db", help="Also upsert every month's puzzles into this SQLite store (see puzzle_store.py)")
+    p.add_argument("--base-url", help=f"Service to fetch from, e.g. a local standin_server.py (default: ${BASE_URL_ENV} or {DEFAULT_BASE_URL})")
+    p.add_argument("--compact", action="store_true", help="Write the JSON output without indentation (smaller, faster)")
 
     args = p.parse_args(argv)
 
@@ -147,22 +402,80 @@ def main(argv=None):
         print(f"Error reading cookie file: {e}")
         sys.exit(1)
 
-    if not (1 <= args.start_month <= 12 and 1 <= args.end_month <= 12 and args.start_month <= args.end_month):
-        print("Start and end months must be between 1 and 12 and start <= end")
-        sys.exit(1)
+    if args.from_month or args.to_month:
+        start = args.from_month or (args.year, args.start_month)
+        end = args.to_month or (args.year, args.end_month)
+        if start > end:
+            print("--from must not be after --to")
+            sys.exit(1)
+    else:
+        if not (1 <= args.start_month <= 12 and 1 <= args.end_month <= 12 and args.start_month <= args.end_month):
+            print("Start and end months must be between 1 and 12 and start <= end")
+            sys.exit(1)
+        start, end = (args.year, args.start_month), (args.year, args.end_month)
 
-    print(f"Building results for {args.year}, months {args.start_month}..{args.end_month}")
-    combined = build_results(args.year, args.start_month, args.end_month, cookie, args.publish_type, args.delay, args.retries)
+    months = month_range(start, end)
+    print(f"Building results for {start[0]}-{start[1]:02d}..{end[0]}-{end[1]:02d} ({len(months)} months)")
+    cache = None if args.no_cache else MonthCache(Path(args.cache_dir), ttl_days=args.cache_ttl, force=args.refresh_cache)
+    controller = RateController(rate=1.0 / args.delay if args.delay > 0 else args.max_rate, max_rate=args.max_rate,
+                                concurrency=max(1, args.workers))
 
-    out = {"results": combined}
     # Always write output into the `data_output` directory (use provided filename)
     out_dir = Path('data_output')
     out_dir.mkdir(parents=True, exist_ok=True)
     out_file_name = Path(args.out_file).name
     out_path = out_dir / out_file_name
-    out_path.write_text(json.dumps(out, indent=4, ensure_ascii=False), encoding="utf-8")
+    fmt = args.format or ("ndjson" if is_ndjson(out_path) else "json")
+    db = PuzzleStore(args.db) if args.db else None
+    db_writes = 0
+
+    if fmt == "ndjson":
+        writer = NDJSONMonthWriter(out_path, months, args.publish_type, resume=not args.no_resume)
+
+        def on_month(year: int, month: int, results: list) -> None:
+            nonlocal db_writes
+            writer.write_month(year, month, results)
+            if db is not None:
+                db_writes += db.upsert_puzzles(results)
+
+        complete = False
+        try:
+            build_results(writer.pending, cookie, args.publish_type, args.delay, args.retries, workers=args.workers,
+                          cache=cache, controller=controller, on_month=on_month, base_url=args.base_url)
+            complete = True
+        except RuntimeError as e:
+            print(f"ERROR: {e}")
+        finally:
+            writer.close(complete)
+            if db is not None:
+                db.close()
+        _print_fetch_summary(controller, cache, len(months))
+        if db is not None:
+            print(f"Upserted {db_writes} new or changed puzzle rows into {args.db}")
+        print(f"Wrote {writer.count} total items ({len(writer.written)}/{len(months)} months) to {out_path}")
+        if not complete:
+            sys.exit(1)
+        return
+
+    combined = build_results(months, cookie, args.publish_type, args.delay, args.retries, workers=args.workers, cache=cache,
+                             controller=controller, base_url=args.base_url)
+    _print_fetch_summary(controller, cache, len(months))
+    if db is not None:
+        with db:
+            db_writes = db.upsert_puzzles(combined)
+        print(f"Upserted {db_writes} new or changed puzzle rows into {args.db}")
+
+    out = {"results": combined}
+    json_io.dump_path(out, out_path, indent=not args.compact)
     print(f"Wrote {len(combined)} total items to {out_path}")
 
 
+def _print_fetch_summary(controller: RateController, cache: Optional[MonthCache], total_months: int) -> None:
+    if controller.requests:
+        print(f"Requests: {controller.summary()}")
+    if cache is not None and cache.hits:
+        print(f"Served {cache.hits} of {total_months} months from cache ({cache.cache_dir})")
+
+
 if __name__ == "__main__":
     main()
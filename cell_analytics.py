@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Per-cell solve analytics over every solved puzzle's completion board.
+
+Each solved puzzle's `board.cells[].timestamp` values are loaded once into a
+ragged `CellTimes`: one flat float64 array of fill times for all puzzles
+(seconds since the puzzle's first fill, sorted within each puzzle) plus an
+offsets array, so puzzle `i` owns `values[offsets[i]:offsets[i + 1]]`. Every
+metric is then a segment operation over the flat array (`np.diff`,
+`np.bincount` by segment id, one `np.searchsorted` over segment-shifted keys),
+with no Python loop per cell or per puzzle:
+
+  active time      time between the first and last fill, minus gaps longer
+                   than the pause threshold (default 60 s)
+  pauses           number, total and longest of those gaps
+  fill velocity    cells filled per minute in each of `bins` equal slices of
+                   the solve (first to last fill)
+  percent filled   share of the fillable cells filled N minutes after the
+                   first fill, as quantiles across puzzles
+
+`cell_analytics_card` summarizes these per weekday (plus `All`) as the card 8
+dataset written by `data_pipeline.py`. Non-blank cells without a timestamp
+count towards the grid size but not as fills.
+
+Usage:
+    python3 cell_analytics.py
+    python3 cell_analytics.py -i data_output/puzzle_data.npz --completion-dir data_output/puzzle_completion_data.pack \\
+        --pause 90 --per-puzzle data_output/cache/cell_metrics.csv
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import json_io
+
+CARD_VERSION = 1
+DAY_ORDER = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+PAUSE_SECONDS = 60.0
+VELOCITY_BINS = 20
+FILLED_AT_MINUTES = (1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60)
+QUANTILES = (10, 25, 50, 75, 90)
+
+
+class CellTimes:
+    """Ragged per-puzzle fill times: puzzle `i`'s fills are `values[offsets[i]:offsets[i + 1]]`."""
+
+    def __init__(self, puzzle_ids: np.ndarray, cells: np.ndarray, first_fill: np.ndarray,
+                 values: np.ndarray, offsets: np.ndarray):
+        self.puzzle_ids = puzzle_ids  # int64, one per puzzle
+        self.cells = cells            # int64 fillable (non-blank) cells per puzzle
+        self.first_fill = first_fill  # float64 timestamp of each puzzle's first fill
+        self.values = values          # float64 seconds since the first fill, ascending within each puzzle
+        self.offsets = offsets        # int64, len(puzzle_ids) + 1
+
+    def __len__(self) -> int:
+        return len(self.puzzle_ids)
+
+    @property
+    def filled(self) -> np.ndarray:
+        """Number of timestamped fills per puzzle."""
+        return np.diff(self.offsets)
+
+    @property
+    def segments(self) -> np.ndarray:
+        """The puzzle index of every value."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.filled)
+
+    @property
+    def span(self) -> np.ndarray:
+        """Seconds from each puzzle's first to its last fill."""
+        return self.values[self.offsets[1:] - 1]
+
+    @classmethod
+    def from_ragged(cls, puzzle_ids: Sequence[int], stamps: List[np.ndarray]) -> "CellTimes":
+        """Build from one array per puzzle of its non-blank cells' timestamps (NaN where unfilled)."""
+        cells = np.fromiter((len(s) for s in stamps), dtype=np.int64, count=len(stamps))
+        flat = np.concatenate(stamps) if stamps else np.empty(0)
+        seg = np.repeat(np.arange(len(stamps), dtype=np.int64), cells)
+        keep = ~np.isnan(flat)
+        flat, seg = flat[keep], seg[keep]
+        filled = np.bincount(seg, minlength=len(stamps))
+        has = filled > 0  # puzzles without any timestamps carry no timing information
+        flat = flat[np.lexsort((flat, seg))]
+        offsets = np.concatenate(([0], np.cumsum(filled[has])))
+        first = flat[offsets[:-1]]
+        values = flat - np.repeat(first, filled[has])
+        return cls(np.asarray(puzzle_ids, dtype=np.int64)[has], cells[has], first, values, offsets)
+
+
+def board_timestamps(data: Any) -> Optional[np.ndarray]:
+    """Timestamps of one parsed completion's non-blank cells (NaN where unfilled), or None without a board."""
+    board = data.get("board") if isinstance(data, dict) else None
+    cells = board.get("cells") if isinstance(board, dict) else None
+    if not isinstance(cells, list) or not cells:
+        return None
+    try:
+        return np.array([c.get("timestamp") for c in cells if isinstance(c, dict) and not c.get("blank")],
+                        dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_cell_times(store, puzzle_ids: Iterable[Any]) -> CellTimes:
+    """Read every listed puzzle's board from a completion store (see completion_store.py) into a `CellTimes`."""
+    ids: List[int] = []
+    stamps: List[np.ndarray] = []
+    for pid in puzzle_ids:
+        body = store.get(pid)
+        if body is None:
+            continue
+        try:
+            data = json_io.loads(body)
+        except ValueError:
+            continue
+        ts = board_timestamps(data)
+        if ts is not None:
+            ids.append(int(pid))
+            stamps.append(ts)
+    return CellTimes.from_ragged(ids, stamps)
+
+
+# --- METRICS ---
+
+def _gaps(ct: CellTimes):
+    """(gap seconds, puzzle index) between consecutive fills of the same puzzle."""
+    seg = ct.segments
+    same = seg[1:] == seg[:-1]
+    return np.diff(ct.values)[same], seg[1:][same]
+
+
+def puzzle_metrics(ct: CellTimes, pause_seconds: float = PAUSE_SECONDS) -> pd.DataFrame:
+    """One row per puzzle: fills, span, active time and pauses (gaps over `pause_seconds`)."""
+    n = len(ct)
+    gaps, seg = _gaps(ct)
+    paused = gaps > pause_seconds
+    pause_total = np.bincount(seg, weights=np.where(paused, gaps, 0.0), minlength=n)
+    longest = np.zeros(n)
+    np.maximum.at(longest, seg[paused], gaps[paused])
+    span = ct.span
+    return pd.DataFrame({
+        "puzzle_id": ct.puzzle_ids,
+        "cells": ct.cells,
+        "filled": ct.filled,
+        "span_s": span,
+        "active_s": span - pause_total,
+        "pauses": np.bincount(seg, weights=paused, minlength=n).astype(np.int64),
+        "pause_s": pause_total,
+        "longest_pause_s": longest,
+    })
+
+
+def velocity_curves(ct: CellTimes, bins: int = VELOCITY_BINS) -> np.ndarray:
+    """(puzzles, bins) cells filled per minute in equal slices of each solve; NaN rows for single-fill puzzles."""
+    n = len(ct)
+    seg = ct.segments
+    span = ct.span
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slot = np.minimum((ct.values / span[seg] * bins).astype(np.int64, copy=False), bins - 1)
+    slot[~(span[seg] > 0)] = 0
+    counts = np.bincount(seg * bins + slot, minlength=n * bins).reshape(n, bins).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        velocity = counts / (span / bins / 60.0)[:, None]
+    velocity[~(span > 0)] = np.nan
+    return velocity
+
+
+def percent_filled_at(ct: CellTimes, minutes: Sequence[float] = FILLED_AT_MINUTES) -> np.ndarray:
+    """(puzzles, len(minutes)) percent of fillable cells filled that many minutes after the first fill."""
+    n = len(ct)
+    marks = np.asarray(minutes, dtype=np.float64) * 60.0
+    # Shift each puzzle into its own band so one searchsorted answers every (puzzle, mark) pair
+    band = (max(float(ct.values.max()) if len(ct.values) else 0.0, float(marks.max())) + 1.0)
+    keys = ct.values + ct.segments * band
+    queries = (np.arange(n, dtype=np.float64)[:, None] * band + marks[None, :]).ravel()
+    counts = np.searchsorted(keys, queries, side="right").reshape(n, len(marks)) - ct.offsets[:-1, None]
+    return counts / ct.cells[:, None] * 100.0
+
+
+# --- CARD 8 ---
+
+def _rounded(values, digits: int = 2) -> list:
+    """A JSON-ready (nested) list with NaN as None."""
+    arr = np.round(np.asarray(values, dtype=np.float64), digits)
+    return np.where(np.isnan(arr), None, arr).tolist()
+
+
+def cell_analytics_card(solved: pd.DataFrame, store, **options: Any) -> Optional[Dict[str, Any]]:
+    """Card 8 for the solved puzzles in `solved` (needs `puzzle_id`, `Day_of_Week`), or None without boards.
+
+    Loads the boards from `store` and passes `options` on to `card_from_cell_times`.
+    """
+    return card_from_cell_times(load_cell_times(store, solved["puzzle_id"].tolist()), solved, **options)
+
+
+def card_from_cell_times(ct: CellTimes, solved: pd.DataFrame, pause_seconds: float = PAUSE_SECONDS,
+                         bins: int = VELOCITY_BINS, minutes: Sequence[float] = FILLED_AT_MINUTES,
+                         quantiles: Sequence[float] = QUANTILES) -> Optional[Dict[str, Any]]:
+    """Card 8 from already loaded boards; `solved` maps their puzzle_ids to `Day_of_Week`. None if `ct` is empty.
+
+    `summary` has one row per weekday plus `All`: median active and wall
+    minutes, the active share of total wall time, pauses per puzzle and the
+    median total pause. `velocity` holds each group's median cells-per-minute
+    curve over `bins` slices of the solve, and `filled_at` the `quantiles` of
+    percent filled at each of `minutes`.
+    """
+    from data_pipeline import format_time_array
+
+    if not len(ct):
+        return None
+    days = (pd.Series(solved["Day_of_Week"].astype(str).to_numpy(), index=solved["puzzle_id"].astype("int64"))
+            .groupby(level=0).first().reindex(ct.puzzle_ids).to_numpy())
+    metrics = puzzle_metrics(ct, pause_seconds)
+    velocity = velocity_curves(ct, bins)
+    filled_at = percent_filled_at(ct, minutes)
+
+    groups = [(d, days == d) for d in DAY_ORDER if (days == d).any()] + [("All", np.ones(len(ct), dtype=bool))]
+    summary, curves, filled = [], {}, {}
+    for name, mask in groups:
+        m = metrics[mask]
+        summary.append({
+            "Day_of_Week": name,
+            "puzzles": int(mask.sum()),
+            "median_active_min": float(np.median(m["active_s"])) / 60,
+            "median_span_min": float(np.median(m["span_s"])) / 60,
+            "active_share_pct": float(m["active_s"].sum() / m["span_s"].sum() * 100) if m["span_s"].sum() > 0 else None,
+            "pauses_per_puzzle": float(m["pauses"].mean()),
+            "median_pause_min": float(np.median(m["pause_s"])) / 60,
+        })
+        rows = velocity[mask]
+        rows = rows[~np.isnan(rows[:, 0])]
+        curves[name] = _rounded(np.median(rows, axis=0) if len(rows) else np.full(bins, np.nan))
+        filled[name] = _rounded(np.percentile(filled_at[mask], quantiles, axis=0), 1)
+
+    table = pd.DataFrame(summary)
+    table["median_active_Time"] = format_time_array(table["median_active_min"])
+    table["median_span_Time"] = format_time_array(table["median_span_min"])
+    for col in ("median_active_min", "median_span_min", "active_share_pct", "pauses_per_puzzle", "median_pause_min"):
+        table[col] = _rounded(table[col].astype("float64"))
+    return {
+        "version": CARD_VERSION,
+        "puzzles": len(ct),
+        "pause_threshold_s": pause_seconds,
+        "summary": table.to_dict("records"),
+        "velocity": {"progress_pct": _rounded((np.arange(bins) + 0.5) / bins * 100, 1), "cells_per_min": curves},
+        "filled_at": {"minutes": list(minutes), "quantiles": list(quantiles), "pct": filled},
+    }
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Per-cell solve analytics over every solved puzzle")
+    p.add_argument("-i", "--input", default="data_output/puzzle_data.npz",
+                   help="Puzzle table for the list of solved puzzles (.npz, .csv or .db; default: data_output/puzzle_data.npz)")
+    p.add_argument("--completion-dir", default="data_output/puzzle_completion_data",
+                   help="Completion JSONs (directory or .pack)")
+    p.add_argument("--pause", type=float, default=PAUSE_SECONDS,
+                   help=f"Gaps between fills longer than this many seconds are pauses (default: {PAUSE_SECONDS:g})")
+    p.add_argument("-o", "--out", help="Write the card 8 JSON here")
+    p.add_argument("--per-puzzle", help="Write the per-puzzle metrics to this CSV")
+    args = p.parse_args(argv)
+
+    from completion_store import resolve_store
+    from data_pipeline import load_solved
+
+    solved = load_solved(args.input)
+    store = resolve_store(args.completion_dir)
+    start = time.perf_counter()
+    ct = load_cell_times(store, solved["puzzle_id"].tolist())
+    loaded = time.perf_counter() - start
+    card = card_from_cell_times(ct, solved, pause_seconds=args.pause)
+    computed = time.perf_counter() - start - loaded
+    print(f"Loaded {len(ct.values)} fills from {len(ct)} of {len(solved)} solved puzzles in {loaded:.2f}s; "
+          f"metrics in {computed:.3f}s")
+    if args.per_puzzle:
+        puzzle_metrics(ct, args.pause).to_csv(args.per_puzzle, index=False)
+        print(f"Wrote {args.per_puzzle}")
+    if args.out:
+        json_io.dump_path(card, args.out, indent=True)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
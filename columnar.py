@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Compact, typed columnar storage for the flattened puzzle table.
+
+`flatten_results_to_csv.py` writes `puzzle_data.npz`, a NumPy archive with one
+array per column and a declared schema, instead of (or as well as) the CSV:
+
+  category   codes (int16, -1 = missing) + `{col}.categories`
+  int32/64   values + `{col}.mask` (True = missing)
+  float32    values, NaN = missing
+  bool       values (missing = False)
+  datetime   datetime64[D]
+
+Columns are stored uncompressed so `np.load` can read just the arrays a caller
+asks for; `read_columnar(path, columns=[...])` never touches the others.
+"""
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+import json_io
+
+SCHEMA_VERSION = 1
+DAY_ORDER = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# column -> storage kind
+SCHEMA: Dict[str, str] = {
+    "puzzle_id": "int32",
+    "print_date": "datetime",
+    "Day_of_Week": "category",
+    "author": "category",
+    "editor": "category",
+    "star": "category",
+    "publish_type": "category",
+    "format_type": "category",
+    "solved": "bool",
+    "percent_filled": "float32",
+    "secondsSpentSolving": "int32",
+    "cellsFilled": "int32",
+    "cellsTotal": "int32",
+    "firstCellTimestamp": "int64",
+    "lastCellTimestamp": "int64",
+    "cellsChecked": "int32",
+    "cellsRevealed": "int32",
+    "usedCheck": "bool",
+    "usedReveal": "bool",
+}
+
+# categories with a fixed, ordered domain
+ORDERED_CATEGORIES: Dict[str, List[str]] = {"Day_of_Week": DAY_ORDER}
+
+
+def _missing(v: Any) -> bool:
+    return v is None or v == ""
+
+
+def _to_bool(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ("true", "1", "yes")
+    return bool(v)
+
+
+def _encode(kind: str, name: str, values: List[Any]) -> Dict[str, np.ndarray]:
+    if kind == "category":
+        fixed = ORDERED_CATEGORIES.get(name)
+        cats = list(fixed) if fixed else sorted({str(v) for v in values if not _missing(v)})
+        lookup = {c: i for i, c in enumerate(cats)}
+        codes = np.fromiter((lookup.get(str(v), -1) if not _missing(v) else -1 for v in values),
+                            dtype=np.int16, count=len(values))
+        return {name: codes, f"{name}.categories": np.array(cats, dtype=str)}
+    if kind in ("int32", "int64"):
+        mask = np.fromiter((_missing(v) for v in values), dtype=bool, count=len(values))
+        vals = np.fromiter((0 if m else int(float(v)) for v, m in zip(values, mask)), dtype=kind, count=len(values))
+        return {name: vals, f"{name}.mask": mask}
+    if kind == "float32":
+        return {name: np.fromiter((np.nan if _missing(v) else float(v) for v in values), dtype=np.float32, count=len(values))}
+    if kind == "bool":
+        return {name: np.fromiter((not _missing(v) and _to_bool(v) for v in values), dtype=bool, count=len(values))}
+    if kind == "datetime":
+        return {name: np.array([v if not _missing(v) else "NaT" for v in values], dtype="datetime64[D]")}
+    raise ValueError(f"Unknown column kind {kind!r} for {name}")
+
+
+def _day_of_week(print_date: Any) -> Optional[str]:
+    if not isinstance(print_date, str) or not print_date:
+        return None
+    try:
+        return DAY_ORDER[date.fromisoformat(print_date[:10]).weekday()]
+    except ValueError:
+        return None
+
+
+def write_columnar(rows: List[Dict[str, Any]], out_path: str) -> None:
+    """Write the schema columns present in `rows` to an `.npz` archive."""
+    if not rows:
+        print("No rows to write.")
+        return
+    present = {k for r in rows for k in r.keys()}
+    if "print_date" in present and "Day_of_Week" not in present:
+        rows = [dict(r, Day_of_Week=_day_of_week(r.get("print_date"))) for r in rows]
+        present.add("Day_of_Week")
+
+    arrays: Dict[str, np.ndarray] = {}
+    columns = [c for c in SCHEMA if c in present]
+    for col in columns:
+        arrays.update(_encode(SCHEMA[col], col, [r.get(col) for r in rows]))
+    meta = {"version": SCHEMA_VERSION, "rows": len(rows), "columns": {c: SCHEMA[c] for c in columns}}
+    arrays["__schema__"] = np.array(json_io.dumps(meta))
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "wb") as fh:
+        np.savez(fh, **arrays)
+    print(f"Wrote {len(rows)} rows x {len(columns)} typed columns to {out_path}")
+
+
+def read_schema(path: str) -> Dict[str, Any]:
+    with np.load(path, allow_pickle=False) as npz:
+        return json_io.loads(str(npz["__schema__"]))
+
+
+def read_columnar(path: str, columns: Optional[Iterable[str]] = None):
+    """Load `columns` (default: all) from an `.npz` archive into a typed pandas DataFrame.
+
+    Category columns come back as `pd.Categorical` (ordered for Day_of_Week),
+    integer columns as int32/int64 (float64 with NaN if any value is missing)
+    and `print_date` as datetime64.
+    """
+    import pandas as pd
+
+    with np.load(path, allow_pickle=False) as npz:
+        meta = json_io.loads(str(npz["__schema__"]))
+        stored: Dict[str, str] = meta["columns"]
+        wanted = list(stored) if columns is None else [c for c in columns if c in stored]
+        data: Dict[str, Any] = {}
+        for col in wanted:
+            kind = stored[col]
+            if kind == "category":
+                cats = npz[f"{col}.categories"].tolist()
+                data[col] = pd.Categorical.from_codes(npz[col].astype(np.int32), categories=cats,
+                                                      ordered=col in ORDERED_CATEGORIES)
+            elif kind in ("int32", "int64"):
+                vals, mask = npz[col], npz[f"{col}.mask"]
+                if mask.any():
+                    vals = vals.astype(np.float64)
+                    vals[mask] = np.nan
+                data[col] = vals
+            elif kind == "datetime":
+                data[col] = npz[col].astype("datetime64[ns]")
+            else:
+                data[col] = npz[col]
+    return pd.DataFrame(data, columns=wanted)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Packed, compressed storage for per-puzzle completion JSONs.
+
+Instead of one pretty-printed file per puzzle, completions can be kept in a
+single append-only archive plus a small id -> offset index:
+
+  puzzle_completion_data.pack        concatenated zlib-compressed JSON bodies
+  puzzle_completion_data.pack.idx    JSON: {"puzzles": {id: [offset, length]}}
+
+Each body is compressed on its own, so one puzzle's board can be read with a
+single seek + read without touching the rest of the archive. Rewriting a
+puzzle appends a new body and repoints the index; `compact` drops the
+superseded bytes.
+
+Both layouts are available through the same small interface (`get`, `put`,
+`ids`), so readers such as `flatten_results_to_csv.py` do not care which one
+is on disk. The directory layout remains available as an export.
+
+Usage:
+    python3 completion_store.py pack   -i data_output/puzzle_completion_data -o data_output/puzzle_completion_data.pack
+    python3 completion_store.py export -i data_output/puzzle_completion_data.pack -o data_output/puzzle_completion_data
+    python3 completion_store.py compact -i data_output/puzzle_completion_data.pack
+    python3 completion_store.py stats  -i data_output/puzzle_completion_data.pack
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import json_io
+
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+SKIP_NAMES = {"manifest.json"}
+
+
+class DirectoryStore:
+    """The original layout: `{dir}/{puzzle_id}.json`."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def file_path(self, puzzle_id) -> Path:
+        return self.path / f"{puzzle_id}.json"
+
+    def has(self, puzzle_id) -> bool:
+        return self.file_path(puzzle_id).exists()
+
+    def get(self, puzzle_id) -> Optional[bytes]:
+        try:
+            return self.file_path(puzzle_id).read_bytes()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def put(self, puzzle_id, body: bytes) -> None:
+        path = self.file_path(puzzle_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+
+    def ids(self) -> List[str]:
+        if not self.path.is_dir():
+            return []
+        return sorted(p.stem for p in self.path.glob("*.json") if p.name not in SKIP_NAMES)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PackStore:
+    """Single compressed archive with an id -> (offset, length) index.
+
+    Thread-safe for concurrent `put`s; the index is rewritten on `flush`/`close`.
+    """
+
+    def __init__(self, path: Path, level: int = 6):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        self.level = level
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._dirty = False
+        self._reader = None
+        self._writer = None
+        if self.index_path.exists():
+            data = json_io.load_path(self.index_path)
+            self._index = {k: (int(v[0]), int(v[1])) for k, v in (data.get("puzzles") or {}).items()}
+
+    def has(self, puzzle_id) -> bool:
+        return str(puzzle_id) in self._index
+
+    def ids(self) -> List[str]:
+        return sorted(self._index)
+
+    def get(self, puzzle_id) -> Optional[bytes]:
+        entry = self._index.get(str(puzzle_id))
+        if entry is None:
+            return None
+        offset, length = entry
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(offset)
+            blob = self._reader.read(length)
+        return zlib.decompress(blob)
+
+    def put(self, puzzle_id, body: bytes) -> None:
+        blob = zlib.compress(body, self.level)
+        with self._lock:
+            if self._writer is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._writer = open(self.path, "ab")
+            offset = self._writer.seek(0, os.SEEK_END)
+            self._writer.write(blob)
+            self._index[str(puzzle_id)] = (offset, len(blob))
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+                os.fsync(self._writer.fileno())
+            if self._dirty:
+                tmp = self.index_path.with_name(self.index_path.name + ".part")
+                json_io.dump_path({"version": 1, "puzzles": self._index}, tmp)
+                os.replace(tmp, self.index_path)
+                self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            for fh in (self._reader, self._writer):
+                if fh is not None:
+                    fh.close()
+            self._reader = self._writer = None
+
+    def live_bytes(self) -> int:
+        return sum(length for _, length in self._index.values())
+
+    def compact(self) -> Tuple[int, int]:
+        """Rewrite the archive without superseded bodies; returns (bytes before, bytes after)."""
+        self.flush()
+        before = self.path.stat().st_size if self.path.exists() else 0
+        tmp = self.path.with_name(self.path.name + ".compact")
+        new_index: Dict[str, Tuple[int, int]] = {}
+        with self._lock, open(self.path, "rb") as src, open(tmp, "wb") as dst:
+            for pid, (offset, length) in sorted(self._index.items(), key=lambda kv: kv[1][0]):
+                src.seek(offset)
+                new_index[pid] = (dst.tell(), length)
+                dst.write(src.read(length))
+            for fh in (self._reader, self._writer):
+                if fh is not None:
+                    fh.close()
+            self._reader = self._writer = None
+            os.replace(tmp, self.path)
+            self._index = new_index
+            self._dirty = True
+        self.flush()
+        return before, self.path.stat().st_size
+
+    def __enter__(self) -> "PackStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+Store = Union[DirectoryStore, PackStore]
+
+
+def open_store(path: Union[str, Path]) -> Store:
+    """Open a completion store: `*.pack` paths are archives, anything else a directory."""
+    path = Path(path)
+    if path.suffix == PACK_SUFFIX:
+        return PackStore(path)
+    return DirectoryStore(path)
+
+
+def resolve_store(path: Union[str, Path]) -> Store:
+    """Like `open_store`, but prefer `{dir}.pack` when it exists next to a directory path."""
+    path = Path(path)
+    if path.suffix != PACK_SUFFIX:
+        packed = path.with_name(path.name + PACK_SUFFIX)
+        if packed.exists() and packed.with_name(packed.name + INDEX_SUFFIX).exists():
+            return PackStore(packed)
+    return open_store(path)
+
+
+def iter_bodies(store: Store) -> Iterator[Tuple[str, bytes]]:
+    for pid in store.ids():
+        body = store.get(pid)
+        if body is not None:
+            yield pid, body
+
+
+def copy_store(src: Store, dst: Store) -> int:
+    count = 0
+    for pid, body in iter_bodies(src):
+        dst.put(pid, body)
+        count += 1
+    dst.flush()
+    return count
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Pack, export or inspect completion JSON stores")
+    p.add_argument("command", choices=["pack", "export", "compact", "stats"])
+    p.add_argument("-i", "--input", required=True, help="Source store (directory or .pack)")
+    p.add_argument("-o", "--output", help="Destination store for pack/export")
+    p.add_argument("--indent", type=int, default=4, help="Indent for exported JSON files (default: 4; -1 keeps bodies verbatim)")
+    args = p.parse_args(argv)
+
+    src = open_store(args.input)
+    if args.command == "stats":
+        ids = src.ids()
+        print(f"{len(ids)} puzzles in {args.input}")
+        if isinstance(src, PackStore):
+            size = src.path.stat().st_size if src.path.exists() else 0
+            print(f"archive: {size} bytes ({src.live_bytes()} live)")
+        return
+
+    if args.command == "compact":
+        if not isinstance(src, PackStore):
+            print("compact only applies to .pack archives")
+            sys.exit(1)
+        before, after = src.compact()
+        print(f"Compacted {src.path}: {before} -> {after} bytes")
+        return
+
+    if not args.output:
+        print(f"--output is required for {args.command}")
+        sys.exit(1)
+    dst = open_store(args.output)
+    if args.command == "pack" and not isinstance(dst, PackStore):
+        print("pack output must end in .pack")
+        sys.exit(1)
+    if args.command == "export" and isinstance(dst, PackStore):
+        print("export output must be a directory")
+        sys.exit(1)
+
+    if args.command == "export" and args.indent >= 0:
+        count = 0
+        for pid, body in iter_bodies(src):
+            try:
+                # any indent width is allowed here, so this stays on the stdlib serializer
+                body = json.dumps(json_io.loads(body), indent=args.indent, ensure_ascii=False).encode("utf-8")
+            except ValueError:
+                pass
+            dst.put(pid, body)
+            count += 1
+    else:
+        count = copy_store(src, dst)
+    dst.close()
+    src.close()
+    print(f"Copied {count} puzzles from {args.input} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
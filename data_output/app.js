@@ -6,7 +6,10 @@ const DATA_FILES = {
     card4: './card_data/_card4_evolution.json',
     card5: './card_data/_card5_struggles.json',
     card6: './card_data/_card6_fast_days.json',
+    card7: './card_data/_card7_replay.json',
 };
+// Every card in one compact file (written by data_pipeline.py); DATA_FILES is the fallback.
+const CARD_BUNDLE = './card_data/cards.json';
 const DAY_ORDER = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"];
 const DAY_FULL_NAMES = {
     "Mon": "Monday", 
@@ -29,6 +32,61 @@ const DAY_COLORS = {
 
 // --- CORE UTILITY FUNCTIONS ---
 
+let cardBundlePromise = null;
+
+/**
+ * Fetches the card bundle once; later calls reuse the in-memory copy.
+ * @returns {Promise<Object|null>} - The bundle's `cards` map, or null if it is unavailable.
+ */
+function loadCardBundle() {
+    if (!cardBundlePromise) {
+        cardBundlePromise = fetch(CARD_BUNDLE)
+            .then(response => response.ok ? response.json() : null)
+            .then(bundle => (bundle && bundle.cards) ? bundle.cards : null)
+            .catch(() => null);
+    }
+    return cardBundlePromise;
+}
+
+/**
+ * Returns the data for one card (e.g. 'card4') from the bundle, or fetches its own file.
+ * Renderers annotate the objects they get, so each call hands out a fresh copy.
+ * @param {string} key - A DATA_FILES key.
+ * @returns {Promise<any>} - The card's JSON data.
+ */
+async function getCardData(key) {
+    const cards = await loadCardBundle();
+    if (cards && cards[key] !== undefined) {
+        return typeof structuredClone === 'function' ? structuredClone(cards[key]) : JSON.parse(JSON.stringify(cards[key]));
+    }
+    const response = await fetch(DATA_FILES[key]);
+    return response.json();
+}
+
+/**
+ * Decodes a base64 string of little-endian uint16 values (the packed replay arrays).
+ * @param {string} b64 - Base64 text.
+ * @returns {Uint16Array} - The decoded values.
+ */
+function decodeUint16(b64) {
+    const bytes = Uint8Array.from(atob(b64 || ''), ch => ch.charCodeAt(0));
+    const view = new DataView(bytes.buffer);
+    const out = new Uint16Array(bytes.length >> 1);
+    for (let i = 0; i < out.length; i++) out[i] = view.getUint16(i * 2, true);
+    return out;
+}
+
+/**
+ * Decodes a base64 bitmask packed most-significant bit first (numpy.packbits).
+ * @param {string} b64 - Base64 text.
+ * @param {number} length - Number of bits to read.
+ * @returns {boolean[]} - One flag per bit.
+ */
+function decodeBitmask(b64, length) {
+    const bytes = Uint8Array.from(atob(b64 || ''), ch => ch.charCodeAt(0));
+    return Array.from({ length }, (_, i) => ((bytes[i >> 3] || 0) >> (7 - (i & 7)) & 1) === 1);
+}
+
 /**
  * Converts time strings like '5m 46s' or '12m 00s' into '5:46' or '12:00' format.
  * @param {string} timeStr - The time string from the JSON.
@@ -322,8 +380,78 @@ function drawLineSequentially(index, normalizedDataByDay, svg, lineGenerator, la
     }
 }
 
-// Rendering of the completion curve on Card 7
-function renderCompletionChart(containerId, chartData, actualSeconds, startDelay, totalSolveDuration) {
+// Celebration when the Card 7 replay finishes: screen shake and gold confetti
+function celebrateReplay() {
+    // --- THE CELEBRATION ---
+    isConfettiActive = true;
+    // 1. Trigger Screen Shake on the main card container
+    const card = d3.select("#card-7");
+    card.classed("apply-shake", true);
+    
+    // Remove the class after animation so it can be re-triggered
+    setTimeout(() => card.classed("apply-shake", false), 600);
+
+    // 2. Launch Gold Confetti
+    const end = Date.now() + (2 * 1000); // 2 seconds of confetti
+    const colors = ['#f1c40f', '#e67e22', '#ffffff'];
+
+    // Compute confetti launch origins relative to the centered .app-frame if available
+    const _confettiOrigins = (() => {
+        const fallback = {
+            left: { x: 0, y: 0.8 },
+            right: { x: 1, y: 0.8 }
+        };
+
+        const frameElem = document.querySelector('.app-frame');
+        if (!frameElem) return fallback;
+
+        const r = frameElem.getBoundingClientRect();
+        const vw = window.innerWidth || document.documentElement.clientWidth;
+        const vh = window.innerHeight || document.documentElement.clientHeight;
+
+        // Horizontal insets (8% from left/right edge of the frame)
+        const leftX = (r.left + r.width * 0.08) / vw;
+        const rightX = (r.left + r.width * 0.92) / vw;
+
+        // Launch roughly from 90% down the frame (near bottom)
+        const bottomY = (r.top + r.height * 0.9) / vh;
+
+        const clamp = v => Math.min(Math.max(v, 0), 1);
+
+        return {
+            left: { x: clamp(leftX), y: clamp(bottomY) },
+            right: { x: clamp(rightX), y: clamp(bottomY) }
+        };
+    })();
+
+    (function frame() {
+        if (!isConfettiActive) return;
+        confetti({
+            particleCount: 3,
+            angle: 60,
+            spread: 55,
+            origin: _confettiOrigins.left,
+            colors: colors
+        });
+        confetti({
+            particleCount: 3,
+            angle: 120,
+            spread: 55,
+            origin: _confettiOrigins.right,
+            colors: colors
+        });
+
+        if (Date.now() < end) {
+            requestAnimationFrame(frame);
+        } else {
+            isConfettiActive = false;
+        }
+    }());
+}
+
+// Rendering of the completion curve on Card 7.
+// The curve is drawn hidden behind a clip rect; the returned function reveals it up to a fraction (0..1).
+function renderCompletionChart(containerId, chartData) {
     const container = d3.select(containerId);
     container.html(""); // Clear
 
@@ -388,81 +516,6 @@ function renderCompletionChart(containerId, chartData, actualSeconds, startDelay
         .attr("d", line)
         .attr("clip-path", "url(#reveal-clip)");
 
-    // Animation: Draw the line in sync with the crossword
-    clipRect.transition()
-        .delay(startDelay)
-        .duration(totalSolveDuration)
-        .ease(d3.easeLinear)
-        .attr("width", width)
-        .delay(startDelay)
-        .on("end", () => {
-            // --- THE CELEBRATION ---
-            isConfettiActive = true;
-            // 1. Trigger Screen Shake on the main card container
-            const card = d3.select("#card-7");
-            card.classed("apply-shake", true);
-            
-            // Remove the class after animation so it can be re-triggered
-            setTimeout(() => card.classed("apply-shake", false), 600);
-
-            // 2. Launch Gold Confetti
-            const end = Date.now() + (2 * 1000); // 2 seconds of confetti
-            const colors = ['#f1c40f', '#e67e22', '#ffffff'];
-
-            // Compute confetti launch origins relative to the centered .app-frame if available
-            const _confettiOrigins = (() => {
-                const fallback = {
-                    left: { x: 0, y: 0.8 },
-                    right: { x: 1, y: 0.8 }
-                };
-
-                const frameElem = document.querySelector('.app-frame');
-                if (!frameElem) return fallback;
-
-                const r = frameElem.getBoundingClientRect();
-                const vw = window.innerWidth || document.documentElement.clientWidth;
-                const vh = window.innerHeight || document.documentElement.clientHeight;
-
-                // Horizontal insets (8% from left/right edge of the frame)
-                const leftX = (r.left + r.width * 0.08) / vw;
-                const rightX = (r.left + r.width * 0.92) / vw;
-
-                // Launch roughly from 90% down the frame (near bottom)
-                const bottomY = (r.top + r.height * 0.9) / vh;
-
-                const clamp = v => Math.min(Math.max(v, 0), 1);
-
-                return {
-                    left: { x: clamp(leftX), y: clamp(bottomY) },
-                    right: { x: clamp(rightX), y: clamp(bottomY) }
-                };
-            })();
-
-            (function frame() {
-                if (!isConfettiActive) return;
-                confetti({
-                    particleCount: 3,
-                    angle: 60,
-                    spread: 55,
-                    origin: _confettiOrigins.left,
-                    colors: colors
-                });
-                confetti({
-                    particleCount: 3,
-                    angle: 120,
-                    spread: 55,
-                    origin: _confettiOrigins.right,
-                    colors: colors
-                });
-
-                if (Date.now() < end) {
-                    requestAnimationFrame(frame);
-                } else {
-                    isConfettiActive = false;
-                }
-            }());
-        });
-
     // --- AXES (Subtle) ---
     svg.append("g")
         .attr("class", "replay-axis")
@@ -498,6 +551,8 @@ function renderCompletionChart(containerId, chartData, actualSeconds, startDelay
         .attr("stroke", "#333")
         .attr("stroke-dasharray", "4,4")
         .attr("stroke-width", 1);
+
+    return fraction => clipRect.attr("width", width * fraction);
 }
 
 /**
@@ -642,8 +697,7 @@ function animateArc(canvas, data) {
 
 async function renderCard1() {
     try {
-        const response = await fetch(DATA_FILES.card1);
-        const data = await response.json();
+        const data = await getCardData('card1');
 
         // 1. SELECT ELEMENTS FOR ANIMATION
         // We target the stat boxes and the time summary for the staggered effect
@@ -709,8 +763,7 @@ async function renderCard1() {
 
 async function renderCard2() {
     try {
-        const response = await fetch(DATA_FILES.card2);
-        const chartData = await response.json(); // Array of objects
+        const chartData = await getCardData('card2'); // Array of objects
 
         // Define the order of days and map for full names
         const dayOrder = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"];
@@ -904,8 +957,7 @@ async function renderCard2() {
 
 async function renderCard3() {
     try {
-        const response = await fetch(DATA_FILES.card3);
-        const rawData = await response.json();
+        const rawData = await getCardData('card3');
         
         
         // --- DATA COERCION AND GROUPING ---
@@ -982,8 +1034,7 @@ async function renderCard4() {
         // Restore the original transition on the next tick so future shows still animate
         setTimeout(() => summary.style("transition", null), 0);
 
-        const response = await fetch(DATA_FILES.card4);
-        const rawData = await response.json();
+        const rawData = await getCardData('card4');
         let chartData = Array.isArray(rawData) ? rawData : rawData.data || [];
 
         if (chartData.length === 0) { /* ... error handling ... */ return; }
@@ -1141,8 +1192,7 @@ async function renderCard5() {
     containerSelector.style.height = '730px';
     containerSelector.style.width = '430px';
     try {
-        const response = await fetch(DATA_FILES.card5);
-        const rawData = await response.json();
+        const rawData = await getCardData('card5');
         const tableData = Array.isArray(rawData) ? rawData : rawData.data || [];
 
         if (tableData.length === 0) {
@@ -1261,8 +1311,7 @@ async function renderCard6() {
     containerSelector.style.width = '430px';
 
     try {
-        const response = await fetch(DATA_FILES.card6);
-        const rawData = await response.json();
+        const rawData = await getCardData('card6');
         const tableData = Array.isArray(rawData) ? rawData : rawData.data || [];
 
         // This ensures a clean table before the new data even renders
@@ -1359,163 +1408,215 @@ async function renderCard6() {
 
 // --- CARD 7 RENDERING (fastest solve showcase) ---
 
-let card7Timeouts = []; 
-let isConfettiActive = false;
-async function renderCard7() {
-    // --- STEP A: CLEANUP ---
-    
-    // 1. Clear all pending timeouts from the last visit
-    isConfettiActive = false;
-    card7Timeouts.forEach(t => clearTimeout(t));
-    card7Timeouts = [];
+/**
+ * One requestAnimationFrame loop driving the whole Card 7 replay from a single playback clock.
+ * `dueMs` is the sorted reveal time of each event; every frame advances the clock and walks a
+ * cursor over it, so the cost per frame is the number of events that changed state.
+ * @param {Object} opts
+ * @param {Float64Array} opts.dueMs - Sorted event times (ms on the playback clock).
+ * @param {number} opts.startMs - Playback clock value where the solve starts (progress 0).
+ * @param {number} opts.endMs - Playback clock value at which the replay ends (progress 1).
+ * @param {function(number, boolean)} opts.onEvent - Called with (event index, shown) when an event is crossed.
+ * @param {function(number)} opts.onFrame - Called with the clock (ms) after each frame that moved it.
+ * @param {function()} opts.onEnd - Called once when the clock reaches `endMs` while playing.
+ * @returns {Object} - { play, pause, toggle, seek, seekFraction, setSpeed, stop, state }.
+ */
+function createReplayScheduler({ dueMs, startMs, endMs, onEvent, onFrame, onEnd }) {
+    const MAX_FRAME_MS = 250; // don't jump ahead after the tab was hidden
+    let clock = 0;
+    let cursor = 0; // events [0, cursor) are shown
+    let speed = 1;
+    let playing = false;
+    let ended = false;
+    let rafId = null;
+    let lastFrame = null;
+
+    function moveTo(target) {
+        clock = Math.min(Math.max(target, 0), endMs);
+        while (cursor < dueMs.length && dueMs[cursor] <= clock) onEvent(cursor++, true);
+        while (cursor > 0 && dueMs[cursor - 1] > clock) onEvent(--cursor, false);
+        onFrame(clock);
+    }
 
-    // 2. Interrupt any active D3 transitions on the timer and bar
-    d3.select("#replay-timer").interrupt().text("0:00");
-    d3.select("#replay-progress-fill").interrupt().style("width", "0%");
-    
-    try {
-        // identify fastest puzzle by loading the card6 dataset (fastest puzzles)
-        function _parseDeviation(label) {
-            if (label == null) return Infinity;
-            const num = parseFloat(String(label).replace(/[^0-9.-]+/g, ''));
-            return Number.isFinite(num) ? num : Infinity;
+    function frame(now) {
+        rafId = null;
+        if (!playing) return;
+        const elapsed = lastFrame === null ? 0 : Math.min(now - lastFrame, MAX_FRAME_MS);
+        lastFrame = now;
+        moveTo(clock + elapsed * speed);
+        if (clock >= endMs) {
+            playing = false;
+            if (!ended) {
+                ended = true;
+                onEnd();
+            }
+            return;
         }
+        rafId = requestAnimationFrame(frame);
+    }
 
-        // Load the Card 6 data so we can find the fastest puzzle and its puzzle_id
-        const resp6 = await fetch(DATA_FILES.card6);
-        const rawTableData = await resp6.json();
-        const tableData = Array.isArray(rawTableData) ? rawTableData : rawTableData.data || [];
+    const scheduler = {
+        play() {
+            if (playing) return;
+            if (clock >= endMs) moveTo(0);
+            playing = true;
+            ended = false;
+            lastFrame = null;
+            if (rafId === null) rafId = requestAnimationFrame(frame);
+        },
+        pause() {
+            playing = false;
+        },
+        toggle() {
+            playing ? scheduler.pause() : scheduler.play();
+        },
+        seek(ms) {
+            moveTo(ms);
+            if (clock < endMs) ended = false;
+        },
+        seekFraction(fraction) {
+            scheduler.seek(startMs + fraction * (endMs - startMs));
+        },
+        setSpeed(value) {
+            speed = value;
+        },
+        stop() {
+            playing = false;
+            if (rafId !== null) cancelAnimationFrame(rafId);
+            rafId = null;
+        },
+        state: () => ({ clock, speed, playing, endMs }),
+    };
+    moveTo(0);
+    return scheduler;
+}
 
-        if (tableData.length === 0) {
-            console.warn("Card 6 dataset is empty — cannot determine fastest puzzle for replay.");
-            return;
-        }
+const REPLAY_SPEEDS = [1, 2, 4, 0.5];
+let card7Player = null;
+let card7RenderToken = 0;
+let isConfettiActive = false;
 
-        const _fastestPuzzle = (typeof d3.least === 'function')
-            ? d3.least(tableData, d => _parseDeviation(d.Deviation_Percent_Label))
-            : tableData.reduce((best, d) => {
-                if (!best) return d;
-                return _parseDeviation(d.Deviation_Percent_Label) < _parseDeviation(best.Deviation_Percent_Label) ? d : best;
-            }, null);
+// Stops the Card 7 replay (and its confetti) when leaving or re-entering the slide
+function stopCard7Replay() {
+    isConfettiActive = false;
+    if (card7Player) card7Player.stop();
+    card7Player = null;
+}
+
+async function renderCard7() {
+    // --- STEP A: CLEANUP ---
+    stopCard7Replay();
+    const token = ++card7RenderToken;
+    d3.select("#replay-timer").text("0:00");
+    d3.select("#replay-progress-fill").style("width", "0%");
 
-        if (!_fastestPuzzle || !_fastestPuzzle.puzzle_id) {
-            console.warn("No fastest puzzle with a valid puzzle_id found in Card 6 data.");
+    try {
+        // The replay is precomputed by data_pipeline.py (see replay.py): grid, fill order and curve
+        const replay = await getCardData('card7');
+        if (token !== card7RenderToken) return; // the slide was left or re-entered meanwhile
+        if (!replay || !replay.order) {
+            console.warn("Card 7 replay is unavailable — run data_pipeline.py with the completion data present.");
             return;
         }
 
         // Add the puzzle info to the subtitle (select the <p class="card-subtitle"> inside #card-7)
-        d3.select("#card-7 p.card-subtitle").html(`Let's see how you solved the puzzle from <span class="highlight-date">${_fastestPuzzle.Date}</span>`);
-        
-        // Fetch the completion JSON from the local folder: parent -> puzzle_completion_data/{puzzle_id}.json
-        const puzzleId = _fastestPuzzle.puzzle_id;
-        const response = await fetch(`../puzzle_completion_data/${puzzleId}.json`);
-        if (!response.ok) {
-            console.error(`Failed to load puzzle completion file for ${puzzleId}: ${response.status}`);
-            return;
-        }
+        d3.select("#card-7 p.card-subtitle").html(`Let's see how you solved the puzzle from <span class="highlight-date">${replay.date}</span>`);
 
-        const data = await response.json();
-        const cells = data.board.cells;
-        const actualSeconds = data.calcs.secondsSpentSolving;
+        const actualSeconds = replay.seconds;
+        const order = decodeUint16(replay.order);
+        const offsets = decodeUint16(replay.offsets);
+        const blank = decodeBitmask(replay.blank, replay.rows * replay.cols);
         // Animation Settings
         const startDelay = 2000; // 2 second before first letter
         const totalSolveDuration = 20000; // 20 seconds total solve
 
         // --- 1. PREPARE COMPLETION DATA ---
-        const sortedFills = cells.filter(c => !c.blank && c.timestamp !== undefined)
-            .sort((a, b) => a.timestamp - b.timestamp);
-        
-        const totalFillable = sortedFills.length;
-        const minTS = d3.min(sortedFills, d => d.timestamp);
-        const maxTS = d3.max(sortedFills, d => d.timestamp);
-
-        let cumulative = 0;
-        const chartData = sortedFills.map(d => {
-            cumulative++;
-            return {
-                time: d.timestamp,
-                percent: (cumulative / totalFillable) * 100
-            };
-        });
-        
-        // Ensure it starts at 0% at the min timestamp
-        chartData.unshift({ time: minTS, percent: 0 });
+        const curveT = decodeUint16(replay.curve_t);
+        const curvePct = decodeUint16(replay.curve_pct);
+        const chartData = Array.from(curveT, (t, k) => ({ time: t, percent: curvePct[k] / 100 }));
 
         // --- RENDER THE CHART ---
-        renderCompletionChart("#replay-chart-container", chartData, actualSeconds, startDelay, totalSolveDuration);
-        
-        // 1. Determine Size (sqrt of total cells)
-        const gridSize = Math.sqrt(cells.length);
-        const container = d3.select("#crossword-replay-container");
-        container.html(""); // Clear previous
-        
-        // Setup Grid layout
-        container.style("grid-template-columns", `repeat(${gridSize}, 1fr)`);
-
-        // 2. Identify Time Bounds for Normalization
-        const filledCells = cells.filter(c => !c.blank && c.timestamp !== undefined);
-
-        // 3. Build the Grid
-        cells.forEach((cellData, i) => {
-            const cell = container.append("div")
-                .attr("class", cellData.blank ? "cw-cell blank" : "cw-cell");
-
-            if (!cellData.blank) {
-                const letterSpan = cell.append("span")
-                    .attr("class", "cw-letter")
-                    .text(cellData.guess);
-
-                // 4. Calculate Normalized Delay
-                // Range: 0 to 1 multiplied by total solve duration, then add the initial delay
-                const normalizedDelay = startDelay + 
-                    ((cellData.timestamp - minTS) / (maxTS - minTS)) * totalSolveDuration;
-
-                // 5. Display the text and CAPTURE THE TIMEOUT ID so we can clear it later
-                const tId = setTimeout(() => {
-                    letterSpan.classed("revealed", true);
-                    
-                    // Visual feedback: brief highlight when filled
-                    cell.style("background-color", "#fff9c4")
-                        .transition().duration(500)
-                        .style("background-color", "#fff");
-                }, normalizedDelay);
-                
-                card7Timeouts.push(tId); // Add to our tracker
+        const revealChart = renderCompletionChart("#replay-chart-container", chartData);
+
+        // --- 2. BUILD THE GRID ---
+        // Cells that never got a timestamp are shown from the start
+        const container = document.getElementById("crossword-replay-container");
+        container.innerHTML = "";
+        container.style.gridTemplateColumns = `repeat(${replay.cols}, 1fr)`;
+        const fragment = document.createDocumentFragment();
+        const cells = new Array(blank.length);
+        for (let i = 0; i < blank.length; i++) {
+            const cell = document.createElement("div");
+            cell.className = blank[i] ? "cw-cell blank" : "cw-cell";
+            if (!blank[i]) {
+                const letter = document.createElement("span");
+                letter.className = "cw-letter revealed";
+                letter.textContent = (replay.rebus && replay.rebus[i]) || replay.guesses[i].trim();
+                cell.appendChild(letter);
+                cells[i] = cell;
             }
+            fragment.appendChild(cell);
+        }
+        container.appendChild(fragment);
+
+        const timedCells = Array.from(order, i => cells[i]);
+        timedCells.forEach(cell => cell && cell.firstChild.classList.remove("revealed"));
+
+        // --- 3. PLAY IT BACK ON ONE CLOCK ---
+        // Event k reveals order[k] at startDelay + its normalized fill time; the bar, timer and
+        // curve follow the same clock.
+        const dueMs = Float64Array.from(offsets, o => startDelay + (o / 65535) * totalSolveDuration);
+        const progressFill = document.getElementById("replay-progress-fill");
+        const timerDisplay = document.getElementById("replay-timer");
+        let shownSecond = 0;
+
+        card7Player = createReplayScheduler({
+            dueMs,
+            startMs: startDelay,
+            endMs: startDelay + totalSolveDuration,
+            onEvent(k, shown) {
+                const cell = timedCells[k];
+                if (!cell) return;
+                cell.firstChild.classList.toggle("revealed", shown);
+                // Visual feedback: brief highlight when filled (a CSS animation, no per-cell timer)
+                cell.classList.toggle("just-filled", shown);
+            },
+            onFrame(clock) {
+                const fraction = Math.min(Math.max((clock - startDelay) / totalSolveDuration, 0), 1);
+                progressFill.style.width = `${fraction * 100}%`;
+                revealChart(fraction);
+                const currentSec = Math.floor(fraction * actualSeconds);
+                if (currentSec !== shownSecond) {
+                    shownSecond = currentSec;
+                    timerDisplay.textContent = `${Math.floor(currentSec / 60)}:${(currentSec % 60).toString().padStart(2, '0')}`;
+                }
+            },
+            onEnd: celebrateReplay,
         });
-
-        // 6. Animate the Loading Bar
-        // Using the same startDelay and totalSolveDuration as your letters
-        d3.select("#replay-progress-fill")
-            .transition()
-            .delay(startDelay)
-            .duration(totalSolveDuration)
-            .ease(d3.easeLinear) // Use linear for a smooth, constant fill
-            .style("width", "100%");
-        
-        // 7. Animate the Timer (0 to Actual Seconds Spent)
-        const timerDisplay = d3.select("#replay-timer");
-        
-        timerDisplay.transition()
-            .transition()
-            .delay(startDelay)
-            .duration(totalSolveDuration)
-            .ease(d3.easeLinear)
-            .tween("text", function() {
-                const i = d3.interpolateNumber(0, actualSeconds);
-                return function(t) {
-                    const currentSec = Math.floor(i(t));
-                    const mins = Math.floor(currentSec / 60);
-                    const secs = currentSec % 60;
-                    this.textContent = `${mins}:${secs.toString().padStart(2, '0')}`;
-                };
-            });
+        card7Player.play();
 
     } catch (error) {
         console.error("Error rendering Card 7:", error);
     }
 }
 
+// Card 7 keyboard controls: P pauses/resumes, S cycles the speed, ',' and '.' seek 10% back/forward
+function handleCard7Key(e) {
+    if (!card7Player) return false;
+    const { clock, speed, endMs } = card7Player.state();
+    if (e.key === 'p' || e.key === 'P') {
+        card7Player.toggle();
+    } else if (e.key === 's' || e.key === 'S') {
+        const next = REPLAY_SPEEDS[(REPLAY_SPEEDS.indexOf(speed) + 1) % REPLAY_SPEEDS.length];
+        card7Player.setSpeed(next);
+    } else if (e.key === ',' || e.key === '.') {
+        card7Player.seek(clock + (e.key === '.' ? 1 : -1) * endMs * 0.1);
+    } else {
+        return false;
+    }
+    return true;
+}
+
 // --- SLIDE NAVIGATION ---
 
 let currentCardIndex = 0;
@@ -1533,6 +1634,9 @@ function updateCards() {
         }
     });
 
+    // Stop the replay loop as soon as its slide is left
+    if (currentCardIndex !== 7) stopCard7Replay();
+
     // Optional: Render the active card's data when it becomes active
     if (currentCardIndex === 0) animateHero();
     if (currentCardIndex === 1) renderCard1();
@@ -1623,6 +1727,7 @@ function prevCard() {
 
 // Attach event listeners for easy navigation during recording
 document.addEventListener('keydown', (e) => {
+    if (currentCardIndex === 7 && handleCard7Key(e)) return;
     if (e.key === 'ArrowRight' || e.key === 'ArrowDown' || e.key === ' ') {
         nextCard();
     } else if (e.key === 'ArrowLeft' || e.key === 'ArrowUp') {
@@ -1632,6 +1737,17 @@ document.addEventListener('keydown', (e) => {
 
 // --- INITIALIZATION ---
 document.addEventListener('DOMContentLoaded', () => {
+    // Start loading every card's data right away so slide transitions don't wait on the network
+    loadCardBundle();
+    // Card 7 mouse controls: click the grid to pause/resume, click the progress bar to seek
+    document.getElementById('crossword-replay-container').addEventListener('click', () => {
+        if (card7Player) card7Player.toggle();
+    });
+    document.getElementById('replay-progress-container').addEventListener('click', (e) => {
+        if (!card7Player) return;
+        const r = e.currentTarget.getBoundingClientRect();
+        card7Player.seekFraction(Math.min(Math.max((e.clientX - r.left) / r.width, 0), 1));
+    });
     // Initial render of the first card
     //animateHero();
     updateCards(); 
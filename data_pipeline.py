@@ -1,8 +1,18 @@
 import pandas as pd
 import numpy as np
-import json
+import gzip
+import hashlib
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+try:
+    import brotli  # optional: adds a .br sibling to the card bundle
+except ImportError:
+    brotli = None
+
+import json_io
+from aggregates import AggregateState, daily_stats_frame
+from run_metrics import timed
 
 # --- HELPER FUNCTIONS ---
 
@@ -49,29 +59,130 @@ def format_deviation_time(deviation_min: float) -> str:
     return f"{m}m {s:02d}s"
     #return f"{sign}{m}m {s:02d}s"
 
+# Lookup tables for format_time_array: minute prefixes for a day's worth of minutes, and every seconds suffix.
+_MINUTE_LABELS = np.array([str(m) for m in range(24 * 60)], dtype=object)
+_SECOND_LABELS = np.array([f"m {s:02d}s" for s in range(60)], dtype=object)
+
+def format_time_array(minutes) -> np.ndarray:
+    """Vectorized `format_time`: an array of minutes to `Mm SSs` labels (None where NaN)."""
+    minutes = np.asarray(minutes, dtype=np.float64)
+    valid = ~np.isnan(minutes)
+    total_seconds = np.zeros(minutes.shape, dtype=np.int64)
+    total_seconds[valid] = np.trunc(minutes[valid] * 60)  # int() truncates toward zero
+    m, s = np.divmod(total_seconds, 60)
+    in_table = (m >= 0) & (m < len(_MINUTE_LABELS))
+    prefix = np.empty(m.shape, dtype=object)
+    prefix[in_table] = _MINUTE_LABELS[m[in_table]]
+    prefix[~in_table] = m[~in_table].astype(str)
+    labels = prefix + _SECOND_LABELS[s]
+    labels[~valid] = None
+    return labels
+
+def format_deviation_time_array(deviation_min) -> np.ndarray:
+    """Vectorized `format_deviation_time` (the sign is not shown)."""
+    return format_time_array(np.abs(np.asarray(deviation_min, dtype=np.float64)))
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that best keep the line's shape.
+
+    The first and last points are always kept; each bucket in between keeps the
+    point forming the largest triangle with the previously kept point and the
+    next bucket's average.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    every = (n - 2) / (n_out - 2)
+    edges = (np.floor(np.arange(n_out - 1) * every) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            avg_x, avg_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
 # --- CORE DATA PREPARATION ---
 
-def clean_and_preprocess(file_path: str) -> pd.DataFrame:
-    """Loads, cleans, and prepares the crossword data for analysis."""
-    df = pd.read_csv(file_path)
+# Only these columns are read from the flattened table.
+PIPELINE_COLUMNS = ['puzzle_id', 'print_date', 'Day_of_Week', 'author', 'star', 'solved', 'percent_filled', 'secondsSpentSolving']
+# Card 4 point budget per weekday line; a year of history (~52 per line) is never downsampled.
+CARD4_POINTS_PER_DAY = 150
+CSV_DTYPES = {'puzzle_id': 'int32', 'author': 'category', 'star': 'category', 'percent_filled': 'float32'}
 
+DB_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+def load_puzzle_table(file_path: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """Loads just the pipeline's columns from the SQLite store, the columnar `.npz` table or the CSV export.
+
+    `start`/`end` (YYYY-MM-DD, inclusive) limit the print dates loaded.
+    """
+    if file_path.endswith(DB_SUFFIXES):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(file_path)
+        from puzzle_store import PuzzleStore
+        with PuzzleStore(file_path) as db:
+            return db.load_frame(start, end)
+    if file_path.endswith('.npz'):
+        from columnar import read_columnar
+        df = read_columnar(file_path, columns=PIPELINE_COLUMNS)
+    else:
+        csv_columns = [c for c in PIPELINE_COLUMNS if c != 'Day_of_Week']
+        df = pd.read_csv(file_path, usecols=csv_columns, dtype=CSV_DTYPES, parse_dates=['print_date'])
+    if start:
+        df = df[df['print_date'] >= pd.Timestamp(start)]
+    if end:
+        df = df[df['print_date'] <= pd.Timestamp(end)]
+    return df
+
+def load_solved(file_path: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """Loads the table and keeps fully solved puzzles, with Day_of_Week and minutes added."""
+    return select_solved(load_puzzle_table(file_path, start, end))
+
+def select_solved(df: pd.DataFrame) -> pd.DataFrame:
+    """Keeps fully solved puzzles of a loaded table and adds the Day_of_Week and minutes columns.
+
+    A puzzle_id listed more than once counts once (its last row), so the full
+    recompute and the aggregate state see the same solves.
+    """
     # 1. Standard Cleaning and Filtering
     df['print_date'] = pd.to_datetime(df['print_date'])
-    df_solved = df[
-        (df['solved'] == True) &
-        (df['percent_filled'] == 100)
-    ].copy()
+    df_solved = solved_rows(df).copy()
 
     # 2. Add Time and Day columns
     day_order = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    df_solved['Day_of_Week'] = df_solved['print_date'].dt.strftime('%a')
+    if 'Day_of_Week' not in df_solved.columns:
+        df_solved['Day_of_Week'] = df_solved['print_date'].dt.strftime('%a')
     df_solved['Day_of_Week'] = pd.Categorical(df_solved['Day_of_Week'], categories=day_order, ordered=True)
+    if df_solved['secondsSpentSolving'].notna().all():
+        df_solved['secondsSpentSolving'] = df_solved['secondsSpentSolving'].astype('int32')
     df_solved['minutesSpentSolving'] = df_solved['secondsSpentSolving'] / 60
-    
+    return df_solved
+
+def solved_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """The fully solved rows of a loaded table, one per puzzle_id (its last row)."""
+    df_solved = df[
+        (df['solved'] == True) &
+        (df['percent_filled'] == 100)
+    ]
+    return df_solved[~df_solved['puzzle_id'].duplicated(keep='last')]
+
+def clean_and_preprocess(file_path: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """Loads, cleans, and prepares the crossword data for analysis."""
+    return add_daily_stats(load_solved(file_path, start, end))
+
+def add_daily_stats(df_solved: pd.DataFrame) -> pd.DataFrame:
+    """Adds per-day mean/std and the z-score used by cards 2, 5 and 6."""
     # 3. Add Daily Statistics for Outlier Calculation (Cards 5 & 6)
-    daily_stats = df_solved.groupby('Day_of_Week')['minutesSpentSolving'].agg(
-        daily_mean='mean', daily_std='std'
-    ).reset_index()
+    # Computed from exact integer sums so the incremental path (aggregates.py) matches bit for bit.
+    daily_stats = daily_stats_frame(df_solved)
     
     df_solved = df_solved.merge(daily_stats, on='Day_of_Week', how='left')
     
@@ -89,13 +200,16 @@ def prepare_card_1_summary(df: pd.DataFrame) -> Dict[str, Any]:
     max_date = df['print_date'].max()
     
     total_completed = len(df)
-    total_days_in_range = (max_date - min_date).days + 1
-    
     total_seconds = df['secondsSpentSolving'].sum()
     
     # Use the 'star' field as confirmed: 'Gold' means no hints used
     gold_star_completed = len(df[df['star'] == 'Gold'])
     
+    return _summary_record(total_completed, gold_star_completed, total_seconds, min_date, max_date)
+
+def _summary_record(total_completed: int, gold_star_completed: int, total_seconds: float,
+                    min_date: pd.Timestamp, max_date: pd.Timestamp) -> Dict[str, Any]:
+    total_days_in_range = (max_date - min_date).days + 1
     return {
         'total_completed': total_completed,
         'gold_star_completed': gold_star_completed,
@@ -108,52 +222,76 @@ def prepare_card_1_summary(df: pd.DataFrame) -> Dict[str, Any]:
 def prepare_card_2_weekly_summary(df: pd.DataFrame) -> pd.DataFrame:
     """Generates the fastest, average, and slowest times per day of the week."""
     # Use observed=True to handle the Categorical Day_of_Week, silencing the FutureWarning
-    weekly_stats = df.groupby('Day_of_Week', observed=True)['minutesSpentSolving'].agg(
-        fastest_in_minutes='min',
-        average_in_minutes='mean',
-        slowest_in_minutes='max'
+    # The average is the exact per-day mean computed in clean_and_preprocess.
+    weekly_stats = df.groupby('Day_of_Week', observed=True).agg(
+        fastest_in_minutes=('minutesSpentSolving', 'min'),
+        average_in_minutes=('daily_mean', 'first'),
+        slowest_in_minutes=('minutesSpentSolving', 'max')
     ).reset_index()
+    return _format_weekly_summary(weekly_stats)
 
+def _format_weekly_summary(weekly_stats: pd.DataFrame) -> pd.DataFrame:
     # Add a formatted time column for the front-end display
     for col in ['fastest_in_minutes', 'average_in_minutes', 'slowest_in_minutes']:
-        weekly_stats[f'{col}_Time'] = weekly_stats[col].apply(format_time)
+        weekly_stats[f'{col}_Time'] = format_time_array(weekly_stats[col])
         
     return weekly_stats
 
 def prepare_card_3_histograms(df: pd.DataFrame, num_bins: int = 8) -> pd.DataFrame:
-    """Generates frequency histogram data (8 buckets) for each day."""
-    histogram_data: List[Dict[str, Any]] = []
-    
-    for day in df['Day_of_Week'].cat.categories:
-        day_df = df[df['Day_of_Week'] == day]
-        if day_df.empty:
-            continue
-            
-        # Determine bins based on min and max for that specific day
-        min_time = day_df['minutesSpentSolving'].min()
-        max_time = day_df['minutesSpentSolving'].max()
-        
-        # Create bins and calculate frequency
-        bins = np.linspace(min_time, max_time, num_bins + 1)
-        hist, bin_edges = np.histogram(day_df['minutesSpentSolving'], bins=bins)
-        
-        for i in range(num_bins):
-            # Calculate the midpoint for the bar's placement
-            midpoint = (bin_edges[i] + bin_edges[i+1]) / 2
-            
-            histogram_data.append({
-                'Day_of_Week': day,
-                'bin_index': i,
-                'frequency': int(hist[i]), # Ensure int for JSON
-                'time_start_min': bin_edges[i],
-                'time_end_min': bin_edges[i+1],
-                'time_range_label': f"{format_time(bin_edges[i])} - {format_time(bin_edges[i+1])}",
-                'midpoint_min': midpoint
-            })
-
-    return pd.DataFrame(histogram_data)
-
-def prepare_card_4_evolution(df: pd.DataFrame) -> pd.DataFrame:
+    """Generates frequency histogram data (8 buckets) for each day.
+
+    One groupby pass finds each day's min/max; every row is then assigned to a
+    bin of its own day's edges at once, with the same bin semantics as
+    `np.histogram` (half-open bins, last bin closed).
+    """
+    with_time = df[df['secondsSpentSolving'].notna()]
+    codes = with_time['Day_of_Week'].cat.codes.to_numpy()
+    minutes = with_time['minutesSpentSolving'].to_numpy(dtype=np.float64)
+
+    # Determine bins based on min and max for each specific day
+    bounds = with_time.groupby('Day_of_Week', observed=True)['minutesSpentSolving'].agg(['min', 'max'])
+    days = bounds.index.astype(str).to_numpy()
+    day_codes = bounds.index.codes
+    edges = histogram_edges(bounds['min'].to_numpy(), bounds['max'].to_numpy(), num_bins)
+
+    # Bin index = number of interior edges <= value (values sit within their day's [min, max])
+    row_day = np.searchsorted(day_codes, codes)
+    bin_idx = (minutes[:, None] >= edges[row_day, 1:-1]).sum(axis=1)
+    hist = np.bincount(row_day * num_bins + bin_idx, minlength=len(days) * num_bins).reshape(len(days), num_bins)
+
+    return histogram_frame(days, hist, edges)
+
+def histogram_edges(mins: np.ndarray, maxs: np.ndarray, num_bins: int) -> np.ndarray:
+    """Per-day `np.linspace(min, max, num_bins + 1)` edges, shape (days, num_bins + 1).
+
+    Zero-width days are computed separately because `np.linspace` switches
+    formula for the whole call when any step is zero.
+    """
+    edges = np.empty((len(mins), num_bins + 1), dtype=np.float64)
+    flat = maxs == mins
+    for mask in (flat, ~flat):
+        if mask.any():
+            edges[mask] = np.linspace(mins[mask], maxs[mask], num_bins + 1, axis=1)
+    return edges
+
+def histogram_frame(days: np.ndarray, hist: np.ndarray, edges: np.ndarray) -> pd.DataFrame:
+    """Card 3 rows for (days, num_bins) counts and (days, num_bins + 1) edges."""
+    num_bins = hist.shape[1]
+    starts = edges[:, :-1].ravel()
+    ends = edges[:, 1:].ravel()
+    return pd.DataFrame({
+        'Day_of_Week': np.repeat(np.asarray(days, dtype=object), num_bins),
+        'bin_index': np.tile(np.arange(num_bins), len(days)),
+        'frequency': hist.ravel().astype(np.int64),
+        'time_start_min': starts,
+        'time_end_min': ends,
+        'time_range_label': np.char.add(np.char.add(format_time_array(starts).astype(str), ' - '),
+                                        format_time_array(ends).astype(str)).astype(object),
+        # Calculate the midpoint for the bar's placement
+        'midpoint_min': (starts + ends) / 2,
+    })
+
+def prepare_card_4_evolution(df: pd.DataFrame, max_points: int = CARD4_POINTS_PER_DAY) -> pd.DataFrame:
     """
     Generates the Running Average Time evolution over the year.
     For each puzzle on a given day (e.g., the 5th Monday), calculates
@@ -185,13 +323,42 @@ def prepare_card_4_evolution(df: pd.DataFrame) -> pd.DataFrame:
         'day_of_year', # Used for continuous X-axis plotting
         'cumulative_count', # How many of this day have been solved so far
         'average_time_min'
-    ]].copy()
+    ]].rename(columns={'cumulative_count': 'puzzle_index'})
     
+    # The output contains every puzzle for a granular chart, up to `max_points` per weekday line.
+    return _format_evolution(downsample_evolution(weekly_evolution, max_points))
+
+def downsample_evolution(weekly_evolution: pd.DataFrame, max_points: int = CARD4_POINTS_PER_DAY) -> pd.DataFrame:
+    """Caps each weekday's line at `max_points` with LTTB over (date, running average).
+
+    Every line keeps its first and last points and its fastest and slowest
+    running averages, so the chart's normalization and improvement summary are
+    unchanged. Lines already within budget (e.g. a single year) are untouched;
+    `max_points <= 0` disables downsampling.
+    """
+    if max_points <= 0:
+        return weekly_evolution
+    keep: List[np.ndarray] = []
+    positions = np.arange(len(weekly_evolution))
+    codes = weekly_evolution['Day_of_Week'].cat.codes.to_numpy()
+    x_all = weekly_evolution['print_date'].to_numpy().astype('datetime64[D]').astype(np.float64)
+    y_all = weekly_evolution['average_time_min'].to_numpy(dtype=np.float64)
+    for code in np.unique(codes):
+        day_pos = positions[(codes == code) & ~np.isnan(y_all)]
+        if len(day_pos) <= max_points:
+            keep.append(positions[codes == code])
+            continue
+        x, y = x_all[day_pos], y_all[day_pos]
+        picked = lttb_indices(x, y, max(3, max_points - 2))
+        keep.append(day_pos[np.union1d(picked, [np.argmin(y), np.argmax(y)])])
+    if not keep:
+        return weekly_evolution
+    return weekly_evolution.iloc[np.sort(np.concatenate(keep))].reset_index(drop=True)
+
+def _format_evolution(weekly_evolution: pd.DataFrame) -> pd.DataFrame:
     # Add formatted time for display
-    weekly_evolution['average_time_formatted'] = weekly_evolution['average_time_min'].apply(format_time)
-    
-    # The output should contain every puzzle for a granular chart.
-    return weekly_evolution.rename(columns={'cumulative_count': 'puzzle_index'})
+    weekly_evolution['average_time_formatted'] = format_time_array(weekly_evolution['average_time_min'])
+    return weekly_evolution
 
 def prepare_cards_5_6_outliers(df: pd.DataFrame, top_n: int = 10) -> Dict[str, pd.DataFrame]:
     """Finds the top N fastest and slowest puzzles based on Z-score, including time deviation."""
@@ -225,11 +392,11 @@ def prepare_cards_5_6_outliers(df: pd.DataFrame, top_n: int = 10) -> Dict[str, p
         ]].rename(columns={'minutesSpentSolving': 'Time_min', 'author': 'Author'})
 
         final_df['Date'] = final_df['print_date'].dt.strftime('%b %d, %Y')
-        final_df['Time_formatted'] = final_df['Time_min'].apply(format_time)
+        final_df['Time_formatted'] = format_time_array(final_df['Time_min'])
 
         # Add formatted deviation labels
         final_df['Deviation_Percent_Label'] = final_df['Deviation_Percent'].apply(lambda x: f"{x:+.1f}%")
-        final_df['Deviation_Time_Label'] = final_df['Time_Deviation_min'].apply(format_deviation_time)
+        final_df['Deviation_Time_Label'] = format_deviation_time_array(final_df['Time_Deviation_min'])
 
         # Sort by Deviation_Percent according to requested direction
         final_df = final_df.sort_values(by='Deviation_Percent', ascending=not sort_desc)
@@ -245,8 +412,186 @@ def prepare_cards_5_6_outliers(df: pd.DataFrame, top_n: int = 10) -> Dict[str, p
 
 # --- MASTER FUNCTION & EXECUTION ---
 
-def generate_all_data(file_path: str, output_prefix: str, output_dir: str = 'data_output/card_data') -> None:
-    """Runs the full data pipeline and saves all results to JSON files."""
+def build_cards(df_solved: pd.DataFrame, card4_points: int = CARD4_POINTS_PER_DAY) -> Dict[str, Any]:
+    """Full recompute: every card from the cleaned, solved DataFrame."""
+    outlier_data = timed('cards5_6_outliers', prepare_cards_5_6_outliers, df_solved, top_n=10)
+    return {
+        'card1_summary': timed('card1_summary', prepare_card_1_summary, df_solved),
+        'card2_weekly_summary': timed('card2_weekly_summary', prepare_card_2_weekly_summary, df_solved),
+        'card3_histograms': timed('card3_histograms', prepare_card_3_histograms, df_solved, num_bins=8),
+        'card4_evolution': timed('card4_evolution', prepare_card_4_evolution, df_solved, max_points=card4_points),
+        'card5_struggles': outlier_data['struggles'],
+        'card6_fast_days': outlier_data['fast_days'],
+    }
+
+def build_cards_from_state(state: AggregateState, card4_points: int = CARD4_POINTS_PER_DAY) -> Dict[str, Any]:
+    """Every card from the persisted aggregate state (see aggregates.py); matches build_cards exactly."""
+    num_bins = 8
+    histograms = state.histograms(num_bins=num_bins)
+    days = np.array([day for day, _, _ in histograms], dtype=object)
+    hist = np.array([h for _, h, _ in histograms], dtype=np.int64).reshape(len(days), num_bins)
+    edges = np.array([e for _, _, e in histograms], dtype=np.float64).reshape(len(days), num_bins + 1)
+    outlier_data = prepare_cards_5_6_outliers(state.outlier_frame(), top_n=10)
+    return {
+        'card1_summary': _summary_record(state.rows, state.gold, state.total_seconds,
+                                         pd.Timestamp(state.min_date), pd.Timestamp(state.max_date)),
+        'card2_weekly_summary': _format_weekly_summary(state.weekly_stats()),
+        'card3_histograms': histogram_frame(days, hist, edges),
+        'card4_evolution': _format_evolution(downsample_evolution(state.evolution_frame(), card4_points)),
+        'card5_struggles': outlier_data['struggles'],
+        'card6_fast_days': outlier_data['fast_days'],
+    }
+
+def _file_stamp(file_path: str) -> List[int]:
+    st = os.stat(file_path)
+    return [st.st_size, st.st_mtime_ns]
+
+def update_state(state_path: str, file_path: str, start: Optional[str] = None, end: Optional[str] = None) -> AggregateState:
+    """Loads the saved aggregate state, ingests only new solves (or rebuilds if needed) and saves it.
+
+    Only solves printed after the state's last date are loaded in full; the
+    earlier ones are checked against the state's checksum. If the table file
+    is unchanged since the last update, the state is returned as saved.
+    """
+    source = {'input': os.path.abspath(file_path), 'start': start, 'end': end}
+    stamp = _file_stamp(file_path)
+    state = AggregateState.load(state_path)
+    new_rows = None
+    if state is not None and state.source == source and state.max_date is not None:
+        if state.stamp == stamp:
+            print(f"Aggregate state is up to date ({state.rows} solved puzzles)")
+            return state
+        reason = state.history_changed(solved_rows(load_puzzle_table(file_path, start, state.max_date)))
+        if reason:
+            print(f"Rebuilding aggregate state: {reason}")
+        else:
+            after = pd.Timestamp(state.max_date) + pd.Timedelta(days=1)
+            if start:
+                after = max(after, pd.Timestamp(start))
+            new_rows = load_solved(file_path, after.strftime('%Y-%m-%d'), end)
+    if new_rows is None:
+        state = AggregateState(source)
+        state.ingest(load_solved(file_path, start, end))
+        print(f"Built aggregate state from {state.rows} solved puzzles")
+    else:
+        print(f"Ingested {state.ingest(new_rows)} new solved puzzles into the aggregate state ({state.rows} total)")
+    state.stamp = stamp
+    state.save(state_path)
+    return state
+
+def card_records(cards: Dict[str, Any]) -> Dict[str, Any]:
+    """The cards as plain JSON values: DataFrames become lists of records (pandas `to_json` conventions)."""
+    return {name: json_io.loads(data.to_json(orient='records')) if isinstance(data, pd.DataFrame) else data
+            for name, data in cards.items()}
+
+def write_cards(cards: Dict[str, Any], output_prefix: str, output_dir: str, compact: bool = False) -> None:
+    """Writes each card to `{output_dir}/{output_prefix}_{name}.json` (indented unless `compact`)."""
+    for name, data in card_records(cards).items():
+        json_io.dump_path(data, os.path.join(output_dir, f'{output_prefix}_{name}.json'), indent=not compact)
+
+def prepare_card_7_replay(cards: Dict[str, Any], store) -> Optional[Dict[str, Any]]:
+    """Replay artifact (see replay.py) for the fastest puzzle, the first row of card 6."""
+    from replay import load_replay
+    fast_days = cards['card6_fast_days']
+    if fast_days.empty:
+        return None
+    row = fast_days.iloc[0]
+    return load_replay(store, int(row['puzzle_id']), row['Date'])
+
+def prepare_card_8_cell_analytics(solved: pd.DataFrame, store) -> Optional[Dict[str, Any]]:
+    """Per-cell solve analytics (see cell_analytics.py) over every solved puzzle's completion board."""
+    from cell_analytics import cell_analytics_card
+    return cell_analytics_card(solved, store)
+
+CARD_BUNDLE_NAME = 'cards.json'
+
+def _atomic_write_bytes(path: str, data: bytes) -> None:
+    tmp = path + '.part'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def write_card_bundle(cards: Dict[str, Any], output_dir: str, name: str = CARD_BUNDLE_NAME) -> str:
+    """Writes every card into one compact JSON bundle plus `.gz` (and `.br` if brotli is installed) siblings.
+
+    The bundle is `{"version": 1, "hash": <sha256 of the cards>, "cards": {"card1": ..., ...}}`,
+    keyed like `DATA_FILES` in app.js. DataFrames are serialized exactly as in
+    the per-card files. Returns the content hash.
+    """
+    payload = {card_name.split('_', 1)[0]: data for card_name, data in card_records(cards).items()}
+    cards_json = json_io.dumpb(payload)
+    digest = hashlib.sha256(cards_json).hexdigest()
+    body = b'{"version":1,"hash":"%s","cards":%s}' % (digest.encode('ascii'), cards_json)
+
+    path = os.path.join(output_dir, name)
+    _atomic_write_bytes(path, body)
+    _atomic_write_bytes(path + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _atomic_write_bytes(path + '.br', brotli.compress(body, quality=11))
+    elif os.path.exists(path + '.br'):
+        os.remove(path + '.br')  # don't leave a stale sibling behind
+    return digest
+
+def save_all_cards(cards: Dict[str, Any], output_prefix: str, output_dir: str,
+                   completion_dir: Optional[str] = 'data_output/puzzle_completion_data', replays: int = 0,
+                   compact: bool = False, solved: Optional[pd.DataFrame] = None) -> None:
+    """Adds the Card 7 replay, then writes every card file, optional outlier replays and the bundle.
+
+    `compact` writes the per-card files without indentation; the bundle is always compact.
+    With `solved` (`puzzle_id` and `Day_of_Week` of every solved puzzle), Card 8's
+    per-cell analytics are built from the same completion store.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # Card 7: precomputed replay of the fastest puzzle; written as null when it can't be built, so neither
+    # the bundle nor the per-card file keeps a replay of a previous fastest puzzle
+    store = None
+    cards['card7_replay'] = None
+    cards['card8_cell_analytics'] = None
+    if completion_dir:
+        from completion_store import resolve_store
+        store = resolve_store(completion_dir)
+        cards['card7_replay'] = timed('card7_replay', prepare_card_7_replay, cards, store)
+        if solved is not None:
+            cards['card8_cell_analytics'] = timed('card8_cell_analytics', prepare_card_8_cell_analytics, solved, store)
+
+    # Save Data for Each Card (DataFrames are converted once, for the card files and the bundle)
+    records = timed('card_records', card_records, cards)
+    timed('write_cards', write_cards, records, output_prefix, output_dir, compact)
+    print(f"Generated Card 1 Summary (Completed: {cards['card1_summary']['total_completed']})")
+    print("Generated Card 2 Weekly Summary")
+    print("Generated Card 3 Histograms (8 Bins/Day)")
+    print(f"Generated Card 4 Time Evolution (Weekly Running Average, {len(cards['card4_evolution'])} points)")
+    print("Generated Cards 5 & 6 Outlier Puzzles (Top 10 Fastest/Slowest)")
+    if cards['card7_replay'] is not None:
+        print(f"Generated Card 7 Replay (puzzle {cards['card7_replay']['puzzle_id']})")
+    else:
+        print("Skipped Card 7 Replay (no completion data for the fastest puzzle)")
+    if cards['card8_cell_analytics'] is not None:
+        print(f"Generated Card 8 Cell Analytics ({cards['card8_cell_analytics']['puzzles']} boards)")
+    elif solved is not None:
+        print("Skipped Card 8 Cell Analytics (no completion boards with timestamps)")
+    if store is not None and replays > 0:
+        from replay import write_replays
+        rows = pd.concat([cards['card6_fast_days'].head(replays), cards['card5_struggles'].head(replays)]).to_dict('records')
+        count = timed('replays', write_replays, rows, store, os.path.join(output_dir, 'replays'))
+        print(f"Generated {count} outlier replays in {os.path.join(output_dir, 'replays')}")
+    digest = timed('card_bundle', write_card_bundle, records, output_dir)
+    print(f"Generated card bundle {CARD_BUNDLE_NAME} ({digest[:12]}, .gz{' + .br' if brotli is not None else ''})")
+
+def generate_all_data(file_path: str, output_prefix: str, output_dir: str = 'data_output/card_data',
+                      start: Optional[str] = None, end: Optional[str] = None, state_path: Optional[str] = None,
+                      card4_points: int = CARD4_POINTS_PER_DAY,
+                      completion_dir: Optional[str] = 'data_output/puzzle_completion_data', replays: int = 0,
+                      compact: bool = False) -> None:
+    """Runs the full data pipeline and saves all results to JSON files.
+
+    With `state_path`, the cards are built from a persisted aggregate state
+    that only ingests solves added since the previous run. `card4_points`
+    caps each weekday line of the evolution chart (0 keeps every puzzle).
+    The Card 7 replay and Card 8 cell analytics are built from the completions in `completion_dir`;
+    `replays` also writes replays of the top N fastest and slowest puzzles to
+    `{output_dir}/replays/`. `compact` writes the card files without indentation.
+    """
     
     # 1. Setup Output Directory
     if not os.path.exists(output_dir):
@@ -254,48 +599,53 @@ def generate_all_data(file_path: str, output_prefix: str, output_dir: str = 'dat
     
     print(f"--- Running Crossword Data Pipeline ---")
     
-    # 2. Clean and Preprocess
+    # 2. Clean and Preprocess (or update the aggregate state)
     try:
-        df_solved = clean_and_preprocess(file_path)
+        if state_path:
+            state = timed('update_state', update_state, state_path, file_path, start, end)
+            cards = timed('cards_from_state', build_cards_from_state, state, card4_points)
+            solved = state.solved_frame()
+        else:
+            solved = timed('clean_and_preprocess', clean_and_preprocess, file_path, start, end)
+            cards = build_cards(solved, card4_points)
     except FileNotFoundError:
         print(f"ERROR: File not found at {file_path}. Please check the path.")
         return
     
-    # 3. Generate Data for Each Card
-    
-    # Card 1: Summary Stats
-    summary_data = prepare_card_1_summary(df_solved)
-    with open(os.path.join(output_dir, f'{output_prefix}_card1_summary.json'), 'w') as f:
-        json.dump(summary_data, f, indent=4)
-    print(f"Generated Card 1 Summary (Completed: {summary_data['total_completed']})")
-
-    # Card 2: Weekly Summary Table
-    df_card2 = prepare_card_2_weekly_summary(df_solved)
-    df_card2.to_json(os.path.join(output_dir, f'{output_prefix}_card2_weekly_summary.json'), orient='records', indent=4)
-    print("Generated Card 2 Weekly Summary")
-
-    # Card 3: Histograms
-    df_card3 = prepare_card_3_histograms(df_solved, num_bins=8)
-    df_card3.to_json(os.path.join(output_dir, f'{output_prefix}_card3_histograms.json'), orient='records', indent=4)
-    print("Generated Card 3 Histograms (8 Bins/Day)")
-
-    # Card 4: Time Evolution
-    df_card4 = prepare_card_4_evolution(df_solved)
-    df_card4.to_json(os.path.join(output_dir, f'{output_prefix}_card4_evolution.json'), orient='records', indent=4)
-    print("Generated Card 4 Time Evolution (Weekly Running Average)")
-
-    # Cards 5 & 6: Outliers
-    outlier_data = prepare_cards_5_6_outliers(df_solved, top_n=10)
+    # 3. Card 7 replay and Card 8 cell analytics, then save data for each card and the bundle
+    save_all_cards(cards, output_prefix, output_dir, completion_dir, replays, compact, solved)
+
+    print(f"\n--- Pipeline Complete! All card JSON files saved to the '{output_dir}' folder. ---")
+
+
+def main(argv=None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the card JSON files from the flattened puzzle table")
+    parser.add_argument('-i', '--input', default='data_output/puzzle_data.npz',
+                        help="SQLite store (.db), columnar .npz table (default) or CSV export; falls back to puzzle_data.csv if the .npz is missing")
+    parser.add_argument('--from', dest='start', help="First print date to include (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', help="Last print date to include (YYYY-MM-DD)")
+    parser.add_argument('--state', help="Persisted aggregate state (e.g. data_output/cache/aggregates.json); only new solves are ingested")
+    parser.add_argument('--card4-points', type=int, default=CARD4_POINTS_PER_DAY,
+                        help=f"Max points per weekday line in the card 4 chart (default: {CARD4_POINTS_PER_DAY}; 0 keeps every puzzle)")
+    parser.add_argument('--completion-dir', default='data_output/puzzle_completion_data',
+                        help="Completion JSONs (directory or .pack) used for the Card 7 replay")
+    parser.add_argument('--replays', type=int, default=0,
+                        help="Also write replays of the top N fastest and slowest puzzles to card_data/replays/")
+    parser.add_argument('--compact', action='store_true',
+                        help="Write the card JSON files without indentation (smaller, faster)")
+    args = parser.parse_args(argv)
+
+    INPUT_FILE = args.input
+    if not os.path.exists(INPUT_FILE) and INPUT_FILE.endswith('.npz'):
+        INPUT_FILE = INPUT_FILE[:-len('.npz')] + '.csv'
+    OUTPUT_PREFIX = ''
     
-    outlier_data['struggles'].to_json(os.path.join(output_dir, f'{output_prefix}_card5_struggles.json'), orient='records', indent=4)
-    outlier_data['fast_days'].to_json(os.path.join(output_dir, f'{output_prefix}_card6_fast_days.json'), orient='records', indent=4)
-    print("Generated Cards 5 & 6 Outlier Puzzles (Top 10 Fastest/Slowest)")
-
-    print(f"\n--- Pipeline Complete! All 6 JSON files saved to the '{output_dir}' folder. ---")
+    generate_all_data(INPUT_FILE, OUTPUT_PREFIX, start=args.start, end=args.end, state_path=args.state,
+                      card4_points=args.card4_points, completion_dir=args.completion_dir, replays=args.replays,
+                      compact=args.compact)
 
 
 if __name__ == '__main__':
-    INPUT_FILE = 'data_output/puzzle_data.csv'
-    OUTPUT_PREFIX = ''
-    
-    generate_all_data(INPUT_FILE, OUTPUT_PREFIX)
\ No newline at end of file
+    main()
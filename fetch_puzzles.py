@@ -7,23 +7,49 @@ containing the NYT cookie value (either the raw value or `NYT-S=...`).
 Usage:
     python3 fetch_puzzles.py
     python3 fetch_puzzles.py -i puzzle_data.json -c subscription_header.txt -o puzzle_completion_data --force
+    python3 fetch_puzzles.py --only solved      # skip puzzles the metadata says were never solved
+    python3 fetch_puzzles.py --refresh-stale    # refetch unfinished or changed puzzles only
 
 Notes:
  - The script reads `puzzle_data.json` (or custom -i) and iterates `results`.
- - For each object with a `puzzle_id`, it calls curl:
-     curl 'https://www.nytimes.com/svc/crosswords/v6/game/{id}.json' -H 'accept: application/json' --cookie 'NYT-S={cookie}'
- - Output files are written to the output directory as `{puzzle_id}.json`.
+ - For each object with a `puzzle_id`, it requests
+     https://www.nytimes.com/svc/crosswords/v6/game/{id}.json
+   with the `NYT-S` cookie. Requests go through a small pool of keep-alive
+   connections (see `nyt_http.py`) and run on `--concurrency` worker threads.
+   A shared rate controller starts at one request per `--delay` seconds, backs
+   off on 429/5xx (honouring `Retry-After`) and ramps back up as requests succeed.
+ - Output files are written to the output directory as `{puzzle_id}.json`, or
+   with `--pack` into one compressed archive `{out_dir}.pack` with an id ->
+   offset index (see `completion_store.py`).
+ - `{out_dir}/manifest.json` records, per puzzle, when it was fetched, the
+   sha256 of the saved body, the metadata's `percent_filled`/`solved` at that
+   time and any `ETag`/`Last-Modified` validators. `--refresh-stale` uses it to
+   refetch only puzzles that were unfinished when fetched or whose metadata has
+   changed since; those requests are conditional, so unchanged games cost a 304.
+ - With `--db PATH`, the metadata and each fetched game's solve fields are
+   also upserted into the SQLite store (see `puzzle_store.py`); puzzles that
+   were fetched before the store existed are backfilled from disk.
 """
 from __future__ import annotations
 
 import argparse
-import json
+import hashlib
 import os
-import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any
+from typing import Dict, Optional
+
+from completion_store import PACK_SUFFIX, DirectoryStore, PackStore, Store
+import json_io
+from nyt_http import BASE_URL_ENV, DEFAULT_BASE_URL, ConnectionPool, RateController, get_with_retries, resolve_base_url
+from puzzle_store import PuzzleStore
+from results_io import iter_results
+
+GAME_PATH = "/svc/crosswords/v6/game/{puzzle_id}.json"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
 
 
 def load_cookie(cookie_file: Path) -> str:
@@ -36,68 +62,185 @@ def load_cookie(cookie_file: Path) -> str:
     return raw if raw.startswith("NYT-S=") else f"NYT-S={raw}"
 
 
-def load_puzzle_ids(json_path: Path) -> list[int]:
-    with json_path.open("r", encoding="utf-8") as fh:
-        data = json.load(fh)
-    results = data.get("results") if isinstance(data, dict) else None
-    if not isinstance(results, list):
-        # try to find results nested
-        def find_results(obj: Any):
-            if isinstance(obj, dict):
-                for k, v in obj.items():
-                    if k == "results" and isinstance(v, list):
-                        return v
-                    r = find_results(v)
-                    if r:
-                        return r
-            elif isinstance(obj, list):
-                for el in obj:
-                    r = find_results(el)
-                    if r:
-                        return r
-            return None
-
-        results = find_results(data) or []
-
-    ids: list[int] = []
-    for el in results:
+SELECTION_MODES = ("all", "started", "solved")
+
+
+def is_selected(record: dict, only: str = "all") -> bool:
+    """Decide from a puzzle's metadata whether its game JSON is worth fetching.
+
+    `solved` keeps puzzles the metadata marks as solved (what the data pipeline
+    uses), `started` also keeps any puzzle with some squares filled, and `all`
+    keeps everything.
+    """
+    if only == "all":
+        return True
+    solved = record.get("solved") is True
+    if only == "solved":
+        return solved
+    try:
+        filled = float(record.get("percent_filled") or 0)
+    except (TypeError, ValueError):
+        filled = 0
+    return solved or filled > 0
+
+
+def load_puzzle_records(json_path: Path, only: str = "all") -> list[dict]:
+    """Return the selected metadata records (each with an int `puzzle_id`).
+
+    Accepts both `puzzle_data.json` and the streaming `puzzle_data.ndjson` format.
+    """
+    records: list[dict] = []
+    for el in iter_results(json_path):
         if isinstance(el, dict) and "puzzle_id" in el:
+            if not is_selected(el, only):
+                continue
             try:
-                ids.append(int(el["puzzle_id"]))
+                records.append(dict(el, puzzle_id=int(el["puzzle_id"])))
             except Exception:
                 continue
-    return ids
-
-
-def fetch_one(puzzle_id: int, cookie: str, out_path: Path, timeout: int = 60) -> None:
-    url = f"https://www.nytimes.com/svc/crosswords/v6/game/{puzzle_id}.json"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    # Use curl to match requested call
-    cmd = [
-        "curl",
-        url,
-        "-H",
-        "accept: application/json",
-        "--cookie",
-        cookie,
-        "-sS",
-        "-o",
-        str(out_path),
-    ]
+    return records
+
+
+def load_puzzle_ids(json_path: Path, only: str = "all") -> list[int]:
+    return [r["puzzle_id"] for r in load_puzzle_records(json_path, only=only)]
+
+
+# --- FETCH MANIFEST ---
+
+def load_manifest(out_dir: Path) -> Dict[str, dict]:
+    """Return the per-puzzle manifest entries keyed by str(puzzle_id)."""
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        data = json_io.load_path(path)
+    except Exception as e:
+        print(f"Warning: ignoring unreadable manifest {path}: {e}")
+        return {}
+    puzzles = data.get("puzzles") if isinstance(data, dict) else None
+    return puzzles if isinstance(puzzles, dict) else {}
+
+
+def save_manifest(out_dir: Path, entries: Dict[str, dict]) -> None:
+    """Write the manifest, leaving the file (and its mtime) alone if the content is unchanged."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / MANIFEST_NAME
+    data = json_io.dumpb({"version": MANIFEST_VERSION, "puzzles": entries}, sort_keys=True)
+    try:
+        if path.read_bytes() == data:
+            return
+    except OSError:
+        pass
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _metadata_state(record: dict) -> tuple:
     try:
-        subprocess.run(cmd, check=True, timeout=timeout)
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"curl failed for {puzzle_id}: {e}")
+        filled = float(record.get("percent_filled") or 0)
+    except (TypeError, ValueError):
+        filled = 0.0
+    return filled, record.get("solved") is True
 
 
-def main() -> None:
+def manifest_entry_from_body(body: Optional[bytes], fetched_at: float) -> Optional[dict]:
+    """Seed a manifest entry for a puzzle fetched before the manifest existed."""
+    try:
+        calcs = json_io.loads(body).get("calcs") or {}
+    except Exception:
+        return None
+    return {
+        "fetched_at": fetched_at,
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "percent_filled": calcs.get("percentFilled"),
+        "solved": calcs.get("solved") is True,
+    }
+
+
+def needs_refresh(record: dict, entry: Optional[dict], present: bool) -> bool:
+    """True if the puzzle is missing, was unfinished when fetched, or its metadata changed since."""
+    if entry is None or not present:
+        return True
+    fetched_filled, fetched_solved = _metadata_state(entry)
+    if not fetched_solved or fetched_filled < 100:
+        return True
+    return _metadata_state(record) != (fetched_filled, fetched_solved)
+
+
+def fetch_one(puzzle_id: int, cookie: str, out_path: Path, timeout: int = 60, pool: ConnectionPool | None = None,
+              validators: Optional[dict] = None, controller: Optional[RateController] = None, retries: int = 3,
+              store: Optional[Store] = None, base_url: Optional[str] = None) -> dict:
+    """Fetch one game JSON and write it to `out_path` (or into `store`, e.g. a `PackStore`).
+
+    When `pool` is given its keep-alive connections are reused; otherwise a
+    throwaway pool to `base_url` is created for this single request. `validators` (a
+    manifest entry's `etag`/`last_modified`) turn the request into a
+    conditional GET; on 304 the existing file is left untouched. 429/5xx
+    responses are retried up to `retries` attempts through `controller`.
+
+    Returns `{"status", "sha256", "etag", "last_modified"}` for the manifest.
+    """
+    headers = {"Accept": "application/json", "Cookie": cookie}
+    present = store.has(puzzle_id) if store is not None else out_path.exists()
+    if validators and present:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ConnectionPool(resolve_base_url(base_url), max_size=1, timeout=timeout)
+    try:
+        resp = get_with_retries(pool, GAME_PATH.format(puzzle_id=puzzle_id), headers=headers,
+                                controller=controller, retries=retries)
+    finally:
+        if own_pool:
+            pool.close()
+
+    info = {
+        "status": resp.status,
+        "etag": resp.headers.get("etag") or (validators or {}).get("etag"),
+        "last_modified": resp.headers.get("last-modified") or (validators or {}).get("last_modified"),
+    }
+    if resp.status == 304:
+        info["sha256"] = (validators or {}).get("sha256")
+        return info
+    if not resp.ok:
+        raise RuntimeError(f"HTTP {resp.status} for {puzzle_id}")
+
+    if store is not None:
+        store.put(puzzle_id, resp.body)
+    else:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temp file first so an interrupted run never leaves a truncated JSON behind
+        tmp_path = out_path.with_name(out_path.name + ".part")
+        tmp_path.write_bytes(resp.body)
+        os.replace(tmp_path, out_path)
+    info["sha256"] = hashlib.sha256(resp.body).hexdigest()
+    return info
+
+
+def main(argv=None) -> None:
     p = argparse.ArgumentParser(description="Fetch NYT puzzle completion JSONs for puzzle_ids in a JSON file")
-    p.add_argument("-i", "--input", default="data_output/puzzle_data.json", help="Input JSON file containing `results`")
+    p.add_argument("-i", "--input", default="data_output/puzzle_data.json", help="Input JSON file containing `results` (or NDJSON, one record per line)")
     p.add_argument("-c", "--cookie-file", default="subscription_header.txt", help="File containing NYT cookie value (or full NYT-S=...)")
     p.add_argument("-o", "--out-dir", default="data_output/puzzle_completion_data", help="Directory to save fetched puzzle JSONs")
-    p.add_argument("--delay", type=float, default=0.3, help="Delay in seconds between requests")
+    p.add_argument("--delay", type=float, default=0.3, help="Initial spacing between requests in seconds; adapts to 429/5xx responses (default: 0.3)")
+    p.add_argument("--max-rate", type=float, default=10.0, help="Upper bound on requests per second (default: 10)")
+    p.add_argument("--concurrency", type=int, default=4, help="Maximum number of concurrent requests (default: 4)")
+    p.add_argument("--retries", type=int, default=3, help="Number of attempts per request (default: 3)")
     p.add_argument("--force", action="store_true", help="Overwrite existing files")
-    args = p.parse_args()
+    p.add_argument("--refresh-stale", action="store_true",
+                   help="Refetch puzzles that were unfinished when fetched or whose metadata changed since (uses manifest.json)")
+    p.add_argument("--pack", action="store_true",
+                   help="Store completions in a single compressed archive `{out-dir}.pack` (+ .idx) instead of one file each")
+    p.add_argument("--only", choices=SELECTION_MODES, default="all",
+                   help="Which puzzles to fetch based on the metadata: all, started (any squares filled) or solved (default: all)")
+    p.add_argument("--db", help="Also upsert metadata and solve fields into this SQLite store (see puzzle_store.py)")
+    p.add_argument("--base-url", help=f"Service to fetch from, e.g. a local standin_server.py (default: ${BASE_URL_ENV} or {DEFAULT_BASE_URL})")
+    args = p.parse_args(argv)
 
     inp = Path(args.input)
     cookie_file = Path(args.cookie_file)
@@ -113,25 +256,111 @@ def main() -> None:
         print(f"Error reading cookie: {e}")
         sys.exit(1)
 
-    ids = load_puzzle_ids(inp)
-    if not ids:
-        print("No puzzle_ids found in input JSON")
+    records = load_puzzle_records(inp, only=args.only)
+    if not records:
+        print(f"No puzzle_ids found in input JSON (selection: {args.only})")
         sys.exit(0)
 
-    print(f"Found {len(ids)} puzzle_ids — saving to {out_dir}")
+    print(f"Found {len(records)} puzzle_ids (selection: {args.only}) — saving to {out_dir}")
+
+    store: Store = PackStore(out_dir.with_name(out_dir.name + PACK_SUFFIX)) if args.pack else DirectoryStore(out_dir)
+    where = store.path
 
-    for i, pid in enumerate(ids, start=1):
-        out_path = out_dir / f"{pid}.json"
-        if out_path.exists() and not args.force:
-            print(f"[{i}/{len(ids)}] Skipping {pid} (exists) -> {out_path}")
+    db = PuzzleStore(args.db) if args.db else None
+    db_solves = set()
+    if db is not None:
+        db.upsert_puzzles(records)
+        db_solves = db.solve_ids()
+
+    manifest = load_manifest(out_dir)
+    todo: list[dict] = []
+    for i, rec in enumerate(records, start=1):
+        pid = rec["puzzle_id"]
+        present = store.has(pid)
+        entry = manifest.get(str(pid))
+        if entry is None and present:
+            fetched_at = store.file_path(pid).stat().st_mtime if isinstance(store, DirectoryStore) else time.time()
+            entry = manifest_entry_from_body(store.get(pid), fetched_at)
+            if entry is not None:
+                manifest[str(pid)] = entry
+        if db is not None and present and pid not in db_solves:
+            db.upsert_solve_body(pid, store.get(pid), sha256=(entry or {}).get("sha256"))
+        if args.force:
+            todo.append(rec)
+        elif args.refresh_stale:
+            if needs_refresh(rec, entry, present):
+                todo.append(rec)
+            else:
+                print(f"[{i}/{len(records)}] Skipping {pid} (up to date) -> {where}")
+        elif present:
+            print(f"[{i}/{len(records)}] Skipping {pid} (exists) -> {where}")
         else:
-            print(f"[{i}/{len(ids)}] Fetching {pid} -> {out_path}")
+            todo.append(rec)
+
+    if not todo:
+        save_manifest(out_dir, manifest)
+        store.close()
+        if db is not None:
+            db.close()
+        return
+
+    concurrency = max(1, args.concurrency)
+    print(f"Fetching {len(todo)} puzzles with {concurrency} worker(s)...")
+
+    controller = RateController(rate=1.0 / args.delay if args.delay > 0 else args.max_rate, max_rate=args.max_rate,
+                                concurrency=concurrency)
+
+    def _work(rec: dict) -> dict:
+        pid = rec["puzzle_id"]
+        validators = None if args.force else manifest.get(str(pid))
+        return fetch_one(pid, cookie, out_dir / f"{pid}.json", pool=pool, validators=validators,
+                         controller=controller, retries=args.retries, store=store)
+
+    failures = 0
+    not_modified = 0
+    with ConnectionPool(resolve_base_url(args.base_url), max_size=concurrency) as pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(_work, rec): rec for rec in todo}
+        for i, fut in enumerate(as_completed(futures), start=1):
+            rec = futures[fut]
+            pid = rec["puzzle_id"]
             try:
-                fetch_one(pid, cookie, out_path)
-                time.sleep(args.delay)
+                info = fut.result()
             except Exception as e:
-                print(f"  ERROR fetching {pid}: {e}")
-        # time.sleep(args.delay)
+                failures += 1
+                print(f"[{i}/{len(todo)}]  ERROR fetching {pid}: {e}")
+                continue
+            filled, solved = _metadata_state(rec)
+            manifest[str(pid)] = {
+                "fetched_at": time.time(),
+                "sha256": info.get("sha256"),
+                "percent_filled": filled,
+                "solved": solved,
+                "etag": info.get("etag"),
+                "last_modified": info.get("last_modified"),
+            }
+            if info["status"] == 304:
+                not_modified += 1
+                print(f"[{i}/{len(todo)}] Unchanged {pid} (304)")
+            else:
+                print(f"[{i}/{len(todo)}] Fetched {pid} -> {where}")
+                if db is not None:
+                    db.upsert_solve_body(pid, store.get(pid), sha256=info.get("sha256"))
+            if i % 50 == 0:
+                store.flush()
+                save_manifest(out_dir, manifest)
+
+    store.close()
+    save_manifest(out_dir, manifest)
+    if db is not None:
+        counts = db.counts()
+        db.close()
+        print(f"{args.db}: {counts['puzzles']} puzzles, {counts['solves']} solves")
+    print(f"Requests: {controller.summary()}")
+    if not_modified:
+        print(f"{not_modified} of {len(todo)} puzzles were unchanged on the server")
+    if failures:
+        print(f"{failures} of {len(todo)} fetches failed")
 
 
 if __name__ == "__main__":
@@ -2,20 +2,44 @@
 """Flatten 'results' objects in a JSON file and write them to CSV.
 
 Usage:
+    python3 flatten_results_to_csv.py -i puzzle_data.json -o puzzle_data.npz --csv puzzle_data.csv
     python3 flatten_results_to_csv.py -i puzzle_data.json -o puzzle_data.csv
+    python3 flatten_results_to_csv.py -i puzzle_data.ndjson -o puzzle_data.csv
+    python3 flatten_results_to_csv.py --fields seconds,cells,timestamps,assists --workers 8
 
 The script searches the JSON for any `results` key. If `results` is a list,
 each element becomes a row; if it's a dict, it's treated as a single row.
-Nested objects are flattened with dot-separated keys.
+Nested objects are flattened with dot-separated keys. NDJSON input (as
+written by `build_puzzle_data.py --format ndjson`) is read line by line, each
+line being one row.
+
+Rows are augmented from the per-puzzle completion JSONs. Each completion is
+parsed once, on a process pool (`--workers`), and every field group selected
+with `--fields` is pulled in that same pass:
+  seconds     secondsSpentSolving
+  cells       cellsFilled, cellsTotal (non-blank board cells)
+  timestamps  firstCellTimestamp, lastCellTimestamp
+  assists     cellsChecked, cellsRevealed, usedCheck, usedReveal
+
+An `.npz` output path writes the typed columnar table from `columnar.py`
+(categorical author/star/Day_of_Week, int32 seconds, datetime print_date),
+which `data_pipeline.py` loads column-selectively; CSV remains available as
+`-o something.csv` or as an extra export with `--csv`.
 """
 import argparse
-import json
 import csv
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
+from completion_store import DirectoryStore, Store, open_store, resolve_store
+import json_io
+from run_metrics import section
+from results_io import is_ndjson, iter_ndjson
+
 
 def flatten_dict(d: Dict[str, Any], parent_key: str = "", sep: str = ".") -> Dict[str, Any]:
     items: Dict[str, Any] = {}
@@ -26,7 +50,7 @@ def flatten_dict(d: Dict[str, Any], parent_key: str = "", sep: str = ".") -> Dic
         else:
             # For lists or other non-primitive types, store JSON string
             if isinstance(v, (list, tuple)):
-                items[new_key] = json.dumps(v, ensure_ascii=False)
+                items[new_key] = json_io.dumps(v)
             else:
                 items[new_key] = v
     return items
@@ -72,17 +96,8 @@ def _find_key_recursive(obj: Any, target: str) -> Optional[Any]:
     return None
 
 
-def extract_seconds_from_completion(puzzle_id: Any, completion_dir: Path) -> Optional[int]:
-    if puzzle_id is None:
-        return None
-    path = completion_dir / f"{puzzle_id}.json"
-    if not path.exists():
-        return None
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return None
-
+def seconds_from_completion_data(data: Any) -> Optional[int]:
+    """Pull `secondsSpentSolving` out of an already-parsed completion JSON."""
     calcs = None
     # prefer top-level calcs
     if isinstance(data, dict) and "calcs" in data:
@@ -124,6 +139,130 @@ def extract_seconds_from_completion(puzzle_id: Any, completion_dir: Path) -> Opt
     return None
 
 
+def extract_seconds_from_completion(puzzle_id: Any, completion_dir: Union[Path, Store]) -> Optional[int]:
+    """`completion_dir` is a directory of `{puzzle_id}.json` files or an open completion store."""
+    if puzzle_id is None:
+        return None
+    store = DirectoryStore(completion_dir) if isinstance(completion_dir, Path) else completion_dir
+    body = store.get(puzzle_id)
+    if body is None:
+        return None
+    try:
+        data = json_io.loads(body)
+    except Exception:
+        return None
+    return seconds_from_completion_data(data)
+
+
+# --- MULTI-FIELD EXTRACTION ---
+
+# Field groups selectable with --fields, and the CSV columns each one adds.
+EXTRACT_FIELDS: Dict[str, List[str]] = {
+    "seconds": ["secondsSpentSolving"],
+    "cells": ["cellsFilled", "cellsTotal"],
+    "timestamps": ["firstCellTimestamp", "lastCellTimestamp"],
+    "assists": ["cellsChecked", "cellsRevealed", "usedCheck", "usedReveal"],
+}
+
+
+def extract_completion_fields(data: Any, fields: List[str]) -> Dict[str, Any]:
+    """Extract the requested field groups from one parsed completion JSON in a single pass."""
+    out: Dict[str, Any] = {}
+    if "seconds" in fields:
+        out["secondsSpentSolving"] = seconds_from_completion_data(data)
+
+    if not any(f in fields for f in ("cells", "timestamps", "assists")):
+        return out
+
+    board = data.get("board") if isinstance(data, dict) else None
+    cells = board.get("cells") if isinstance(board, dict) else None
+    if not isinstance(cells, list):
+        cells = []
+
+    total = filled = checked = revealed = 0
+    first_ts = last_ts = None
+    for c in cells:
+        if not isinstance(c, dict) or c.get("blank"):
+            continue
+        total += 1
+        if c.get("guess"):
+            filled += 1
+        ts = c.get("timestamp")
+        if isinstance(ts, (int, float)):
+            if first_ts is None or ts < first_ts:
+                first_ts = ts
+            if last_ts is None or ts > last_ts:
+                last_ts = ts
+        if c.get("checked"):
+            checked += 1
+        if c.get("revealed"):
+            revealed += 1
+
+    if "cells" in fields:
+        out["cellsFilled"] = filled if cells else None
+        out["cellsTotal"] = total if cells else None
+    if "timestamps" in fields:
+        out["firstCellTimestamp"] = first_ts
+        out["lastCellTimestamp"] = last_ts
+    if "assists" in fields:
+        firsts = data.get("firsts") if isinstance(data, dict) else None
+        firsts = firsts if isinstance(firsts, dict) else {}
+        out["cellsChecked"] = checked if cells else None
+        out["cellsRevealed"] = revealed if cells else None
+        out["usedCheck"] = bool(checked or firsts.get("checked"))
+        out["usedReveal"] = bool(revealed or firsts.get("revealed"))
+    return out
+
+
+# Each worker process opens the completion store once (see _init_extract_worker).
+_worker_store: Optional[Store] = None
+
+
+def _init_extract_worker(store_path: str) -> None:
+    global _worker_store
+    _worker_store = open_store(store_path)
+
+
+def _extract_body(body: Optional[bytes], fields: List[str]) -> Optional[Dict[str, Any]]:
+    if body is None:
+        return None
+    try:
+        data = json_io.loads(body)
+    except Exception:
+        return None
+    return extract_completion_fields(data, fields)
+
+
+def _extract_one(job: Tuple[str, List[str]]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    pid, fields = job
+    return pid, _extract_body(_worker_store.get(pid), fields)
+
+
+def extract_all(puzzle_ids: List[Any], store: Store, fields: List[str], workers: int = 0,
+                chunksize: int = 32) -> Dict[str, Dict[str, Any]]:
+    """Extract `fields` for every puzzle id, reading each completion exactly once.
+
+    With more than one worker the files are parsed on a process pool, so large
+    multi-year runs scale with cores; `workers=0` uses every CPU.
+    """
+    ids = list(dict.fromkeys(str(pid) for pid in puzzle_ids if pid is not None and pid != ""))
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(ids) < chunksize * 2:
+        # not worth the process start-up cost: read through the caller's store
+        pairs = ((pid, _extract_body(store.get(pid), fields)) for pid in ids)
+        return {pid: vals for pid, vals in pairs if vals is not None}
+
+    jobs = [(pid, fields) for pid in ids]
+    store.flush()
+    results: Dict[str, Dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_extract_worker,
+                             initargs=(str(store.path),)) as executor:
+        for pid, vals in executor.map(_extract_one, jobs, chunksize=chunksize):
+            if vals is not None:
+                results[pid] = vals
+    return results
+
+
 def write_csv(rows: List[Dict[str, Any]], out_path: str) -> None:
     if not rows:
         print("No rows to write.")
@@ -139,17 +278,33 @@ def write_csv(rows: List[Dict[str, Any]], out_path: str) -> None:
     print(f"Wrote {len(rows)} rows to {out_path}")
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Flatten 'results' in JSON to CSV")
-    p.add_argument("-i", "--input", default="data_output/puzzle_data.json", help="Input JSON file path")
-    p.add_argument("-o", "--output", default="data_output/puzzle_data.csv", help="Output CSV path")
+    p.add_argument("-i", "--input", default="data_output/puzzle_data.json", help="Input JSON (or NDJSON) file path")
+    p.add_argument("-o", "--output", default="data_output/puzzle_data.npz",
+                   help="Output path: .npz writes the typed columnar table, anything else CSV (default: data_output/puzzle_data.npz)")
+    p.add_argument("--csv", help="Also export the rows as CSV to this path")
     p.add_argument("-k", "--key", default="results", help="Key name to search for (default: results)")
-    p.add_argument("--completion-dir", default="data_output/puzzle_completion_data", help="Directory with per-puzzle completion JSONs")
-    args = p.parse_args()
+    p.add_argument("--completion-dir", default="data_output/puzzle_completion_data",
+                   help="Directory with per-puzzle completion JSONs, or a .pack archive (a sibling `{dir}.pack` is preferred when present)")
+    p.add_argument("--fields", default="seconds",
+                   help=f"Comma-separated completion fields to extract: {', '.join(EXTRACT_FIELDS)} (default: seconds)")
+    p.add_argument("--workers", type=int, default=0, help="Extractor processes (default: one per CPU)")
+    args = p.parse_args(argv)
+
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in EXTRACT_FIELDS]
+    if unknown:
+        print(f"Unknown --fields: {', '.join(unknown)} (choose from {', '.join(EXTRACT_FIELDS)})")
+        sys.exit(1)
 
     try:
-        with open(args.input, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
+        with section("read_metadata"):
+            if is_ndjson(Path(args.input)):
+                # streaming format: every line is already one `results` element
+                data = {args.key: list(iter_ndjson(Path(args.input)))}
+            else:
+                data = json_io.load_path(args.input)
     except Exception as e:
         print(f"Error reading JSON file: {e}")
         sys.exit(1)
@@ -186,13 +341,18 @@ def main():
 
         rows = [flatten_dict(n) for n in raw_nodes]
 
-        # augment rows with secondsSpentSolving from completion files
-        completion_dir = Path(args.completion_dir)
+        # augment rows with fields from completion files, one pass per file
+        # (a packed `{completion-dir}.pack` archive is used when present)
+        store = resolve_store(args.completion_dir)
+        with section("extract_completions"):
+            extracted = extract_all([r.get("puzzle_id") for r in rows], store, fields, workers=args.workers)
+        columns = [c for f in fields for c in EXTRACT_FIELDS[f]]
         for r in rows:
-            pid = r.get("puzzle_id")
-            seconds = extract_seconds_from_completion(pid, completion_dir)
-            # store as integer if found, else blank
-            r["secondsSpentSolving"] = seconds if seconds is not None else ""
+            vals = extracted.get(str(r.get("puzzle_id")), {})
+            for col in columns:
+                # store the value if found, else blank
+                v = vals.get(col)
+                r[col] = v if v is not None else ""
 
         # add Day column derived from print_date (e.g., Monday, Tuesday)
         for r in rows:
@@ -205,7 +365,14 @@ def main():
                     day = ""
             r["Day"] = day
 
-        write_csv(rows, args.output)
+        with section("write_table"):
+            if args.output.endswith(".npz"):
+                from columnar import write_columnar
+                write_columnar(rows, args.output)
+            else:
+                write_csv(rows, args.output)
+            if args.csv:
+                write_csv(rows, args.csv)
 
 
 if __name__ == "__main__":
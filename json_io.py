@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""JSON parsing and serialization shared by every script.
+
+Uses `orjson` when it is installed (`pip install orjson`) and the standard
+library `json` module otherwise; `XWORD_JSON=json` forces the standard library
+(e.g. to compare the two with `benchmarks/bench_json.py`). The active backend
+is `BACKEND`.
+
+  loads(data)                      parse str or bytes
+  load_path(path)                  parse a file (read as bytes, no decode step)
+  dumpb(obj, indent=..., ...)      serialize to UTF-8 bytes
+  dumps(obj, indent=..., ...)      serialize to str
+  dump_path(obj, path, ...)        serialize to a file
+
+Output is compact (no whitespace) by default; `indent=True` pretty-prints
+with two-space indentation, which is the only indent orjson supports, so
+both backends produce the same layout. Non-ASCII text is written as UTF-8
+rather than escaped. numpy scalars/arrays and dates are serialized by both
+backends; NaN is written as `null` by orjson and as `NaN` by the stdlib.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+BACKEND_ENV = "XWORD_JSON"
+
+Data = Union[str, bytes, bytearray, memoryview]
+
+
+def _default(obj: Any) -> Any:
+    """Types neither backend serializes natively: numpy values and anything with `tolist`/`isoformat`."""
+    if hasattr(obj, "tolist"):  # numpy scalars and arrays
+        return obj.tolist()
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _std_loads(data: Data) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _std_dumpb(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    return json.dumps(obj, indent=2 if indent else None, separators=None if indent else (",", ":"),
+                      sort_keys=sort_keys, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def _orjson_dumpb(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    try:
+        return orjson.dumps(obj, default=_default, option=option)
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits, which only the stdlib writes
+        return _std_dumpb(obj, indent=indent, sort_keys=sort_keys)
+
+
+# name -> (loads, dumpb)
+BACKENDS: Dict[str, Tuple[Callable[[Data], Any], Callable[..., bytes]]] = {"json": (_std_loads, _std_dumpb)}
+if orjson is not None:
+    BACKENDS["orjson"] = (orjson.loads, _orjson_dumpb)
+
+BACKEND = os.environ.get(BACKEND_ENV) or ("orjson" if orjson is not None else "json")
+if BACKEND not in BACKENDS:
+    BACKEND = "json"
+loads, dumpb = BACKENDS[BACKEND]
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    return dumpb(obj, indent=indent, sort_keys=sort_keys).decode("utf-8")
+
+
+def load_path(path: Union[str, Path]) -> Any:
+    return loads(Path(path).read_bytes())
+
+
+def dump_path(obj: Any, path: Union[str, Path], indent: bool = False, sort_keys: bool = False) -> None:
+    Path(path).write_bytes(dumpb(obj, indent=indent, sort_keys=sort_keys))
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""Small keep-alive HTTP client shared by the NYT fetch scripts.
+
+`ConnectionPool` keeps a handful of persistent `http.client` connections to a
+single host so that many requests (one per puzzle, one per month) reuse the
+same TCP/TLS session instead of paying a fresh handshake each time. It is
+thread-safe: worker threads borrow a connection, issue one request and hand it
+back.
+
+`RateController` is the shared throttle for all NYT requests: it backs off on
+429/5xx (honouring `Retry-After`) and ramps rate and concurrency back up
+additively as requests succeed, and records each request's latency.
+`get_with_retries` ties the two together.
+
+The base URL defaults to the live site; `resolve_base_url` lets a `--base-url`
+flag or the `NYT_BASE_URL` environment variable point the scripts at a local
+stand-in (`standin_server.py`) instead.
+
+Only the standard library is used so the scripts keep working without extra
+dependencies.
+"""
+from __future__ import annotations
+
+import http.client
+import os
+import queue
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from run_metrics import observe_request
+
+DEFAULT_BASE_URL = "https://www.nytimes.com"
+BASE_URL_ENV = "NYT_BASE_URL"
+
+def resolve_base_url(base_url: Optional[str] = None) -> str:
+    """`base_url` if given, else `$NYT_BASE_URL`, else the live NYT site."""
+    return base_url or os.environ.get(BASE_URL_ENV) or DEFAULT_BASE_URL
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank `q`-th percentile (0-100) of `values`; None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[min(len(ordered), int(rank)) - 1]
+
+
+# Errors that mean a kept-alive connection was closed under us; the request is
+# retried once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class Response:
+    """A fully-read HTTP response."""
+
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def __repr__(self) -> str:
+        return f"Response(status={self.status}, bytes={len(self.body)})"
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive connections to one scheme://host[:port].
+
+    At most `max_size` idle connections are kept; callers beyond that simply
+    open an extra connection which is closed after use.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, max_size: int = 4, timeout: float = 30,
+                 headers: Optional[Dict[str, str]] = None):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported base URL: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=max(1, max_size))
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused)."""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            closed = self._closed
+        if closed:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def get(self, path: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Issue a GET for `path` (relative to the base URL) and read the whole body."""
+        url = f"{self.prefix}{path}"
+        hdrs = dict(self.headers)
+        if headers:
+            hdrs.update(headers)
+
+        conn, reused = self._acquire()
+        try:
+            try:
+                conn.request("GET", url, headers=hdrs)
+                resp = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # server dropped an idle keep-alive connection; retry once
+                conn.close()
+                conn = self._new_connection()
+                conn.request("GET", url, headers=hdrs)
+                resp = conn.getresponse()
+            body = resp.read()
+        except Exception:
+            conn.close()
+            raise
+
+        result = Response(resp.status, {k.lower(): v for k, v in resp.getheaders()}, body)
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# --- ADAPTIVE RATE CONTROL ---
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait according to a `Retry-After` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+def is_retryable_status(status: int) -> bool:
+    return status == 429 or 500 <= status < 600
+
+
+def is_success_status(status: int) -> bool:
+    return 200 <= status < 300 or status == 304
+
+
+class RateController:
+    """Shared AIMD throttle for requests to one service.
+
+    Callers wrap each request in `acquire()` / `release(...)`. The controller
+    enforces both a request rate (minimum spacing between request starts) and
+    a concurrency limit. A 429 halves both (`decrease`) and, if the server sent
+    `Retry-After`, holds every caller until that time has passed; 5xx and
+    network errors cut them more gently (`error_decrease`). Each success (2xx
+    or 304) then adds `rate_step` req/s back, and one concurrency slot per
+    `concurrency_limit` consecutive successes, up to the configured maxima.
+    Any other status (401/403/404, ...) is counted in `client_errors` and
+    leaves the rate alone: it says nothing about how fast the server can go.
+    The round-trip time of every attempt passed to `release` is kept in
+    `latencies`.
+    """
+
+    def __init__(self, rate: float = 2.0, max_rate: float = 20.0, min_rate: float = 0.1,
+                 concurrency: int = 4, rate_step: float = 0.5, decrease: float = 0.5, error_decrease: float = 0.75):
+        self.rate = max(min_rate, min(rate, max_rate))
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.max_concurrency = max(1, concurrency)
+        self.concurrency_limit = self.max_concurrency
+        self.rate_step = rate_step
+        self.decrease = decrease
+        self.error_decrease = error_decrease
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self.network_errors = 0
+        self.client_errors = 0
+        self.retries = 0
+        self.latencies: List[float] = []
+        self._streak = 0
+        self._next_start = 0.0
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a concurrency slot is free and the rate allows another request."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait_for = max(self._blocked_until, self._next_start) - now
+                if self.in_flight < self.concurrency_limit and wait_for <= 0:
+                    break
+                self._cond.wait(timeout=wait_for if wait_for > 0 else None)
+            self.in_flight += 1
+            self.requests += 1
+            self._next_start = max(now, self._next_start) + 1.0 / self.rate
+
+    def release(self, status: Optional[int] = None, retry_after: Optional[float] = None,
+                latency: Optional[float] = None) -> None:
+        """Record the outcome of a request; `status=None` means a network error."""
+        with self._cond:
+            self.in_flight -= 1
+            if latency is not None:
+                self.latencies.append(latency)
+            if status is not None and is_success_status(status):
+                self.successes += 1
+                self._streak += 1
+                self.rate = min(self.max_rate, self.rate + self.rate_step)
+                if self._streak >= self.concurrency_limit and self.concurrency_limit < self.max_concurrency:
+                    self.concurrency_limit += 1
+                    self._streak = 0
+            elif status is not None and not is_retryable_status(status):
+                self.client_errors += 1
+            else:
+                if status == 429:
+                    self.throttled += 1
+                elif status is None:
+                    self.network_errors += 1
+                else:
+                    self.server_errors += 1
+                self._streak = 0
+                factor = self.decrease if status == 429 else self.error_decrease
+                self.rate = max(self.min_rate, self.rate * factor)
+                self.concurrency_limit = max(1, int(self.concurrency_limit * factor))
+                if retry_after:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds a caller should wait before retry number `attempt` (1-based)."""
+        with self._cond:
+            self.retries += 1
+        if retry_after is not None:
+            return retry_after
+        return min(30.0, 2 ** (attempt - 1))
+
+    def snapshot(self) -> dict:
+        """Current rate/concurrency and error counters."""
+        with self._cond:
+            return {
+                "rate": round(self.rate, 3),
+                "concurrency_limit": self.concurrency_limit,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "successes": self.successes,
+                "throttled": self.throttled,
+                "server_errors": self.server_errors,
+                "network_errors": self.network_errors,
+                "client_errors": self.client_errors,
+                "retries": self.retries,
+                "latency_p50": percentile(self.latencies, 50),
+                "latency_p99": percentile(self.latencies, 99),
+            }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        text = (f"{s['requests']} requests, {s['successes']} ok, {s['throttled']} throttled (429), "
+                f"{s['server_errors']} server errors, {s['network_errors']} network errors, "
+                f"{s['client_errors']} client errors (4xx), "
+                f"{s['retries']} retries; final rate {s['rate']} req/s, concurrency {s['concurrency_limit']}")
+        if s["latency_p50"] is not None:
+            text += f"; latency p50 {s['latency_p50'] * 1000:.0f} ms, p99 {s['latency_p99'] * 1000:.0f} ms"
+        return text
+
+
+def get_with_retries(pool: ConnectionPool, path: str, headers: Optional[Dict[str, str]] = None,
+                     controller: Optional[RateController] = None, retries: int = 3) -> Response:
+    """GET through `controller`, retrying 429/5xx and network errors up to `retries` attempts.
+
+    Returns the last response (which may still be a 429/5xx once attempts are
+    exhausted) or re-raises the last network error.
+    """
+    controller = controller or RateController()
+    attempts = max(1, retries)
+    for attempt in range(1, attempts + 1):
+        controller.acquire()
+        start = time.perf_counter()
+        try:
+            resp = pool.get(path, headers=headers)
+        except (http.client.HTTPException, OSError):
+            latency = time.perf_counter() - start
+            controller.release(None, latency=latency)
+            observe_request(latency, None)
+            if attempt == attempts:
+                raise
+            time.sleep(controller.backoff(attempt))
+            continue
+        retry_after = parse_retry_after(resp.headers.get("retry-after"))
+        latency = time.perf_counter() - start
+        controller.release(resp.status, retry_after, latency=latency)
+        observe_request(latency, resp.status)
+        if not is_retryable_status(resp.status) or attempt == attempts:
+            return resp
+        time.sleep(controller.backoff(attempt, retry_after))
+    raise AssertionError("unreachable")
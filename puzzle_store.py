@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""SQLite-backed local store for puzzle metadata and solve data.
+
+One indexed database replaces rebuilding every view from `puzzle_data.json`,
+the completion directory and the flattened table on each run:
+
+  puzzles  one row per puzzle_id (metadata from the puzzles.json listing),
+           indexed on print_date, day_of_week and author
+  solves   one row per fetched completion (fields pulled by
+           `flatten_results_to_csv.extract_completion_fields`)
+
+`build_puzzle_data.py --db` and `fetch_puzzles.py --db` upsert into it as data
+arrives; unchanged rows are left alone, so adding one new day writes one row.
+`data_pipeline.py -i data_output/puzzles.db` reads it back with a date-range
+query.
+
+Usage:
+    python3 puzzle_store.py import -i data_output/puzzle_data.json --completion-dir data_output/puzzle_completion_data
+    python3 puzzle_store.py stats
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import json_io
+
+DEFAULT_DB = "data_output/puzzles.db"
+DAY_ORDER = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+PUZZLE_COLUMNS = ["puzzle_id", "print_date", "day_of_week", "author", "editor", "title", "publish_type",
+                  "format_type", "star", "solved", "percent_filled", "version"]
+SOLVE_COLUMNS = ["puzzle_id", "seconds_spent_solving", "cells_filled", "cells_total", "first_cell_ts", "last_cell_ts",
+                 "cells_checked", "cells_revealed", "used_check", "used_reveal", "sha256", "fetched_at"]
+
+# completion field (flatten_results_to_csv.EXTRACT_FIELDS) -> solves column
+SOLVE_FIELD_MAP = {
+    "secondsSpentSolving": "seconds_spent_solving",
+    "cellsFilled": "cells_filled",
+    "cellsTotal": "cells_total",
+    "firstCellTimestamp": "first_cell_ts",
+    "lastCellTimestamp": "last_cell_ts",
+    "cellsChecked": "cells_checked",
+    "cellsRevealed": "cells_revealed",
+    "usedCheck": "used_check",
+    "usedReveal": "used_reveal",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    puzzle_id      INTEGER PRIMARY KEY,
+    print_date     TEXT NOT NULL,
+    day_of_week    TEXT,
+    author         TEXT,
+    editor         TEXT,
+    title          TEXT,
+    publish_type   TEXT,
+    format_type    TEXT,
+    star           TEXT,
+    solved         INTEGER,
+    percent_filled REAL,
+    version        INTEGER,
+    updated_at     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_puzzles_print_date ON puzzles(print_date);
+CREATE INDEX IF NOT EXISTS idx_puzzles_day_of_week ON puzzles(day_of_week, print_date);
+CREATE INDEX IF NOT EXISTS idx_puzzles_author ON puzzles(author);
+
+CREATE TABLE IF NOT EXISTS solves (
+    puzzle_id             INTEGER PRIMARY KEY REFERENCES puzzles(puzzle_id),
+    seconds_spent_solving INTEGER,
+    cells_filled          INTEGER,
+    cells_total           INTEGER,
+    first_cell_ts         INTEGER,
+    last_cell_ts          INTEGER,
+    cells_checked         INTEGER,
+    cells_revealed        INTEGER,
+    used_check            INTEGER,
+    used_reveal           INTEGER,
+    sha256                TEXT,
+    fetched_at            REAL
+);
+"""
+
+
+def _upsert_sql(table: str, columns: List[str], touched: Optional[str] = None) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE that only writes when some column actually changed."""
+    keyed = [c for c in columns if c != "puzzle_id"]
+    compared = [c for c in keyed if c not in ("fetched_at",)]
+    assignments = [f"{c} = excluded.{c}" for c in keyed]
+    if touched:
+        assignments.append(f"{touched} = excluded.{touched}")
+        columns = columns + [touched]
+    changed = " OR ".join(f"{table}.{c} IS NOT excluded.{c}" for c in compared)
+    placeholders = ", ".join("?" for _ in columns)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(puzzle_id) DO UPDATE SET {', '.join(assignments)} WHERE {changed}")
+
+
+def _day_of_week(print_date: Any) -> Optional[str]:
+    try:
+        return DAY_ORDER[date.fromisoformat(str(print_date)[:10]).weekday()]
+    except ValueError:
+        return None
+
+
+def _as_int(v: Any) -> Optional[int]:
+    if v is None or v == "":
+        return None
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return None
+
+
+class PuzzleStore:
+    """Thin wrapper around one SQLite connection (use from a single thread)."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._puzzle_sql = _upsert_sql("puzzles", PUZZLE_COLUMNS, touched="updated_at")
+        self._solve_sql = _upsert_sql("solves", SOLVE_COLUMNS)
+
+    # --- writes ---
+
+    def upsert_puzzles(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Upsert listing records; returns the number of rows inserted or changed."""
+        now = time.time()
+        rows = []
+        for r in records:
+            pid = _as_int(r.get("puzzle_id"))
+            if pid is None or not r.get("print_date"):
+                continue
+            filled = r.get("percent_filled")
+            rows.append((
+                pid, str(r["print_date"])[:10], _day_of_week(r["print_date"]), r.get("author"), r.get("editor"),
+                r.get("title"), r.get("publish_type"), r.get("format_type"), r.get("star"),
+                1 if r.get("solved") is True or str(r.get("solved")).lower() == "true" else 0,
+                float(filled) if filled not in (None, "") else None, _as_int(r.get("version")), now,
+            ))
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(self._puzzle_sql, rows)
+        return self.conn.total_changes - before
+
+    def upsert_solve(self, puzzle_id: Any, fields: Dict[str, Any], sha256: Optional[str] = None,
+                     fetched_at: Optional[float] = None) -> int:
+        """Upsert one solve from extracted completion fields; returns 1 if a row was written."""
+        values: Dict[str, Any] = {col: None for col in SOLVE_COLUMNS}
+        values["puzzle_id"] = int(puzzle_id)
+        for field, col in SOLVE_FIELD_MAP.items():
+            v = fields.get(field)
+            values[col] = int(v) if isinstance(v, bool) else _as_int(v)
+        values["sha256"] = sha256
+        values["fetched_at"] = time.time() if fetched_at is None else fetched_at
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.execute(self._solve_sql, [values[c] for c in SOLVE_COLUMNS])
+        return self.conn.total_changes - before
+
+    def upsert_solve_body(self, puzzle_id: Any, body: Optional[bytes], sha256: Optional[str] = None) -> int:
+        """Extract the solve fields from a raw completion body and upsert them."""
+        from flatten_results_to_csv import EXTRACT_FIELDS, extract_completion_fields
+
+        if not body:
+            return 0
+        try:
+            data = json_io.loads(body)
+        except ValueError:
+            return 0
+        return self.upsert_solve(puzzle_id, extract_completion_fields(data, list(EXTRACT_FIELDS)), sha256=sha256)
+
+    # --- reads ---
+
+    def solve_ids(self) -> set:
+        return {row[0] for row in self.conn.execute("SELECT puzzle_id FROM solves")}
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "puzzles": self.conn.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0],
+            "solves": self.conn.execute("SELECT COUNT(*) FROM solves").fetchone()[0],
+        }
+
+    def date_range(self) -> tuple:
+        return self.conn.execute("SELECT MIN(print_date), MAX(print_date) FROM puzzles").fetchone()
+
+    def table_query(self, start: Optional[str] = None, end: Optional[str] = None):
+        """SQL + params joining puzzles and solves, with the pipeline's column names."""
+        where, params = [], []
+        if start:
+            where.append("p.print_date >= ?")
+            params.append(start)
+        if end:
+            where.append("p.print_date <= ?")
+            params.append(end)
+        sql = (
+            "SELECT p.puzzle_id AS puzzle_id, p.print_date AS print_date, p.day_of_week AS Day_of_Week, "
+            "p.author AS author, p.star AS star, p.solved AS solved, p.percent_filled AS percent_filled, "
+            "s.seconds_spent_solving AS secondsSpentSolving "
+            "FROM puzzles p LEFT JOIN solves s ON s.puzzle_id = p.puzzle_id"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql + " ORDER BY p.print_date", params
+
+    def load_frame(self, start: Optional[str] = None, end: Optional[str] = None):
+        """Puzzles joined with solves in [start, end] (YYYY-MM-DD) as a typed DataFrame."""
+        import pandas as pd
+
+        sql, params = self.table_query(start, end)
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        df["solved"] = df["solved"].astype(bool)
+        df["print_date"] = pd.to_datetime(df["print_date"])
+        df["Day_of_Week"] = pd.Categorical(df["Day_of_Week"], categories=DAY_ORDER, ordered=True)
+        for col in ("author", "star"):
+            df[col] = df[col].astype("category")
+        return df
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PuzzleStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def import_all(db: PuzzleStore, metadata_path: Path, completion_dir: str) -> tuple:
+    """Backfill the store from a metadata file and a completion store; returns (puzzles, solves) written."""
+    from completion_store import resolve_store
+    from flatten_results_to_csv import EXTRACT_FIELDS, extract_all
+    from results_io import iter_results
+
+    records = list(iter_results(metadata_path))
+    written_puzzles = db.upsert_puzzles(records)
+    store = resolve_store(completion_dir)
+    extracted = extract_all([r.get("puzzle_id") for r in records], store, list(EXTRACT_FIELDS))
+    written_solves = sum(db.upsert_solve(pid, vals) for pid, vals in extracted.items())
+    return written_puzzles, written_solves
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Manage the SQLite puzzle/solve store")
+    p.add_argument("command", choices=["import", "stats"])
+    p.add_argument("--db", default=DEFAULT_DB, help=f"SQLite database path (default: {DEFAULT_DB})")
+    p.add_argument("-i", "--input", default="data_output/puzzle_data.json", help="Metadata JSON/NDJSON to import")
+    p.add_argument("--completion-dir", default="data_output/puzzle_completion_data", help="Completion directory or .pack archive")
+    args = p.parse_args(argv)
+
+    with PuzzleStore(args.db) as db:
+        if args.command == "import":
+            puzzles, solves = import_all(db, Path(args.input), args.completion_dir)
+            print(f"Upserted {puzzles} puzzle rows and {solves} solve rows into {args.db}")
+        counts = db.counts()
+        lo, hi = db.date_range()
+        print(f"{args.db}: {counts['puzzles']} puzzles, {counts['solves']} solves ({lo} .. {hi})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Compact crossword replay artifacts for Card 7.
+
+Instead of shipping a puzzle's full game JSON to the browser and sorting its
+cells there, the pipeline precomputes everything the replay needs:
+
+  rows, cols     grid size
+  blank          base64 of the blank-cell bitmask (np.packbits, MSB first)
+  guesses        one character per cell (' ' for blank/empty); multi-letter
+                 rebus guesses go in `rebus` as {cell index: text}
+  order          base64 little-endian uint16: fillable cells in fill order
+  offsets        base64 little-endian uint16: each ordered cell's fill time,
+                 normalized to 0..65535 over the solve
+  curve_t/_pct   base64 little-endian uint16 completion curve: normalized time
+                 and percent complete in basis points (0..10000), starting at 0%
+
+Non-blank cells without a timestamp are not in `order` and are shown from the
+start, as before.
+"""
+from __future__ import annotations
+
+import base64
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import json_io
+
+REPLAY_VERSION = 1
+OFFSET_SCALE = 65535
+
+
+def _pack_u16(values) -> str:
+    return base64.b64encode(np.asarray(values, dtype="<u2").tobytes()).decode("ascii")
+
+
+def build_replay(puzzle_id: Any, data: Dict[str, Any], date_label: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Replay artifact for one parsed completion JSON, or None if it has no board."""
+    from flatten_results_to_csv import seconds_from_completion_data
+
+    board = data.get("board") if isinstance(data, dict) else None
+    cells = board.get("cells") if isinstance(board, dict) else None
+    if not isinstance(cells, list) or not cells:
+        return None
+
+    n = len(cells)
+    size = math.isqrt(n)
+    rows, cols = (size, size) if size * size == n else (1, n)
+
+    blank = np.zeros(n, dtype=bool)
+    guesses: List[str] = []
+    rebus: Dict[str, str] = {}
+    timed_idx: List[int] = []
+    timed_ts: List[float] = []
+    for i, c in enumerate(cells):
+        c = c if isinstance(c, dict) else {}
+        blank[i] = bool(c.get("blank"))
+        guess = "" if blank[i] else str(c.get("guess") or "")
+        if len(guess) > 1:
+            rebus[str(i)] = guess
+            guess = guess[0]
+        guesses.append(guess or " ")
+        ts = c.get("timestamp")
+        if not blank[i] and isinstance(ts, (int, float)):
+            timed_idx.append(i)
+            timed_ts.append(ts)
+
+    ts = np.asarray(timed_ts, dtype=np.float64)
+    order = np.asarray(timed_idx, dtype=np.int64)[np.argsort(ts, kind="stable")]
+    ts = np.sort(ts, kind="stable")
+    span = float(ts[-1] - ts[0]) if len(ts) else 0.0
+    offsets = np.rint((ts - ts[0]) / span * OFFSET_SCALE) if span > 0 else np.zeros(len(ts))
+
+    # Completion curve: 0% at the first fill, then one step per filled cell
+    curve_t = np.concatenate(([0], offsets))
+    curve_pct = np.rint(np.concatenate(([0], np.arange(1, len(ts) + 1) / max(1, len(ts)) * 10000)))
+
+    return {
+        "version": REPLAY_VERSION,
+        "puzzle_id": int(puzzle_id),
+        "date": date_label,
+        "seconds": seconds_from_completion_data(data),
+        "rows": rows,
+        "cols": cols,
+        "blank": base64.b64encode(np.packbits(blank).tobytes()).decode("ascii"),
+        "guesses": "".join(guesses),
+        "rebus": rebus,
+        "order": _pack_u16(order),
+        "offsets": _pack_u16(offsets),
+        "curve_t": _pack_u16(curve_t),
+        "curve_pct": _pack_u16(curve_pct),
+    }
+
+
+def load_replay(store, puzzle_id: Any, date_label: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Build the replay for `puzzle_id` from a completion store (see completion_store.py)."""
+    body = store.get(puzzle_id)
+    if body is None:
+        return None
+    try:
+        data = json_io.loads(body)
+    except ValueError:
+        return None
+    return build_replay(puzzle_id, data, date_label)
+
+
+def write_replays(rows: List[Dict[str, Any]], store, out_dir: str) -> int:
+    """Write `{out_dir}/{puzzle_id}.json` for each card row (needs `puzzle_id`, `Date`); returns the count."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    for row in rows:
+        replay = load_replay(store, row["puzzle_id"], row.get("Date"))
+        if replay is None:
+            continue
+        json_io.dump_path(replay, os.path.join(out_dir, f"{row['puzzle_id']}.json"))
+        written += 1
+    return written
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Read puzzle metadata written by `build_puzzle_data.py` in either format.
+
+- JSON:   `{ "results": [ ... ] }` (the `results` list may be nested)
+- NDJSON: one puzzle record per line (`.ndjson` / `.jsonl`), as written by
+          `build_puzzle_data.py --format ndjson`. Lines are parsed one at a
+          time so the whole file never has to be held in memory.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import json_io
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def is_ndjson(path: Path) -> bool:
+    return Path(path).suffix.lower() in NDJSON_SUFFIXES
+
+
+def find_results(obj: Any) -> Optional[list]:
+    """Return the first `results` list found anywhere in `obj`."""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k == "results" and isinstance(v, list):
+                return v
+            r = find_results(v)
+            if r:
+                return r
+    elif isinstance(obj, list):
+        for el in obj:
+            r = find_results(el)
+            if r:
+                return r
+    return None
+
+
+def iter_ndjson(path: Path) -> Iterator[dict]:
+    """Yield each JSON object line of an NDJSON file, skipping blank or truncated lines."""
+    with Path(path).open("r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json_io.loads(line)
+            except ValueError:
+                print(f"Warning: skipping unparseable line {lineno} in {path}")
+                continue
+            if isinstance(obj, dict):
+                yield obj
+
+
+def iter_results(path: Path) -> Iterator[dict]:
+    """Yield the puzzle records from a JSON or NDJSON metadata file."""
+    if is_ndjson(path):
+        yield from iter_ndjson(path)
+        return
+    data = json_io.load_path(path)
+    results = data.get("results") if isinstance(data, dict) else None
+    if not isinstance(results, list):
+        results = find_results(data) or []
+    for el in results:
+        if isinstance(el, dict):
+            yield el
@@ -10,8 +10,16 @@ This script runs, in order:
   3. flatten_results_to_csv.py
   4. data_pipeline.py
 
-Then it starts a static HTTP server serving `data_output/` on the provided port
-and (by default) opens a web browser to http://localhost:PORT/
+Stages run in-process via stage_runner.py. The flatten and pipeline stages are
+skipped when their inputs (and source files) are unchanged since the last run;
+`--rerun` runs them anyway. `--profile` records per-stage wall/CPU time, peak
+memory, bytes read/written and request latencies in
+data_output/cache/run_report.json (see run_metrics.py); `--profile-stage NAME`
+also saves cProfile stats for that stage.
+
+Then it starts a static HTTP server (static_server.py, in-process) serving
+`data_output/` on the provided port and (by default) opens a web browser to
+http://localhost:PORT/
 
 Options allow skipping steps or passing through a few common args.
 """
@@ -19,100 +27,210 @@ from __future__ import annotations
 
 import argparse
 import os
-import subprocess
 import sys
 import time
 import signal
 import webbrowser
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-PY = sys.executable or "python3"
-ROOT = Path(__file__).parent.resolve()
-DATA_OUTPUT = ROOT / "data_output"
+from run_metrics import DEFAULT_REPORT, RunMetrics, activate, current
+from stage_runner import Stage, StageRunner
 
+STAGE_NAMES = ["build", "fetch", "flatten", "pipeline", "stream"]
 
-def run_cmd(cmd: List[str], check: bool = True) -> int:
-    print(f"\n>>> Running: {' '.join(cmd)}")
-    proc = subprocess.run(cmd)
-    if check and proc.returncode != 0:
-        raise RuntimeError(f"Command failed: {' '.join(cmd)} (exit {proc.returncode})")
-    return proc.returncode
+ROOT = Path(__file__).parent.resolve()
+DATA_OUTPUT = ROOT / "data_output"
 
 
 class ServerHandle:
+    """In-process threaded static server for DATA_OUTPUT (see static_server.py)."""
+
     def __init__(self, port: int):
         self.port = port
-        self.proc = None
+        self.server = None
+        self.thread = None
 
     def start(self):
-        # Start the server in DATA_OUTPUT directory
+        from static_server import start_in_thread
+
         if not DATA_OUTPUT.exists():
             raise FileNotFoundError(f"data_output directory not found: {DATA_OUTPUT}")
-        cmd = [PY, "-m", "http.server", str(self.port)]
         print(f"Starting HTTP server in {DATA_OUTPUT} on port {self.port}...")
-        self.proc = subprocess.Popen(cmd, cwd=str(DATA_OUTPUT))
-        time.sleep(0.5)
-        if self.proc.poll() is not None:
-            raise RuntimeError("Failed starting HTTP server")
-        print(f"Server started (pid {self.proc.pid})")
+        try:
+            self.server, self.thread = start_in_thread(DATA_OUTPUT, port=self.port)
+        except OSError as e:
+            raise RuntimeError(f"Failed starting HTTP server: {e}")
+        print("Server started")
+
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
 
     def stop(self):
-        if self.proc and self.proc.poll() is None:
+        if self.running():
             print("Stopping server...")
-            self.proc.terminate()
-            try:
-                self.proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self.proc.kill()
-                self.proc.wait(timeout=5)
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join(timeout=5)
             print("Server stopped.")
 
 
+def _sources(*modules: str) -> List[str]:
+    """Source files a stage depends on, so editing the code reruns it."""
+    return [str(ROOT / f"{m}.py") for m in modules]
+
+
+def _write_report(metrics: Optional[RunMetrics], path: str) -> None:
+    if metrics is None or current() is None:
+        return
+    activate(None)
+    report = metrics.write(path)
+    print("\n" + "\n".join(metrics.summary_lines()))
+    print(f"Wrote run report to {report}")
+
+
 def main(argv=None):
     p = argparse.ArgumentParser(description="Run full pipeline and optionally serve the app")
     p.add_argument("--no-build", action="store_true", help="Skip build_puzzle_data.py")
     p.add_argument("--no-fetch", action="store_true", help="Skip fetch_puzzles.py")
     p.add_argument("--no-flatten", action="store_true", help="Skip flatten_results_to_csv.py")
     p.add_argument("--no-pipeline", action="store_true", help="Skip data_pipeline.py")
+    p.add_argument("--csv", action="store_true", help="Also export data_output/puzzle_data.csv from the flatten step")
     p.add_argument("--no-browser", action="store_true", help="Don't open a web browser")
     p.add_argument("--force-fetch", action="store_true", help="Pass --force to fetch_puzzles.py")
+    p.add_argument("--refresh-stale", action="store_true", help="Pass --refresh-stale to fetch_puzzles.py (refetch unfinished/changed puzzles)")
+    p.add_argument("--pack", action="store_true", help="Pass --pack to fetch_puzzles.py (store completions in one compressed archive)")
+    p.add_argument("--fetch-only", choices=["all", "started", "solved"], default="solved",
+                   help="Pass --only to fetch_puzzles.py (default: solved, the only puzzles the pipeline uses)")
     p.add_argument("--port", type=int, default=8000, help="Port to serve on (default: 8000)")
     p.add_argument("--build-year", type=int, help="Year to pass to build_puzzle_data.py (optional)")
+    p.add_argument("--ndjson", action="store_true", help="Stream puzzle metadata to data_output/puzzle_data.ndjson (resumable) instead of puzzle_data.json")
+    p.add_argument("--refresh-cache", action="store_true", help="Pass --refresh-cache to build_puzzle_data.py (ignore cached month listings)")
+    p.add_argument("--build-from", help="First month YYYY-MM to pass to build_puzzle_data.py as --from (optional)")
+    p.add_argument("--build-to", help="Last month YYYY-MM to pass to build_puzzle_data.py as --to (optional)")
+    p.add_argument("--db", action="store_true",
+                   help="Upsert into data_output/puzzles.db during build/fetch and run the pipeline from it (skips the flatten step unless --csv)")
+    p.add_argument("--stream", action="store_true",
+                   help="Run fetch, extract and aggregate concurrently with stream_pipeline.py instead of the fetch/flatten/pipeline steps")
+    p.add_argument("--rerun", action="store_true",
+                   help="Run every stage even if its inputs are unchanged since the last run")
+    p.add_argument("--subprocess", action="store_true",
+                   help="Run each stage in its own Python process instead of in-process")
+    p.add_argument("--base-url", help="Fetch from this service instead of the NYT site (e.g. a local standin_server.py)")
+    p.add_argument("--profile", action="store_true",
+                   help=f"Record per-stage time, memory, I/O and request latency metrics in {DEFAULT_REPORT}")
+    p.add_argument("--report", default=DEFAULT_REPORT, help=f"Where --profile writes its report (default: {DEFAULT_REPORT})")
+    p.add_argument("--profile-stage", choices=STAGE_NAMES,
+                   help="Also run this stage under cProfile (stats saved to data_output/cache/profile_{stage}.prof/.txt)")
+    p.add_argument("--compact-json", action="store_true",
+                   help="Pass --compact to build_puzzle_data.py and the card writers (JSON without indentation)")
+    p.add_argument("--incremental", action="store_true",
+                   help="Pass --state data_output/cache/aggregates.json to data_pipeline.py (only ingest new solves)")
     args = p.parse_args(argv)
+    if args.stream and args.incremental:
+        # the stream aggregates from scratch on every run and has no saved state to update
+        p.error("--incremental cannot be combined with --stream")
+
+    metadata = "data_output/puzzle_data.ndjson" if args.ndjson else "data_output/puzzle_data.json"
+    db_path = "data_output/puzzles.db"
+
+    completion_dir = "data_output/puzzle_completion_data"
+    completion_inputs = [completion_dir, completion_dir + ".pack", completion_dir + ".pack.idx"]
+    metrics = RunMetrics() if args.profile else None
+    activate(metrics)
+    runner = StageRunner(force=args.rerun, in_process=not args.subprocess, metrics=metrics,
+                         profile_stage=args.profile_stage)
 
     try:
         # 1. build_puzzle_data.py
         if not args.no_build:
-            cmd = [PY, str(ROOT / "build_puzzle_data.py")]
+            argv = ["-o", Path(metadata).name]
             if args.build_year:
-                cmd += ["-y", str(args.build_year)]
-            run_cmd(cmd)
+                argv += ["-y", str(args.build_year)]
+            if args.build_from:
+                argv += ["--from", args.build_from]
+            if args.build_to:
+                argv += ["--to", args.build_to]
+            if args.refresh_cache:
+                argv.append("--refresh-cache")
+            if args.db:
+                argv += ["--db", db_path]
+            if args.base_url:
+                argv += ["--base-url", args.base_url]
+            if args.compact_json:
+                argv.append("--compact")
+            runner.run(Stage("build", "build_puzzle_data", argv, outputs=[metadata], always=True))
         else:
             print("Skipping build step")
 
-        # 2. fetch_puzzles.py
-        if not args.no_fetch:
-            cmd = [PY, str(ROOT / "fetch_puzzles.py"), "-i", "data_output/puzzle_data.json"]
+        # 2-4. stream_pipeline.py: fetch, extract and aggregate concurrently
+        if args.stream:
+            argv = ["-i", metadata, "--only", args.fetch_only]
             if args.force_fetch:
-                cmd.append("--force")
-            run_cmd(cmd)
+                argv.append("--force")
+            elif args.refresh_stale:
+                argv.append("--refresh-stale")
+            if args.pack:
+                argv.append("--pack")
+            if args.base_url:
+                argv += ["--base-url", args.base_url]
+            if args.compact_json:
+                argv.append("--compact")
+            runner.run(Stage("stream", "stream_pipeline", argv, inputs=[metadata],
+                             outputs=["data_output/card_data"], always=True))
         else:
-            print("Skipping fetch step")
+            # 2. fetch_puzzles.py
+            if not args.no_fetch:
+                argv = ["-i", metadata, "--only", args.fetch_only]
+                if args.force_fetch:
+                    argv.append("--force")
+                elif args.refresh_stale:
+                    argv.append("--refresh-stale")
+                if args.pack:
+                    argv.append("--pack")
+                if args.db:
+                    argv += ["--db", db_path]
+                if args.base_url:
+                    argv += ["--base-url", args.base_url]
+                runner.run(Stage("fetch", "fetch_puzzles", argv, inputs=[metadata], outputs=completion_inputs, always=True))
+            else:
+                print("Skipping fetch step")
 
-        # 3. flatten_results_to_csv.py
-        if not args.no_flatten:
-            cmd = [PY, str(ROOT / "flatten_results_to_csv.py"), "-i", "data_output/puzzle_data.json", "-o", "data_output/puzzle_data.csv"]
-            run_cmd(cmd)
-        else:
-            print("Skipping flatten step")
+            # 3. flatten_results_to_csv.py
+            if args.db and not args.csv:
+                print(f"Skipping flatten step (pipeline reads {db_path})")
+            elif not args.no_flatten:
+                argv = ["-i", metadata, "-o", "data_output/puzzle_data.npz"]
+                outputs = ["data_output/puzzle_data.npz"]
+                if args.csv:
+                    argv += ["--csv", "data_output/puzzle_data.csv"]
+                    outputs.append("data_output/puzzle_data.csv")
+                runner.run(Stage("flatten", "flatten_results_to_csv", argv,
+                                 inputs=[metadata, *completion_inputs, *_sources("flatten_results_to_csv", "columnar",
+                                                                                  "completion_store", "results_io", "json_io")],
+                                 outputs=outputs))
+            else:
+                print("Skipping flatten step")
 
-        # 4. data_pipeline.py
-        if not args.no_pipeline:
-            cmd = [PY, str(ROOT / "data_pipeline.py")]
-            run_cmd(cmd)
-        else:
-            print("Skipping data pipeline step")
+            # 4. data_pipeline.py
+            if not args.no_pipeline:
+                argv = []
+                table = db_path if args.db else "data_output/puzzle_data.npz"
+                if args.db:
+                    argv += ["-i", db_path]
+                if args.incremental:
+                    argv += ["--state", "data_output/cache/aggregates.json"]
+                if args.compact_json:
+                    argv.append("--compact")
+                runner.run(Stage("pipeline", "data_pipeline", argv,
+                                 inputs=[table, *([db_path + "-wal"] if args.db else []), *completion_inputs,
+                                         *_sources("data_pipeline", "aggregates", "replay", "columnar", "puzzle_store",
+                                                   "json_io", "cell_analytics")],
+                                 outputs=["data_output/card_data"]))
+            else:
+                print("Skipping data pipeline step")
+
+        _write_report(metrics, args.report)
 
         # Start server
         server = ServerHandle(args.port)
@@ -138,14 +256,13 @@ def main(argv=None):
         signal.signal(signal.SIGTERM, _sigint)
 
         # Block while server is running
-        while True:
-            if server.proc.poll() is not None:
-                print("Server exited")
-                break
+        while server.running():
             time.sleep(0.5)
+        print("Server exited")
 
     except Exception as e:
         print(f"ERROR: {e}")
+        _write_report(metrics, args.report)
         sys.exit(1)
 
 
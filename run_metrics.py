@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Per-stage metrics for `run_all.py --profile`.
+
+A `RunMetrics` collector records, for every stage the `StageRunner` runs:
+
+  wall_s / cpu_s     wall-clock and CPU time (all threads, plus any child
+                     processes waited for during the stage, e.g. the flatten
+                     extractor pool)
+  peak_rss_mb        the stage's own peak resident set size (Linux resets the
+                     high-water mark at each stage start via
+                     /proc/self/clear_refs; elsewhere it is the process peak so
+                     far, marked `"peak_rss_scope": "process"`)
+  read/written bytes bytes passed through read/write syscalls of this process
+                     (/proc/self/io, Linux only; worker processes not included)
+  http               a latency histogram of every NYT request attempt, by
+                     status, with p50/p90/p99
+  sections           the same figures for named steps inside the stage, e.g.
+                     each card in `data_pipeline.build_cards`
+
+Stages run with `--subprocess` only get wall/CPU time, parent-side I/O and
+the largest child peak RSS so far (`"peak_rss_scope": "children"`). `write()` saves everything as JSON (`data_output/cache/run_report.json`).
+
+Library code reports through the module-level hooks `section`, `timed` and
+`observe_request`, which do nothing unless a collector is active, so the
+scripts behave the same when run on their own.
+"""
+from __future__ import annotations
+
+import contextlib
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import json_io
+
+DEFAULT_REPORT = "data_output/cache/run_report.json"
+REPORT_VERSION = 1
+
+# Upper bounds (ms) of the request latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current: Optional["RunMetrics"] = None
+
+
+def _read_hwm_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            m = re.search(r"^VmHWM:\s+(\d+)", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(m.group(1)) if m else None
+
+
+def _reset_hwm() -> bool:
+    """Reset this process's peak RSS (Linux >= 4.0); False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _maxrss_mb(who) -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _io_bytes() -> Dict[str, int]:
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {}
+    return {"read": int(fields["rchar"]), "written": int(fields["wchar"])}
+
+
+def _usage() -> Dict[str, Any]:
+    if resource is not None:
+        own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    else:
+        cpu = time.process_time()
+    return {"wall": time.perf_counter(), "cpu": cpu, "io": _io_bytes()}
+
+
+def _mb(value: Optional[int]) -> str:
+    return "-" if value is None else f"{value / (1024 * 1024):.1f}"
+
+
+def _delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    io_before, io_after = before["io"], after["io"]
+    return {
+        "wall_s": round(after["wall"] - before["wall"], 4),
+        "cpu_s": round(after["cpu"] - before["cpu"], 4),
+        "read_bytes": io_after["read"] - io_before["read"] if io_before and io_after else None,
+        "written_bytes": io_after["written"] - io_before["written"] if io_before and io_after else None,
+    }
+
+
+class LatencyHistogram:
+    """Request latencies in fixed buckets, with counts per status (`"error"` for network errors)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.statuses: Dict[str, int] = {}
+        self.samples: List[float] = []
+
+    def observe(self, seconds: float, status: Optional[int]) -> None:
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound), len(LATENCY_BUCKETS_MS))
+        self.counts[index] += 1
+        key = "error" if status is None else str(status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        self.samples.append(ms)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        from nyt_http import percentile  # nyt_http reports here, so import it lazily
+
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        bounds: List[Any] = list(LATENCY_BUCKETS_MS) + ["inf"]
+        return {
+            "requests": len(ordered),
+            "statuses": self.statuses,
+            "p50_ms": round(percentile(ordered, 50), 2),
+            "p90_ms": round(percentile(ordered, 90), 2),
+            "p99_ms": round(percentile(ordered, 99), 2),
+            "max_ms": round(ordered[-1], 2),
+            "buckets": [{"le_ms": b, "count": c} for b, c in zip(bounds, self.counts)],
+        }
+
+
+class RunMetrics:
+    """Collects stage and section metrics for one run."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages: List[Dict[str, Any]] = []
+        self._stage: Optional[Dict[str, Any]] = None
+        self._http: Optional[LatencyHistogram] = None
+        self._stage_peak_kb = 0
+        self._lock = threading.Lock()
+
+    def _fold_peak(self, reset: bool) -> Optional[int]:
+        """Fold the current high-water mark into the stage peak; returns it (KB) before any reset."""
+        hwm = _read_hwm_kb()
+        if hwm is None:
+            return None
+        self._stage_peak_kb = max(self._stage_peak_kb, hwm)
+        if reset:
+            _reset_hwm()
+        return hwm
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **info: Any) -> Iterator[Dict[str, Any]]:
+        """Measure one stage; `info` (module, argv, ...) is stored with it."""
+        record: Dict[str, Any] = {"name": name, "status": "ran", **info, "sections": []}
+        self._stage, self._http = record, LatencyHistogram()
+        self._stage_peak_kb = 0
+        scoped = _reset_hwm() and _read_hwm_kb() is not None
+        before = _usage()
+        try:
+            yield record
+        except BaseException:
+            record["status"] = "failed"
+            raise
+        finally:
+            after = _usage()
+            self._fold_peak(reset=False)
+            record.update(_delta(before, after))
+            children_peak = _maxrss_mb(resource.RUSAGE_CHILDREN) if resource is not None else None
+            if info.get("in_process") is False:
+                # the stage was its own process: its peak is the largest child's so far
+                record["peak_rss_mb"] = children_peak
+                record["peak_rss_scope"] = "children"
+            elif scoped:
+                record["peak_rss_mb"] = round(self._stage_peak_kb / 1024, 1)
+                record["peak_rss_scope"] = "stage"
+            else:
+                record["peak_rss_mb"] = _maxrss_mb(resource.RUSAGE_SELF) if resource is not None else None
+                record["peak_rss_scope"] = "process"
+            record["children_peak_rss_mb"] = children_peak
+            record["http"] = self._http.to_dict()
+            self.stages.append(record)
+            self._stage, self._http = None, None
+
+    def skipped(self, name: str, **info: Any) -> None:
+        self.stages.append({"name": name, "status": "skipped", **info})
+
+    @contextlib.contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Measure a named step of the current stage (no-op outside a stage)."""
+        stage = self._stage
+        if stage is None:
+            yield
+            return
+        self._fold_peak(reset=True)
+        before = _usage()
+        try:
+            yield
+        finally:
+            after = _usage()
+            hwm = self._fold_peak(reset=True)
+            stage["sections"].append({"name": name, **_delta(before, after),
+                                      "peak_rss_mb": None if hwm is None else round(hwm / 1024, 1)})
+
+    def observe_request(self, seconds: float, status: Optional[int]) -> None:
+        with self._lock:
+            if self._http is not None:
+                self._http.observe(seconds, status)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "version": REPORT_VERSION,
+            "started_at": self.started_at,
+            "finished_at": time.time(),
+            "python": sys.version.split()[0],
+            "pid": os.getpid(),
+            "stages": self.stages,
+        }
+
+    def write(self, path: str = DEFAULT_REPORT) -> Path:
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_suffix(out.suffix + ".tmp")
+        json_io.dump_path(self.report(), tmp, indent=True)
+        os.replace(tmp, out)
+        return out
+
+    def summary_lines(self) -> List[str]:
+        lines = [f"{'stage':<16} {'status':<8} {'wall s':>8} {'cpu s':>8} {'peak MB':>8} {'read MB':>8} {'wrote MB':>8} {'reqs':>6} {'p99 ms':>7}"]
+        for s in self.stages:
+            http = s.get("http") or {}
+            lines.append(f"{s['name']:<16} {s['status']:<8} {s.get('wall_s', 0):>8.2f} {s.get('cpu_s', 0):>8.2f} "
+                         f"{'-' if s.get('peak_rss_mb') is None else format(s['peak_rss_mb'], '.1f'):>8} "
+                         f"{_mb(s.get('read_bytes')):>8} {_mb(s.get('written_bytes')):>8} "
+                         f"{http.get('requests', 0):>6} {http.get('p99_ms', '-'):>7}")
+            for sec in s.get("sections", []):
+                lines.append(f"  {sec['name']:<22} {sec['wall_s']:>8.3f} {sec['cpu_s']:>8.3f}")
+        return lines
+
+
+def activate(metrics: Optional[RunMetrics]) -> None:
+    """Make `metrics` the collector the module-level hooks report to (None turns them off)."""
+    global _current
+    _current = metrics
+
+
+def current() -> Optional[RunMetrics]:
+    return _current
+
+
+@contextlib.contextmanager
+def section(name: str) -> Iterator[None]:
+    """Measure a named step when a collector is active; otherwise do nothing."""
+    if _current is None:
+        yield
+        return
+    with _current.section(name):
+        yield
+
+
+def timed(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """`fn(*args, **kwargs)` measured as section `name`."""
+    with section(name):
+        return fn(*args, **kwargs)
+
+
+def observe_request(seconds: float, status: Optional[int]) -> None:
+    """Record one HTTP request attempt (status None = network error) when a collector is active."""
+    metrics = _current
+    if metrics is not None:
+        metrics.observe_request(seconds, status)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Small stage runner for `run_all.py`: skip stages whose inputs did not change.
+
+Each stage names the module whose `main(argv)` it calls, its arguments, and
+the files or directories it reads and writes. After a stage succeeds, a
+fingerprint of every input and output is saved to
+`data_output/cache/stages.json`. On the next run the stage is skipped when
+its arguments and input fingerprints are unchanged and its outputs are still
+the ones it wrote. Stages marked `always` (the network fetches, whose real
+input is remote) run every time.
+
+Fingerprints:
+  file       sha256 of the content, reused from the state file while the
+             file's size and mtime are unchanged (so unchanged files are not
+             re-read)
+  directory  sha256 over every entry's relative path, size and mtime, except
+             the fetch manifest (`completion_store.SKIP_NAMES`), which no
+             stage reads
+  missing    None
+
+Stages run in the current interpreter by default, so a skipped stage costs
+nothing and a run stage does not pay interpreter start-up or re-import
+pandas/NumPy; `in_process=False` runs each one as `python3 {module}.py` instead.
+
+With a `RunMetrics` collector (`run_all.py --profile`, see run_metrics.py)
+every stage, run or skipped, is recorded in the run report. `profile_stage`
+runs that one stage under cProfile and saves `profile_{name}.prof` (for
+`pstats`/snakeviz) and a `profile_{name}.txt` summary next to the state file.
+cProfile only sees the thread that runs `main()`; fetch worker threads show
+up as time waiting on their futures.
+"""
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import hashlib
+import importlib
+import os
+import pstats
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import json_io
+import run_metrics
+from completion_store import SKIP_NAMES
+
+STATE_VERSION = 1
+DEFAULT_STATE = "data_output/cache/stages.json"
+
+
+class Stage:
+    """One pipeline step: `module.main(argv)` reading `inputs` and writing `outputs`."""
+
+    def __init__(self, name: str, module: str, argv: Sequence[str], inputs: Sequence[str] = (),
+                 outputs: Sequence[str] = (), always: bool = False):
+        self.name = name
+        self.module = module
+        self.argv = [str(a) for a in argv]
+        self.inputs = [str(p) for p in inputs]
+        self.outputs = [str(p) for p in outputs]
+        self.always = always
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _dir_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name in SKIP_NAMES:
+                continue
+            full = os.path.join(root, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            h.update(f"{os.path.relpath(full, path)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return "dir:" + h.hexdigest()
+
+
+class StageRunner:
+    def __init__(self, state_path: str = DEFAULT_STATE, force: bool = False, in_process: bool = True,
+                 metrics: Optional[run_metrics.RunMetrics] = None, profile_stage: Optional[str] = None):
+        self.state_path = Path(state_path)
+        self.force = force
+        self.in_process = in_process
+        self.metrics = metrics
+        self.profile_stage = profile_stage
+        self.state = self._load()
+        # path -> [size, mtime_ns, sha256], so unchanged files are never re-read
+        self.files: Dict[str, list] = self.state.setdefault("files", {})
+
+    def _load(self) -> dict:
+        try:
+            state = json_io.load_path(self.state_path)
+        except (OSError, ValueError):
+            return {"version": STATE_VERSION, "stages": {}}
+        if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+            return {"version": STATE_VERSION, "stages": {}}
+        state.setdefault("stages", {})
+        return state
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        json_io.dump_path(self.state, tmp, indent=True, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        p = Path(path)
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        if p.is_dir():
+            return _dir_digest(p)
+        cached = self.files.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = _file_sha256(p)
+        self.files[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def fingerprints(self, paths: Sequence[str]) -> Dict[str, Optional[str]]:
+        return {p: self.fingerprint(p) for p in paths}
+
+    def is_fresh(self, stage: Stage) -> bool:
+        """True if the stage last ran with these arguments and inputs and its outputs are untouched."""
+        record = self.state["stages"].get(stage.name)
+        if self.force or stage.always or not record:
+            return False
+        if record.get("module") != stage.module or record.get("argv") != stage.argv:
+            return False
+        if record.get("inputs") != self.fingerprints(stage.inputs):
+            return False
+        outputs = self.fingerprints(stage.outputs)
+        return None not in outputs.values() and record.get("outputs") == outputs
+
+    def run(self, stage: Stage) -> bool:
+        """Run `stage` unless it is fresh; returns True if it ran."""
+        if self.is_fresh(stage):
+            print(f"\n>>> Skipping {stage.name} (inputs unchanged)")
+            if self.metrics is not None:
+                self.metrics.skipped(stage.name, module=stage.module, argv=stage.argv)
+            return False
+        inputs = self.fingerprints(stage.inputs)
+        print(f"\n>>> Running {stage.name}: {stage.module}.py {' '.join(stage.argv)}".rstrip())
+        profile = self.profile_path(stage) if stage.name == self.profile_stage else None
+        measured = (self.metrics.stage(stage.name, module=stage.module, argv=stage.argv, in_process=self.in_process)
+                    if self.metrics is not None else contextlib.nullcontext())
+        start = time.perf_counter()
+        with measured:
+            if self.in_process:
+                self._call_main(stage, profile)
+            else:
+                self._run_subprocess(stage, profile)
+        self.state["stages"][stage.name] = {
+            "module": stage.module,
+            "argv": stage.argv,
+            "inputs": inputs,
+            "outputs": self.fingerprints(stage.outputs),
+            "seconds": round(time.perf_counter() - start, 3),
+            "finished_at": time.time(),
+        }
+        self.save()
+        return True
+
+    def profile_path(self, stage: Stage) -> Path:
+        return self.state_path.parent / f"profile_{stage.name}.prof"
+
+    @staticmethod
+    def _call_main(stage: Stage, profile: Optional[Path] = None) -> None:
+        module = importlib.import_module(stage.module)
+        profiler = cProfile.Profile() if profile is not None else None
+        try:
+            if profiler is not None:
+                profiler.enable()
+            module.main(list(stage.argv))
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                raise RuntimeError(f"Stage {stage.name} failed (exit {e.code})")
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _save_profile(profiler, profile)
+
+    @staticmethod
+    def _run_subprocess(stage: Stage, profile: Optional[Path] = None) -> None:
+        script = Path(__file__).parent / f"{stage.module}.py"
+        cmd: List[str] = [sys.executable or "python3"]
+        if profile is not None:
+            profile.parent.mkdir(parents=True, exist_ok=True)
+            cmd += ["-m", "cProfile", "-o", str(profile)]
+        cmd += [str(script)] + stage.argv
+        proc = subprocess.run(cmd)
+        if profile is not None and profile.exists():
+            _save_profile(pstats.Stats(str(profile)), profile)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Command failed: {' '.join(cmd)} (exit {proc.returncode})")
+
+
+def _save_profile(profile, path: Path, limit: int = 40) -> None:
+    """Write `profile` (a Profile or Stats) to `path` and a cumulative-time summary to `path.txt`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(profile, cProfile.Profile):
+        profile.dump_stats(str(path))
+    with path.with_suffix(".txt").open("w", encoding="utf-8") as out:
+        pstats.Stats(str(path), stream=out).sort_stats("cumulative").print_stats(limit)
+    print(f"Saved cProfile stats to {path} (top {limit} by cumulative time in {path.with_suffix('.txt')})")
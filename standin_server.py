@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Local stand-in for the NYT crossword endpoints.
+
+Serves, over HTTP/1.1 with keep-alive, so the fetch engines in
+`build_puzzle_data.py`, `fetch_puzzles.py` and `nyt_http.py` can be exercised
+without a session cookie or network access:
+
+  /svc/crosswords/v3/36569100/puzzles.json?date_start=...&date_end=...
+  /svc/crosswords/v6/game/{id}.json
+
+Listings are synthetic: one puzzle per day whose id is derived from the date.
+Game responses are read from `--fixtures-dir/{id}.json` when that file exists,
+otherwise a small synthetic game JSON is generated from the id.
+
+Every response can be delayed by `--latency` seconds plus an exponentially
+distributed extra with mean `--jitter` (a long-tailed round-trip time).
+Faults can be injected to exercise retry and rate control: `--error-rate`
+answers that fraction of requests with 503, `--throttle-rate` with 429,
+`--max-rps` answers 429 whenever more than that many requests arrived in the
+last second, and `--burst-every N --burst-length S` answers every request with
+429 during the last S seconds of each N-second period. 429s carry
+`Retry-After: --retry-after`.
+
+Usage:
+    python3 standin_server.py --port 8765
+    python3 standin_server.py --port 8765 --fixtures-dir data_output/puzzle_completion_data
+    python3 standin_server.py --port 8765 --error-rate 0.05 --max-rps 20 --retry-after 1
+    python3 standin_server.py --port 8765 --latency 0.08 --jitter 0.04 --burst-every 10 --burst-length 1
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import json_io
+
+GAME_RE = re.compile(r"^/svc/crosswords/v6/game/(\d+)\.json$")
+LISTING_RE = re.compile(r"^/svc/crosswords/v3/\d+/puzzles\.json$")
+
+# Synthetic puzzle ids count up one per day from this date.
+_ID_EPOCH = date(1993, 11, 21)
+_AUTHORS = ["Ada Lovelace", "Will Weng", "Eugene Maleska", "Margaret Farrar", "Lynn Lempel", "Patrick Berry"]
+
+
+def synthetic_listing(date_start: date, date_end: date, publish_type: str = "daily") -> dict:
+    """One puzzle metadata record per day in [date_start, date_end]."""
+    results = []
+    day = date_start
+    while day <= date_end:
+        puzzle_id = (day - _ID_EPOCH).days
+        rng = random.Random(puzzle_id)
+        solved = rng.random() < 0.7
+        filled = 100 if solved else rng.choice([0, 0, 12, 48, 96])
+        results.append({
+            "author": rng.choice(_AUTHORS),
+            "editor": "Will Shortz",
+            "format_type": "Normal",
+            "print_date": day.isoformat(),
+            "publish_type": publish_type.capitalize(),
+            "puzzle_id": puzzle_id,
+            "title": "",
+            "version": 0,
+            "percent_filled": filled,
+            "solved": solved,
+            "star": "Gold" if solved and rng.random() < 0.8 else None,
+        })
+        day += timedelta(days=1)
+    return {"status": "OK", "results": results}
+
+
+def synthetic_game(puzzle_id: int, size: int = 15) -> dict:
+    """Build a plausible solved game JSON for `puzzle_id`."""
+    rng = random.Random(puzzle_id)
+    cells = []
+    t = rng.randint(1_700_000_000, 1_760_000_000)
+    first = t
+    for _ in range(size * size):
+        if rng.random() < 0.16:
+            cells.append({"blank": True})
+            continue
+        t += rng.randint(1, 12)
+        cells.append({"guess": chr(ord("A") + rng.randrange(26)), "timestamp": t})
+    return {
+        "puzzleID": puzzle_id,
+        "board": {"cells": cells},
+        "calcs": {"percentFilled": 100, "secondsSpentSolving": t - first, "solved": True},
+        "firsts": {"opened": first, "solved": t},
+    }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "StandInServer"
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+        fault = self.server.count_request()
+        delay = self.server.response_delay()
+        if delay > 0:
+            time.sleep(delay)
+        if fault is not None:
+            status, retry_after = fault
+            self._send(status, b'{"error":"injected fault"}', retry_after=retry_after)
+            return
+        parts = urlsplit(self.path)
+        if LISTING_RE.match(parts.path):
+            self._listing(parse_qs(parts.query))
+            return
+        m = GAME_RE.match(parts.path)
+        if not m:
+            self._send(404, b'{"error":"not found"}')
+            return
+        puzzle_id = int(m.group(1))
+        body: Optional[bytes] = None
+        if self.server.fixtures_dir is not None:
+            path = self.server.fixtures_dir / f"{puzzle_id}.json"
+            if path.exists():
+                body = path.read_bytes()
+        if body is None:
+            body = json_io.dumpb(synthetic_game(puzzle_id))
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", etag=etag)
+            return
+        self._send(200, body, etag=etag)
+
+    def _listing(self, query: dict) -> None:
+        try:
+            start = date.fromisoformat(query["date_start"][0])
+            end = date.fromisoformat(query["date_end"][0])
+        except (KeyError, ValueError):
+            self._send(400, b'{"error":"date_start and date_end are required"}')
+            return
+        publish_type = query.get("publish_type", ["daily"])[0]
+        self._send(200, json_io.dumpb(synthetic_listing(start, end, publish_type)))
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None, retry_after: Optional[float] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        if retry_after is not None:
+            self.send_header("Retry-After", f"{retry_after:g}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:  # keep test output quiet
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, fixtures_dir: Optional[Path] = None, verbose: bool = False,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, max_rps: Optional[float] = None,
+                 retry_after: Optional[float] = 1.0, seed: Optional[int] = None, latency: float = 0.0,
+                 jitter: float = 0.0, burst_every: Optional[float] = None, burst_length: float = 1.0):
+        super().__init__(addr, StandInHandler)
+        self.fixtures_dir = fixtures_dir
+        self.verbose = verbose
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.latency = latency
+        self.jitter = jitter
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.started = time.monotonic()
+        self.requests = 0
+        self.connections = 0
+        self.faults = {429: 0, 503: 0}
+        self._recent: deque = deque()
+        self._rng = random.Random(seed)
+        self._stats_lock = threading.Lock()
+
+    def count_request(self) -> Optional[tuple]:
+        """Count a request and decide whether to inject a fault: returns (status, retry_after) or None."""
+        now = time.monotonic()
+        with self._stats_lock:
+            self.requests += 1
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            fault = None
+            if self.in_burst(now):
+                fault = (429, self.retry_after)
+            elif self.max_rps is not None and len(self._recent) > self.max_rps:
+                fault = (429, self.retry_after)
+            elif self._rng.random() < self.throttle_rate:
+                fault = (429, self.retry_after)
+            elif self._rng.random() < self.error_rate:
+                fault = (503, None)
+            if fault is not None:
+                self.faults[fault[0]] += 1
+            return fault
+
+    def in_burst(self, now: float) -> bool:
+        """True during the last `burst_length` seconds of each `burst_every`-second period."""
+        if not self.burst_every:
+            return False
+        return (now - self.started) % self.burst_every >= self.burst_every - self.burst_length
+
+    def response_delay(self) -> float:
+        """Seconds to hold the next response: `latency` plus an exponential extra with mean `jitter`."""
+        if self.jitter <= 0:
+            return self.latency
+        with self._stats_lock:
+            return self.latency + self._rng.expovariate(1.0 / self.jitter)
+
+    def process_request(self, request, client_address):
+        with self._stats_lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_thread(port: int = 0, fixtures_dir: Optional[Path] = None, **faults) -> StandInServer:
+    """Start a stand-in server on a background thread (port 0 picks a free port).
+
+    Keyword arguments are passed to `StandInServer` (error_rate, throttle_rate, max_rps, latency,
+    jitter, burst_every, ...).
+    """
+    server = StandInServer(("127.0.0.1", port), fixtures_dir=fixtures_dir, **faults)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Serve a local stand-in for the NYT crossword endpoints")
+    p.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    p.add_argument("--fixtures-dir", help="Directory of {puzzle_id}.json files to serve when present")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    p.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    p.add_argument("--max-rps", type=float, help="Answer 429 when more than this many requests arrive within one second")
+    p.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429 responses (default: 1)")
+    p.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response (default: 0)")
+    p.add_argument("--jitter", type=float, default=0.0, help="Mean of an extra exponential delay per response, in seconds (default: 0)")
+    p.add_argument("--burst-every", type=float, help="Answer everything with 429 once per this many seconds")
+    p.add_argument("--burst-length", type=float, default=1.0, help="Length of each 429 burst in seconds (default: 1)")
+    p.add_argument("-v", "--verbose", action="store_true", help="Log each request")
+    args = p.parse_args(argv)
+
+    fixtures = Path(args.fixtures_dir) if args.fixtures_dir else None
+    server = StandInServer(("127.0.0.1", args.port), fixtures_dir=fixtures, verbose=args.verbose,
+                           error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                           max_rps=args.max_rps, retry_after=args.retry_after, latency=args.latency,
+                           jitter=args.jitter, burst_every=args.burst_every, burst_length=args.burst_length)
+    print(f"Stand-in NYT server on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {server.requests} requests over {server.connections} connections "
+              f"({server.faults[429]} x 429, {server.faults[503]} x 503 injected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Threaded static file server for the web app in `data_output/`.
+
+A drop-in replacement for `python -m http.server` that is friendlier to the
+app's growing card and completion JSON:
+
+  - one thread per connection, HTTP/1.1 keep-alive
+  - precompressed siblings (`cards.json.br`, `cards.json.gz`) are sent with
+    `Content-Encoding` when the client accepts them; other text assets are
+    gzipped once and kept in a small in-memory cache
+  - `ETag` / `Last-Modified` on every file, answering `If-None-Match` /
+    `If-Modified-Since` with `304 Not Modified`
+  - `Cache-Control: immutable` with a one-year lifetime for content-hashed
+    file names (e.g. `cards.3f9a1c2b.json`); everything else is `no-cache`,
+    i.e. always revalidated, which costs a 304 when nothing changed
+  - single `Range: bytes=...` requests (206 / 416), honouring `If-Range`
+
+`run_all.py` runs it in-process; it can also be started on its own.
+
+Usage:
+    python3 static_server.py --port 8000
+    python3 static_server.py --port 8000 --dir data_output -v
+"""
+from __future__ import annotations
+
+import argparse
+import email.utils
+import functools
+import gzip
+import io
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Content-hashed names: a dot-separated run of 8+ hex digits before the extension
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{8,64}(\.[A-Za-z0-9]+)+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Precompressed siblings, in order of preference: (file suffix, Content-Encoding)
+PRECOMPRESSED = ((".br", "br"), (".gz", "gzip"))
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+GZIP_MIN_BYTES = 1024
+GZIP_MAX_BYTES = 8 * 1024 * 1024
+GZIP_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _accepts(header: str, coding: str) -> bool:
+    """True if an Accept-Encoding header allows `coding` (q=0 disables it)."""
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() in (coding, "*"):
+            q = params.strip()
+            try:
+                return not (q.startswith("q=") and float(q[2:] or 0) == 0)
+            except ValueError:
+                return True
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single-range header; None if it can't be satisfied.
+
+    Raises ValueError for headers this server does not handle (multiple ranges,
+    other units), which are answered with the full body.
+    """
+    m = RANGE_RE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        raise ValueError(header)
+    first, last = m.group(1), m.group(2)
+    if not first:
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "StaticServer"
+
+    def send_head(self):
+        self._remaining = None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # Trailing-slash redirects, index.html and listings work as in http.server
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                return super().send_head()
+            path = index
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        ctype = self.guess_type(path)
+        compressible = ctype.startswith(COMPRESSIBLE_TYPES)
+        body_path, encoding = path, None
+        accept = self.headers.get("Accept-Encoding", "")
+        if compressible and accept:
+            for suffix, coding in PRECOMPRESSED:
+                if _accepts(accept, coding) and os.path.isfile(path + suffix):
+                    body_path, encoding = path + suffix, coding
+                    break
+
+        try:
+            f = open(body_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        st = os.fstat(f.fileno())
+        size = st.st_size
+        if encoding is None and compressible and _accepts(accept, "gzip") and GZIP_MIN_BYTES <= size <= GZIP_MAX_BYTES:
+            data = self.server.gzipped(body_path, st, f)
+            f.close()
+            f, size, encoding = io.BytesIO(data), len(data), "gzip"
+
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + encoding if encoding else ""}"'
+        last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        if self._not_modified(etag, st.st_mtime):
+            f.close()
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(path, etag, last_modified, compressible)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        status, start, end = HTTPStatus.OK, 0, size - 1
+        range_header = self.headers.get("Range")
+        if range_header and size and self._if_range_ok(etag, last_modified):
+            try:
+                span = _parse_range(range_header, size)
+            except ValueError:
+                span = (0, size - 1)
+            if span is None:
+                f.close()
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            if span != (0, size - 1):
+                status, (start, end) = HTTPStatus.PARTIAL_CONTENT, span
+
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self._send_cache_headers(path, etag, last_modified, compressible)
+        self.send_header("Accept-Ranges", "bytes")
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1 if size else 0))
+        self.end_headers()
+        f.seek(start)
+        self._remaining = end - start + 1 if size else 0
+        return f
+
+    def copyfile(self, source, outputfile) -> None:
+        remaining = self._remaining
+        if remaining is None:
+            shutil.copyfileobj(source, outputfile)
+            return
+        while remaining > 0:
+            chunk = source.read(min(64 * 1024, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+    def _send_cache_headers(self, path: str, etag: str, last_modified: str, compressible: bool) -> None:
+        immutable = HASHED_NAME_RE.search(os.path.basename(path)) is not None
+        self.send_header("Cache-Control", IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if compressible:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            tags = [t.strip() for t in inm.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                since = email.utils.parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def _if_range_ok(self, etag: str, last_modified: str) -> bool:
+        if_range = self.headers.get("If-Range")
+        return if_range is None or if_range.strip() in (etag, last_modified)
+
+    def log_message(self, format, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StaticServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, directory: Path, verbose: bool = False):
+        super().__init__(addr, functools.partial(StaticHandler, directory=str(directory)))
+        self.directory = Path(directory)
+        self.verbose = verbose
+        self._gzip_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._gzip_bytes = 0
+        self._gzip_lock = threading.Lock()
+
+    def gzipped(self, path: str, st: os.stat_result, f) -> bytes:
+        """gzip of an open file, cached by (path, mtime, size) up to GZIP_CACHE_BYTES in total."""
+        key = (path, st.st_mtime_ns, st.st_size)
+        with self._gzip_lock:
+            data = self._gzip_cache.get(key)
+            if data is not None:
+                self._gzip_cache.move_to_end(key)
+                return data
+        data = gzip.compress(f.read(), compresslevel=6, mtime=0)
+        with self._gzip_lock:
+            if key not in self._gzip_cache:
+                self._gzip_cache[key] = data
+                self._gzip_bytes += len(data)
+                while self._gzip_bytes > GZIP_CACHE_BYTES and len(self._gzip_cache) > 1:
+                    _, old = self._gzip_cache.popitem(last=False)
+                    self._gzip_bytes -= len(old)
+        return data
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host or 'localhost'}:{port}"
+
+
+def start_in_thread(directory: Path, port: int = 0, host: str = "", verbose: bool = False) -> Tuple[StaticServer, threading.Thread]:
+    """Serve `directory` on a background thread (port 0 picks a free port)."""
+    server = StaticServer((host, port), directory, verbose=verbose)
+    thread = threading.Thread(target=server.serve_forever, name="static-server", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Serve data_output/ with caching, compression and range support")
+    p.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    p.add_argument("--host", default="", help="Address to bind (default: all interfaces)")
+    p.add_argument("--dir", default="data_output", help="Directory to serve (default: data_output)")
+    p.add_argument("-v", "--verbose", action="store_true", help="Log each request")
+    args = p.parse_args(argv)
+
+    server = StaticServer((args.host, args.port), Path(args.dir), verbose=args.verbose)
+    print(f"Serving {args.dir} on http://localhost:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Streaming pipeline: fetch, extract and aggregate concurrently.
+
+The batch path (`fetch_puzzles.py` -> `flatten_results_to_csv.py` ->
+`data_pipeline.py`) waits for each step to finish before the next one starts.
+Here the three steps run at the same time, connected by bounded queues:
+
+  fetch       `--concurrency` threads download game JSONs into the completion
+              store (same manifest, validators and rate control as
+              `fetch_puzzles.py`); puzzles already on disk are handed on
+              without a request
+  extract     `--extract-workers` threads read each landed body from the store,
+              parse it and pull out the solve time
+  aggregate   the main thread folds rows into an `AggregateState` in print-date
+              order (a small reorder buffer of (id, seconds) pairs absorbs
+              out-of-order arrivals), then writes the cards
+
+Each queue holds at most `--queue-size` items and a full queue blocks the
+stage feeding it, and the fetcher never starts a puzzle more than
+`--queue-size` positions ahead of the next one to aggregate. The queues and
+the reorder buffer therefore stay bounded however many puzzles there are,
+and parsing overlaps the network waits. The
+cards equal those of the batch path run on the same data.
+
+Usage:
+    python3 stream_pipeline.py
+    python3 stream_pipeline.py -i data_output/puzzle_data.ndjson --pack
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from aggregates import AggregateState
+from completion_store import PACK_SUFFIX, DirectoryStore, PackStore, Store
+from fetch_puzzles import (SELECTION_MODES, _metadata_state, fetch_one, load_cookie, load_manifest,
+                           load_puzzle_records, manifest_entry_from_body, needs_refresh, save_manifest)
+from flatten_results_to_csv import seconds_from_completion_data
+import json_io
+from nyt_http import BASE_URL_ENV, DEFAULT_BASE_URL, ConnectionPool, RateController, resolve_base_url
+
+_DONE = object()
+INGEST_CHUNK = 256
+
+
+class StreamStats:
+    """Counters shared by the stages (updated under `lock`)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fetched = 0
+        self.not_modified = 0
+        self.failed = 0
+        self.cached = 0
+        self.extracted = 0
+        self.ingested = 0
+        self.max_reorder = 0
+        # notified whenever `ingested` (the aggregate stage's cursor) advances or the run is aborted
+        self.advanced = threading.Condition(self.lock)
+        self.aborted = False
+
+
+def _fetch_stage(records: List[dict], store: Store, manifest: Dict[str, dict], out_dir: Path, cookie: str,
+                 landed: "queue.Queue", args, stats: StreamStats, base_url: str,
+                 controller: RateController, extract_workers: int) -> None:
+    """Put every record's puzzle_id on `landed` once its body is in the store (or its fetch failed).
+
+    No record is started more than `--queue-size` positions ahead of the
+    aggregate stage's cursor, so one slow fetch (e.g. a Retry-After backoff)
+    can't let every later result pile up in the reorder buffer.
+    """
+    concurrency = max(1, args.concurrency)
+    window = max(1, args.queue_size)
+    in_flight = threading.BoundedSemaphore(concurrency + args.queue_size)
+    manifest_lock = threading.Lock()
+
+    def _work(rec: dict) -> None:
+        pid = rec["puzzle_id"]
+        try:
+            validators = None if args.force else manifest.get(str(pid))
+            info = fetch_one(pid, cookie, out_dir / f"{pid}.json", pool=pool, validators=validators,
+                             controller=controller, retries=args.retries, store=store)
+            filled, solved = _metadata_state(rec)
+            with manifest_lock:
+                manifest[str(pid)] = {
+                    "fetched_at": time.time(),
+                    "sha256": info.get("sha256"),
+                    "percent_filled": filled,
+                    "solved": solved,
+                    "etag": info.get("etag"),
+                    "last_modified": info.get("last_modified"),
+                }
+            with stats.lock:
+                if info["status"] == 304:
+                    stats.not_modified += 1
+                else:
+                    stats.fetched += 1
+        except Exception as e:
+            print(f"ERROR fetching {pid}: {e}")
+            with stats.lock:
+                stats.failed += 1
+        finally:
+            landed.put(pid)  # blocks while the extractors are behind
+            in_flight.release()
+
+    try:
+        with ConnectionPool(base_url, max_size=concurrency) as pool, \
+                ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index, rec in enumerate(records):
+                with stats.advanced:
+                    stats.advanced.wait_for(lambda: stats.aborted or index - stats.ingested < window)
+                    if stats.aborted:
+                        return
+                pid = rec["puzzle_id"]
+                present = store.has(pid)
+                entry = manifest.get(str(pid))
+                if entry is None and present:
+                    fetched_at = store.file_path(pid).stat().st_mtime if isinstance(store, DirectoryStore) else time.time()
+                    entry = manifest_entry_from_body(store.get(pid), fetched_at)
+                    if entry is not None:
+                        with manifest_lock:
+                            manifest[str(pid)] = entry
+                wanted = args.force or (needs_refresh(rec, entry, present) if args.refresh_stale else not present)
+                if not wanted:
+                    with stats.lock:
+                        stats.cached += 1
+                    landed.put(pid)
+                    continue
+                in_flight.acquire()  # caps submitted-but-unfinished fetches
+                executor.submit(_work, rec)
+    finally:
+        for _ in range(extract_workers):
+            landed.put(_DONE)
+
+
+def _extract_stage(store: Store, landed: "queue.Queue", rows: "queue.Queue", stats: StreamStats) -> None:
+    """Turn landed puzzle_ids into (puzzle_id, seconds or None) rows."""
+    try:
+        while True:
+            pid = landed.get()
+            if pid is _DONE:
+                return
+            try:
+                body = store.get(pid)
+                seconds = seconds_from_completion_data(json_io.loads(body)) if body else None
+            except Exception as e:
+                print(f"ERROR extracting {pid}: {e}")
+                seconds = None
+            with stats.lock:
+                stats.extracted += 1
+            rows.put((pid, seconds))
+    finally:
+        rows.put(_DONE)
+
+
+def _drain(q: "queue.Queue") -> None:
+    while True:
+        q.get()
+
+
+def _chunk_frame(records: List[dict], seconds: List[Optional[int]]) -> pd.DataFrame:
+    """A solved-table chunk in the shape `data_pipeline.select_solved` expects."""
+    from data_pipeline import select_solved
+
+    df = pd.DataFrame({
+        "puzzle_id": [r["puzzle_id"] for r in records],
+        "print_date": pd.to_datetime([str(r.get("print_date"))[:10] for r in records]),
+        "author": [r.get("author") for r in records],
+        "star": [r.get("star") for r in records],
+        "solved": [r.get("solved") is True or str(r.get("solved")).lower() == "true" for r in records],
+        "percent_filled": pd.to_numeric(pd.Series([r.get("percent_filled") for r in records], dtype=object),
+                                        errors="coerce").astype("float32"),
+        "secondsSpentSolving": pd.Series([float("nan") if v is None else float(v) for v in seconds], dtype="float64"),
+    })
+    return select_solved(df)
+
+
+def _aggregate_stage(records: List[dict], rows: "queue.Queue", extract_workers: int, state: AggregateState,
+                     stats: StreamStats) -> None:
+    """Ingest rows into `state` in the order of `records` (sorted by print date)."""
+    position = {r["puzzle_id"]: i for i, r in enumerate(records)}
+    ready: Dict[int, Optional[int]] = {}
+    cursor = 0
+    batch_recs: List[dict] = []
+    batch_secs: List[Optional[int]] = []
+
+    def flush() -> None:
+        if batch_recs:
+            state.ingest(_chunk_frame(batch_recs, batch_secs))
+            batch_recs.clear()
+            batch_secs.clear()
+
+    finished = 0
+    while finished < extract_workers:
+        item = rows.get()
+        if item is _DONE:
+            finished += 1
+            continue
+        pid, seconds = item
+        ready[position[pid]] = seconds
+        with stats.lock:
+            stats.max_reorder = max(stats.max_reorder, len(ready))
+        while cursor in ready:
+            rec = records[cursor]
+            # ingest() requires later chunks to start after the last date, so only cut between dates
+            if len(batch_recs) >= INGEST_CHUNK and str(rec.get("print_date"))[:10] != str(batch_recs[-1].get("print_date"))[:10]:
+                flush()
+            batch_recs.append(rec)
+            batch_secs.append(ready.pop(cursor))
+            cursor += 1
+            with stats.advanced:
+                stats.ingested += 1
+                stats.advanced.notify_all()
+    flush()
+    if cursor != len(records):
+        raise RuntimeError(f"Stream ended after {cursor} of {len(records)} puzzles")
+
+
+def run_stream(args, base_url: Optional[str] = None) -> Optional[AggregateState]:
+    """Fetch, extract and aggregate concurrently; returns the aggregate state (None on setup errors).
+
+    `base_url` overrides `args.base_url`; both default to `$NYT_BASE_URL` or the live site.
+    """
+    base_url = resolve_base_url(base_url or getattr(args, "base_url", None))
+    inp = Path(args.input)
+    out_dir = Path(args.out_dir)
+    if not inp.exists():
+        print(f"Input file not found: {inp}")
+        return None
+    try:
+        cookie = load_cookie(Path(args.cookie_file))
+    except Exception as e:
+        print(f"Error reading cookie: {e}")
+        return None
+
+    records, seen = [], set()
+    for rec in load_puzzle_records(inp, only=args.only):
+        if rec["puzzle_id"] not in seen:
+            seen.add(rec["puzzle_id"])
+            records.append(rec)
+    records.sort(key=lambda r: str(r.get("print_date"))[:10])
+    store: Store = PackStore(out_dir.with_name(out_dir.name + PACK_SUFFIX)) if args.pack else DirectoryStore(out_dir)
+    manifest = load_manifest(out_dir)
+    extract_workers = max(1, args.extract_workers)
+    landed: "queue.Queue" = queue.Queue(maxsize=args.queue_size)
+    rows: "queue.Queue" = queue.Queue(maxsize=args.queue_size)
+    stats = StreamStats()
+    state = AggregateState({"input": os.path.abspath(str(inp)), "stream": True})
+    controller = RateController(rate=1.0 / args.delay if args.delay > 0 else args.max_rate, max_rate=args.max_rate,
+                                concurrency=max(1, args.concurrency))
+    print(f"Streaming {len(records)} puzzles (selection: {args.only}) through {args.concurrency} fetcher(s) "
+          f"and {extract_workers} extractor(s), queues of {args.queue_size}")
+
+    start = time.perf_counter()
+    errors: List[BaseException] = []
+
+    def _guard(fn, *a):
+        def run():
+            try:
+                fn(*a)
+            except BaseException as e:  # surfaced after join
+                errors.append(e)
+        return run
+
+    threads = [threading.Thread(target=_guard(_fetch_stage, records, store, manifest, out_dir, cookie, landed, args,
+                                              stats, base_url, controller, extract_workers), name="stream-fetch")]
+    threads += [threading.Thread(target=_guard(_extract_stage, store, landed, rows, stats), name=f"stream-extract-{i}")
+                for i in range(extract_workers)]
+    for t in threads:
+        t.start()
+    try:
+        _aggregate_stage(records, rows, extract_workers, state, stats)
+    except BaseException:
+        # stop the fetcher waiting on the cursor, and keep the upstream stages from blocking on a full queue
+        with stats.advanced:
+            stats.aborted = True
+            stats.advanced.notify_all()
+        threading.Thread(target=_drain, args=(rows,), daemon=True).start()
+        raise
+    finally:
+        for t in threads:
+            t.join()
+        store.close()
+        save_manifest(out_dir, manifest)
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start
+    print(f"Streamed {stats.ingested} puzzles in {elapsed:.2f}s: {stats.fetched} fetched, {stats.not_modified} unchanged, "
+          f"{stats.cached} already stored, {stats.failed} failed; reorder buffer peaked at {stats.max_reorder}")
+    if controller.requests:
+        print(f"Requests: {controller.summary()}")
+    print(f"Aggregated {state.rows} solved puzzles")
+    return state
+
+
+def main(argv=None) -> None:
+    from data_pipeline import CARD4_POINTS_PER_DAY, build_cards_from_state, save_all_cards
+
+    p = argparse.ArgumentParser(description="Fetch, extract and aggregate puzzle data concurrently, then write the cards")
+    p.add_argument("-i", "--input", default="data_output/puzzle_data.json", help="Puzzle metadata (JSON or NDJSON)")
+    p.add_argument("-c", "--cookie-file", default="subscription_header.txt", help="File containing NYT cookie value (or full NYT-S=...)")
+    p.add_argument("-o", "--out-dir", default="data_output/puzzle_completion_data", help="Completion store directory")
+    p.add_argument("--pack", action="store_true", help="Store completions in `{out-dir}.pack` instead of one file each")
+    p.add_argument("--only", choices=SELECTION_MODES, default="solved", help="Which puzzles to fetch (default: solved)")
+    p.add_argument("--force", action="store_true", help="Refetch every puzzle")
+    p.add_argument("--refresh-stale", action="store_true", help="Refetch unfinished or changed puzzles (uses manifest.json)")
+    p.add_argument("--delay", type=float, default=0.3, help="Initial spacing between requests in seconds (default: 0.3)")
+    p.add_argument("--max-rate", type=float, default=10.0, help="Upper bound on requests per second (default: 10)")
+    p.add_argument("--concurrency", type=int, default=4, help="Concurrent fetches (default: 4)")
+    p.add_argument("--retries", type=int, default=3, help="Number of attempts per request (default: 3)")
+    p.add_argument("--extract-workers", type=int, default=2, help="Extractor threads (default: 2)")
+    p.add_argument("--base-url", help=f"Service to fetch from, e.g. a local standin_server.py (default: ${BASE_URL_ENV} or {DEFAULT_BASE_URL})")
+    p.add_argument("--queue-size", type=int, default=64, help="Capacity of each queue between stages (default: 64)")
+    p.add_argument("--card-dir", default="data_output/card_data", help="Where to write the card JSON files")
+    p.add_argument("--card4-points", type=int, default=CARD4_POINTS_PER_DAY,
+                   help=f"Max points per weekday line in the card 4 chart (default: {CARD4_POINTS_PER_DAY})")
+    p.add_argument("--compact", action="store_true", help="Write the card JSON files without indentation")
+    args = p.parse_args(argv)
+
+    state = run_stream(args)
+    if state is None:
+        sys.exit(1)
+    if not state.rows:
+        print("No solved puzzles to build cards from")
+        return
+    completion = str(Path(args.out_dir).with_name(Path(args.out_dir).name + PACK_SUFFIX)) if args.pack else args.out_dir
+    save_all_cards(build_cards_from_state(state, args.card4_points), "", args.card_dir, completion,
+                   compact=args.compact, solved=state.solved_frame())
+
+
+if __name__ == "__main__":
+    main()